@@ -1,2 +1,7 @@
 """Receive and/or send commands to radio controlled sockets (model GT-FSI-11) from brand 'Globaltronics'."""
-from .gtsocket import *
\ No newline at end of file
+from .gtsocket import *
+from . import gtsocket as _gtsocket
+
+def __getattr__(name):
+    """Return settings and config of the gtsocket module, which are loaded on first access (python 3.7+)."""
+    return getattr(_gtsocket, name)
@@ -0,0 +1,157 @@
+"""Receive commands from radio controlled sockets (model GT-FSI-11) from brand 'Globaltronics' in an asyncio event loop. Requires python 3.7."""
+"""
+    Copyright (C) 2018  Markus Funke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+from collections import deque
+from threading import Condition, Lock
+from .gtsocket import SocketError, COMMAND_STREAM_OVERFLOWS
+
+class CommandStream():
+    """Asynchronous iterator of the CommandEvents received for some sockets (use with async for in an asyncio event loop).
+
+    Events are put into a queue of limited size by the receiving thread and
+    taken out by the event loop. If the queue is full, the receiving thread
+    waits until the event loop took events out (overflow 'block', like
+    gtsocket.workers.CommandEventStream) or drops the oldest event in it
+    (overflow 'drop_oldest', see dropped_events), so a slow consumer gets the
+    latest commands without holding up decoding (which could overflow the
+    edge buffer). Events put in the event loop itself never wait (it could
+    not take them out), they are queued beyond max_queue_size.
+
+    Use Receiver.commands() to create a stream and close it once done
+    (or use it as context manager).
+    """
+    def __init__(self, receiver, sockets, max_queue_size = 16, loop = None, overflow = 'block'):
+        if overflow not in COMMAND_STREAM_OVERFLOWS: raise SocketError('Unknown overflow {} of command stream.'.format(overflow))
+        self.receiver = receiver
+        self.sockets = list(sockets)
+        self.max_queue_size = max_queue_size
+        self.overflow = overflow
+        """What happens if an event is put into the full queue (see COMMAND_STREAM_OVERFLOWS)."""
+        self.loop = loop if loop is not None else asyncio.get_running_loop()
+        """Event loop the events are taken out in (default: the one running when the stream is created)."""
+        self.dropped_events = 0
+        """Number of events which were dropped since the queue was full."""
+        self.__events = deque()
+        self.__lock = Lock()
+        """Lock of the queued events, dropped_events and the closed flag, which the receiving thread and the event loop access."""
+        self.__not_full = Condition(self.__lock)
+        """Notified when events were taken out of the queue or the stream is closed (the receiving thread waits for it with overflow 'block')."""
+        self.__waiters = deque()
+        """Futures of the consumers waiting for the next event (only accessed in the event loop)."""
+        self.__wakeup_scheduled = False
+        self.__closed = False
+        self.__added_sockets = []
+        """Sockets which were registered at the receiver for this stream (and are unregistered when it is closed)."""
+
+        for socket in self.sockets:
+            socket.add_command_event_handler(self._put)
+        for socket in self.sockets:
+            if socket not in self.receiver.get_sockets():
+                self.receiver.add_socket(socket)
+                self.__added_sockets.append(socket)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        """Return awaitable of the next CommandEvent, which raises StopAsyncIteration once the stream is closed and empty."""
+        next_event = self.loop.create_future()
+        self.__waiters.append(next_event)
+        self.__wake_waiters()
+        return next_event
+
+    def qsize(self):
+        """Return number of events waiting to be taken out of the stream."""
+        with self.__lock:
+            return len(self.__events)
+
+    def close(self):
+        """Stop putting events into the stream. Events already in the stream can still be taken out."""
+        with self.__lock:
+            if self.__closed: return
+            self.__closed = True
+            self.__not_full.notify_all()
+        for socket in self.sockets:
+            if self._put in socket._command_event_handlers: socket._command_event_handlers.remove(self._put)
+        for socket in self.__added_sockets:
+            self.receiver.remove_socket(socket)
+        # wake up consumers waiting for the next event
+        self.__schedule_wakeup(True)
+
+    def _put(self, command_event):
+        """Put given command event into the queue. If it is full, wait until events were taken out or drop the oldest one (see overflow)."""
+        in_loop = self.__is_in_loop()
+        with self.__lock:
+            if self.overflow == 'block' and not in_loop:
+                while len(self.__events) >= self.max_queue_size and not self.__closed:
+                    self.__not_full.wait()
+            if self.__closed: return
+            if self.overflow == 'drop_oldest' and len(self.__events) >= self.max_queue_size:
+                self.__events.popleft()
+                self.dropped_events += 1
+            self.__events.append(command_event)
+        self.__schedule_wakeup()
+
+    def __is_in_loop(self):
+        """Return whether the event loop of the stream is running in the current thread."""
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def __schedule_wakeup(self, force = False):
+        """Let the event loop hand queued events to waiting consumers (at most one wakeup is pending unless forced)."""
+        with self.__lock:
+            if self.__wakeup_scheduled and not force: return
+            self.__wakeup_scheduled = True
+        try:
+            self.loop.call_soon_threadsafe(self.__wake_waiters)
+        except RuntimeError:
+            # event loop is closed
+            pass
+
+    def __wake_waiters(self):
+        """Hand queued events to the waiting consumers in the order they wait (called in the event loop)."""
+        with self.__lock:
+            self.__wakeup_scheduled = False
+        while len(self.__waiters) > 0:
+            waiter = self.__waiters[0]
+            if waiter.done():
+                # consumer was cancelled
+                self.__waiters.popleft()
+                continue
+            with self.__lock:
+                if len(self.__events) > 0:
+                    event = self.__events.popleft()
+                    self.__not_full.notify()
+                elif self.__closed:
+                    event = None
+                else:
+                    break
+            self.__waiters.popleft()
+            if event is None:
+                waiter.set_exception(StopAsyncIteration())
+            else:
+                waiter.set_result(event)
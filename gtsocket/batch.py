@@ -0,0 +1,180 @@
+from __future__ import division # python 2 compatibility
+"""Decode long streams of captured signals at once with NumPy (e.g. to analyse edge recordings offline). Requires numpy (pip install gtsocket[batch])."""
+"""
+    Copyright (C) 2018  Markus Funke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy
+
+from .gtsocket import EdgeRecording, EDGE_RECORDING_HEADER, _get_signal, _setting
+
+EDGE_RECORDING_DTYPE = numpy.dtype([('time', '<i8'), ('value', 'u1')])
+"""NumPy data type of the edges in an edge recording file (see EdgeRecorder)."""
+
+def get_signals(edge_times, values):
+    """Return array of signals (microsec, negative if OFF) between given edges (arrays of times (nanosec) and pin values after the edges) like the receiver gets them."""
+    edge_times = numpy.asarray(edge_times, dtype=numpy.int64)
+    values = numpy.asarray(values)
+    signals = numpy.rint(numpy.diff(edge_times) / 1000).astype(numpy.int64)
+    if (signals == 0).any():
+        # edges less than half a microsec apart: the receiver ignores the second edge (and measures the next signal from the first one)
+        signals = []
+        last_time = None
+        for edge_time, value in zip(edge_times.tolist(), values.tolist()):
+            if last_time is not None:
+                signal = _get_signal(last_time, edge_time, value)
+                if signal == 0: continue
+                signals.append(signal)
+            last_time = edge_time
+        return numpy.array(signals, dtype=numpy.int64)
+    signals[values[1:] != 0] *= -1
+    return signals
+
+def read_edge_recording(path):
+    """Return tuple of arrays of times (nanosec since first edge) and pin values of all edges in given edge recording file. The file is memory-mapped, not read."""
+    recording = EdgeRecording(path)
+    clock_resolution, edge_count = recording.clock_resolution, len(recording)
+    recording.close()
+    if edge_count == 0: return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.uint8)
+    edges = numpy.memmap(path, dtype=EDGE_RECORDING_DTYPE, mode='r', offset=EDGE_RECORDING_HEADER.size, shape=(edge_count,))
+    return edges['time'] * clock_resolution, edges['value']
+
+class DecodedFrame():
+    """Signal sequence (init sequence and binary signals) found by the BatchDecoder."""
+    def __init__(self, offset, length, encoding_name, encoding, signal_sequence, data_sequence):
+        self.offset = offset
+        """Position of the first signal (of the init sequence) in the decoded signals."""
+        self.length = length
+        """Number of signals of the frame."""
+        self.encoding_name = encoding_name
+        self.encoding = encoding
+        self.signal_sequence = signal_sequence
+        """Best fitting signals of the frame, as handed to signal handlers."""
+        self.data_sequence = data_sequence
+        """Decoded data (str of 1s and 0s, empty if the binary signals are not valid)."""
+
+    def __repr__(self):
+        return 'DecodedFrame(offset={}, length={}, encoding={}, data={})'.format(self.offset, self.length, self.encoding_name, self.data_sequence)
+
+class BatchDecoder():
+    """Decodes a whole array of signals at once with the same result as the receiver decoding them one by one.
+
+    Each signal is classified with the signal classifiers of each encoding
+    in one vectorized operation, init sequences are found by comparing
+    shifted arrays and the end of the binary signals of each frame is looked
+    up in the positions of all signals which are no binary signals. Only the
+    frames themselves are handled one by one.
+    """
+    def __init__(self, encodings):
+        """Initialize decoder with given encodings (dict or list of tuples of encoding name and encoding, in the order encodings are checked)."""
+        if isinstance(encodings, dict): encodings = list(encodings.items())
+        self._encodings = list(encodings)
+        self._max_init_sequence_length = max([0] + [len(encoding.init_signal_sequence) for _, encoding in self._encodings])
+        self.__tables = {}
+
+    def __classify(self, signals, signal_classifier):
+        """Return array of best fitting signals for given signals (0 if no signal fits)."""
+        table = self.__tables.get(id(signal_classifier))
+        if table is None:
+            table = numpy.array([0 if signal is None else signal for signal in signal_classifier.table], dtype=numpy.int64)
+            self.__tables[id(signal_classifier)] = table
+        indexes = signals - signal_classifier.offset
+        valid = (indexes >= 0) & (indexes < len(table))
+        best_fitting_signals = numpy.zeros(len(signals), dtype=numpy.int64)
+        best_fitting_signals[valid] = table[indexes[valid]]
+        return best_fitting_signals
+
+    def decode(self, signals):
+        """Return list of DecodedFrame for all signal sequences in given signals (microsec, negative if OFF) which the receiver would hand to signal handlers.
+
+        Signals of length 0 are ignored like the receiver does. The end of
+        the given signals ends the last frame (like the silence after the last
+        edge processed with Receiver.process_edges()).
+        """
+        signals = numpy.asarray(signals, dtype=numpy.int64)
+        positions = numpy.flatnonzero(signals)
+        signals = signals[positions]
+        signal_count = len(signals)
+
+        init_ends = []
+        """Sorted positions of the last signals of all init sequences per encoding."""
+        binary_signals = []
+        """Best fitting binary signals per encoding."""
+        non_binary_positions = []
+        """Sorted positions of signals which are no binary signals per encoding (and the end of the signals)."""
+        for _, encoding in self._encodings:
+            init_sequence = encoding.get_init_sequence()
+            if 0 < len(init_sequence) <= signal_count:
+                best_fitting_init_signals = self.__classify(signals, encoding._signal_classifiers['init'])
+                matches = numpy.ones(signal_count - len(init_sequence) + 1, dtype=bool)
+                for index, init_signal in enumerate(init_sequence):
+                    matches &= best_fitting_init_signals[index:signal_count - len(init_sequence) + 1 + index] == init_signal
+                init_ends.append(numpy.flatnonzero(matches) + len(init_sequence) - 1)
+            else:
+                init_ends.append(numpy.zeros(0, dtype=numpy.int64))
+            best_fitting_binary_signals = self.__classify(signals, encoding._signal_classifiers['binary'])
+            binary_signals.append(best_fitting_binary_signals)
+            non_binary_positions.append(numpy.append(numpy.flatnonzero(best_fitting_binary_signals == 0), signal_count))
+
+        sequence_min_length = _setting('SEQUENCE_MIN_LENGTH')
+        frames = []
+        init_sequence = self.__find_init_sequence(init_ends, 0)
+        while init_sequence is not None:
+            init_end, encoding_index = init_sequence
+            encoding_name, encoding = self._encodings[encoding_index]
+            init_length = len(encoding.init_signal_sequence)
+
+            # binary signals follow up to the first signal which is no binary signal
+            first_binary_position = init_end + 1
+            positions_after_init = non_binary_positions[encoding_index]
+            end = int(positions_after_init[numpy.searchsorted(positions_after_init, first_binary_position)])
+
+            # the next init sequence might start with the last binary signals (the receiver searches them again)
+            search_start = end - min(end - first_binary_position, self._max_init_sequence_length - 1)
+            init_sequence = self.__find_init_sequence(init_ends, search_start)
+            frame_end = end
+            if init_sequence is not None and init_sequence[0] <= end:
+                frame_end = init_sequence[0] - len(self._encodings[init_sequence[1]][1].init_signal_sequence) + 1
+
+            if init_length + frame_end - first_binary_position > sequence_min_length:
+                frame_binary_signals = binary_signals[encoding_index][first_binary_position:frame_end]
+                signal_sequence = encoding.get_init_sequence() + frame_binary_signals.tolist()
+                offset = int(positions[init_end + 1 - init_length])
+                length = int(positions[frame_end - 1]) + 1 - offset
+                frames.append(DecodedFrame(offset, length, encoding_name, encoding, signal_sequence, self.__decode(encoding, frame_binary_signals, signal_sequence)))
+        return frames
+
+    def __find_init_sequence(self, init_ends, search_start):
+        """Return tuple of position of the last signal and index of encoding of the first init sequence starting at search_start or later (first encoding wins) or None."""
+        found_init_sequence = None
+        for encoding_index, (_, encoding) in enumerate(self._encodings):
+            ends = init_ends[encoding_index]
+            index = numpy.searchsorted(ends, search_start + len(encoding.init_signal_sequence) - 1)
+            if index < len(ends) and (found_init_sequence is None or ends[index] < found_init_sequence[0]):
+                found_init_sequence = (int(ends[index]), encoding_index)
+        return found_init_sequence
+
+    def __decode(self, encoding, binary_signals, signal_sequence):
+        """Return data sequence for given binary signals like Encoding.decode() does for the signal sequence."""
+        binary_signal_sequences = [encoding.binary_0_signal_sequence, encoding.binary_1_signal_sequence]
+        if any(len(binary_signal_sequence) != 2 for binary_signal_sequence in binary_signal_sequences):
+            return encoding.decode(signal_sequence)
+        pairs = binary_signals[:len(binary_signals) // 2 * 2].reshape(-1, 2)
+        is_binary_0 = (pairs == binary_signal_sequences[0]).all(axis=1)
+        is_binary_1 = (pairs == binary_signal_sequences[1]).all(axis=1)
+        if not (is_binary_0 | is_binary_1).all(): return ''
+        # first fitting binary signal sequence wins like in Encoding.decode()
+        return ''.join(numpy.where(is_binary_0, '0', '1').tolist())
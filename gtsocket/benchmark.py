@@ -0,0 +1,231 @@
+from __future__ import division # python 2 compatibility
+"""Benchmarks of encoding, decoding, receiving and sending with the encodings and sockets of the shipped config, which run on any Linux box (without Raspberry Pi) and report their results as JSON."""
+"""
+    Copyright (C) 2018  Markus Funke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sys
+import time
+import random
+import platform
+
+from . import gtsocket as _gtsocket
+from .gtsocket import Socket, Receiver, Transmitter, InitSequenceMatcher, CONFIG_FILE, load_config_registry, _find_best_fitting_signal, _perf_counter_ns, _setting
+
+BENCHMARK_FORMAT_VERSION = 1
+"""Version of the structure of the results, increased whenever results of older versions cannot be compared any longer."""
+
+INIT_SEARCH_BUFFER_SIZES = (100, 1000, 10000, 100000)
+"""Numbers of signals received before the init sequence in benchmark init_search."""
+
+def get_jittered_signals(signal_sequences, rng, jitter = 60, noise_probability = 0.01, pause = 20000, max_noise = 200):
+    """Return list of signals (microsec, negative if OFF) of given signal sequences with random jitter (microsec) and random noise signals (from given random.Random), each sequence followed by a pause (microsec)."""
+    signals = []
+    for signal_sequence in signal_sequences:
+        signal_sequence = list(signal_sequence)
+        signal_sequence[-1] -= pause
+        for signal in signal_sequence:
+            signal += rng.randint(-jitter, jitter) * (1 if signal > 0 else -1)
+            if rng.random() < noise_probability:
+                # noise splits the signal
+                noise = rng.randint(20, max_noise)
+                signals.extend([signal // 2, noise * (-1 if signal > 0 else 1), signal - signal // 2])
+            else:
+                signals.append(signal)
+    return signals
+
+def get_edges(signal_sequences, start_time = 0):
+    """Return list of edges (time in nanosec, pin value after edge) which result in receiving the given signal sequences."""
+    edges = []
+    edge_time = start_time
+    for signal_sequence in signal_sequences:
+        for signal in signal_sequence:
+            edges.append((edge_time, 1 if signal > 0 else 0))
+            edge_time += abs(signal) * 1000
+    edges.append((edge_time, 1 if edges[-1][1] == 0 else 0))
+    return edges
+
+def _measure(function, repeat):
+    """Return shortest time (sec) of repeat calls of given function."""
+    best_time = None
+    for _ in range(repeat):
+        start_time = _perf_counter_ns()
+        function()
+        duration = (_perf_counter_ns() - start_time) / 1000000000
+        if best_time is None or duration < best_time: best_time = duration
+    return best_time
+
+def _get_encodings(sockets):
+    """Return list of tuples of name and encoding of all encodings of given sockets."""
+    encodings = {}
+    for socket in sockets:
+        encodings.update(socket._get_encodings())
+    return sorted(encodings.items())
+
+def benchmark_encoding(sockets, rng, scale = 1, repeat = 3):
+    """Measure bits per sec Encoding.encode() and Encoding.decode() convert, for each encoding."""
+    data_sequence = ''.join(rng.choice('01') for _ in range(int(10000 * scale)))
+    results = {}
+    for encoding_name, encoding in _get_encodings(sockets):
+        signal_sequence = encoding.encode(data_sequence)
+        if encoding.decode(signal_sequence) != data_sequence: raise AssertionError('Encoding {} does not decode what it encoded.'.format(encoding_name))
+        results[encoding_name] = {
+            'bits': len(data_sequence),
+            'encode_bits_per_sec': len(data_sequence) / _measure(lambda: encoding.encode(data_sequence), repeat),
+            'decode_bits_per_sec': len(data_sequence) / _measure(lambda: encoding.decode(signal_sequence), repeat),
+        }
+    return results
+
+def benchmark_signal_classification(sockets, rng, scale = 1, repeat = 3):
+    """Measure nanosec per received signal to find the best fitting signal with the signal classifiers of each encoding (by mode) and with a linear search of all signals of the encoding."""
+    signals = get_jittered_signals([sockets[0].get_command_waveform(command) for command in ['on', 'off']], rng)
+    signals = (signals * (int(20000 * scale) // len(signals) + 1))[:int(20000 * scale)]
+    max_signal_difference = _setting('MAX_SIGNAL_DIFFERENCE')
+    results = {}
+    for encoding_name, encoding in _get_encodings(sockets):
+        result = results[encoding_name] = {'signals': len(signals)}
+        for mode in ['all', 'init', 'binary']:
+            get_best_fitting_signal = encoding._signal_classifiers[mode].get_best_fitting_signal
+            result[mode + '_ns_per_signal'] = _measure(lambda: [get_best_fitting_signal(signal) for signal in signals], repeat) * 1000000000 / len(signals)
+        allowed_signals = encoding.get_allowed_signals('all')
+        result['linear_search_ns_per_signal'] = _measure(lambda: [_find_best_fitting_signal(signal, allowed_signals, max_signal_difference) for signal in signals], repeat) * 1000000000 / len(signals)
+    return results
+
+def benchmark_init_search(sockets, rng, scale = 1, repeat = 3):
+    """Measure time to find the init sequence of each encoding after growing numbers of other signals (see INIT_SEARCH_BUFFER_SIZES), searched in the buffered signals at once (Encoding.find_init_sequence()) and signal by signal while receiving (InitSequenceMatcher)."""
+    results = {}
+    for encoding_name, encoding in _get_encodings(sockets):
+        binary_signals = encoding.get_allowed_signals('binary')
+        result = results[encoding_name] = []
+        for buffer_size in INIT_SEARCH_BUFFER_SIZES:
+            buffer_size = max(1, int(buffer_size * scale))
+            # binary signals of this encoding (which never form its init sequence) followed by the init sequence
+            signals = [rng.choice(binary_signals) for _ in range(buffer_size)] + encoding.get_init_sequence()
+            if encoding.find_init_sequence(signals) != buffer_size: raise AssertionError('Init sequence of encoding {} not found.'.format(encoding_name))
+            matcher = InitSequenceMatcher([(encoding_name, encoding)])
+            def add_signals():
+                matcher.reset()
+                for signal in signals:
+                    matcher.add_signal(signal)
+            find_time = _measure(lambda: encoding.find_init_sequence(signals), repeat)
+            match_time = _measure(add_signals, repeat)
+            result.append({
+                'buffer_signals': buffer_size,
+                'find_sec': find_time,
+                'find_ns_per_signal': find_time * 1000000000 / len(signals),
+                'matcher_ns_per_signal': match_time * 1000000000 / len(signals),
+            })
+    return results
+
+def benchmark_receiving(sockets, rng, scale = 1, repeat = 3):
+    """Measure frames per sec the receiver decodes and dispatches (Receiver.process_edges()) from jittered edges of the commands of all given sockets (with noise)."""
+    commands = [(socket, command) for socket in sockets for command in ['on', 'off']] * max(1, int(2 * scale))
+    rng.shuffle(commands)
+    signals = []
+    frame_count = 0
+    for socket, command in commands:
+        signals.extend(get_jittered_signals([socket.get_command_waveform(command)], rng))
+        frame_count += len(socket.get_command_frame_lengths(command))
+    edges = get_edges([signals])
+
+    command_events = []
+    receiver = Receiver(_setting('RECEIVING_PIN'), 'interrupt', command_window=0, decode_worker=False)
+    receiving_sockets = [Socket(socket.get_name()) for socket in sockets]
+    for socket in receiving_sockets:
+        socket.add_command_event_handler(command_events.append)
+        receiver.add_socket(socket, start_receiving=False)
+    def process_edges():
+        del command_events[:]
+        receiver.process_edges(edges)
+    try:
+        seconds = _measure(process_edges, repeat)
+    finally:
+        for socket in receiving_sockets:
+            receiver.remove_socket(socket)
+    return {
+        'edges': len(edges),
+        'frames': frame_count,
+        'command_events': len(command_events),
+        'seconds': seconds,
+        'frames_per_sec': frame_count / seconds,
+        'edges_per_sec': len(edges) / seconds,
+    }
+
+def benchmark_transmitting(sockets, rng, scale = 1, repeat = 1):
+    """Measure timing errors (nanosec, how late each edge is written) of the transmitter sending a command of the first socket to a fake pin with the real clock, sleeping and spinning as on a Raspberry Pi."""
+    socket = sockets[0]
+    waveform = socket.get_command_waveform('on')
+    frame_lengths = socket.get_command_frame_lengths('on')
+    frame_count = max(1, min(len(frame_lengths), int(len(frame_lengths) * scale)))
+    signals = waveform[:sum(frame_lengths[:frame_count])]
+    pin_values = []
+    transmitter = Transmitter(pin_values.append)
+    transmit_reports = []
+    for _ in range(repeat):
+        del pin_values[:]
+        transmit_reports.append(transmitter.transmit(signals, frame_lengths[:frame_count]))
+    frame_max_errors = sorted(frame_max_error for transmit_report in transmit_reports for frame_max_error, _ in transmit_report.frame_errors)
+    return {
+        'signals': len(signals),
+        'spin_ns': transmitter.spin_time,
+        'max_error_ns': max(transmit_report.max_error for transmit_report in transmit_reports),
+        'mean_error_ns': sum(transmit_report.mean_error for transmit_report in transmit_reports) / len(transmit_reports),
+        'median_frame_max_error_ns': frame_max_errors[len(frame_max_errors) // 2],
+        'duration_error_ns': max(transmit_report.duration - sum(abs(signal) for signal in signals) * 1000 for transmit_report in transmit_reports),
+    }
+
+BENCHMARKS = [
+    ('encoding', benchmark_encoding),
+    ('signal_classification', benchmark_signal_classification),
+    ('init_search', benchmark_init_search),
+    ('receiving', benchmark_receiving),
+    ('transmitting', benchmark_transmitting),
+]
+"""Names and functions of all benchmarks in the order they are run. Each is called with the sockets, a random.Random, the scale and the number of repetitions (the fastest one counts) and returns a dict."""
+
+def run_benchmarks(names = None, scale = 1, repeat = 3, seed = 1, config_files = None):
+    """Run benchmarks with given names (default: all, see BENCHMARKS) and return a dict of their results (and of the environment they ran in), e.g. to be written as JSON.
+
+    The sockets and encodings are those of given config files (default: the
+    shipped config only, so results of different boxes can be compared).
+    The signals are random with given seed, so each run gets the same ones.
+    scale multiplies the amount of signals benchmarked.
+    """
+    benchmark_names = [name for name, _ in BENCHMARKS]
+    if names is None: names = benchmark_names
+    for name in names:
+        if name not in benchmark_names: raise ValueError('Unknown benchmark {}.'.format(name))
+    previous_config = (_gtsocket._config_registry, _gtsocket._command_index, _gtsocket._command_trie)
+    _gtsocket._config_registry = load_config_registry(config_files if config_files is not None else [CONFIG_FILE])
+    _gtsocket._command_index = _gtsocket._command_trie = None
+    try:
+        sockets = [Socket(socket_name) for socket_name in _gtsocket._config_registry.get_socket_names()]
+        results = {}
+        for name, benchmark in BENCHMARKS:
+            if name not in names: continue
+            results[name] = benchmark(sockets, random.Random(seed), scale, repeat)
+    finally:
+        _gtsocket._config_registry, _gtsocket._command_index, _gtsocket._command_trie = previous_config
+    return {
+        'format_version': BENCHMARK_FORMAT_VERSION,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_implementation() + ' ' + platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'arguments': {'scale': scale, 'repeat': repeat, 'seed': seed},
+        'settings': {'max_signal_difference': _setting('MAX_SIGNAL_DIFFERENCE'), 'sequence_min_length': _setting('SEQUENCE_MIN_LENGTH'), 'sequence_repetitions': _setting('SEQUENCE_REPETITIONS')},
+        'results': results,
+    }
@@ -0,0 +1,254 @@
+"""Daemon which owns the GPIO pins, keeps all sockets ready to send and receives continuously. Clients send commands and subscribe to received commands via a Unix domain socket."""
+"""
+    Copyright (C) 2018  Markus Funke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import stat
+import json
+import socket as socket_module
+from threading import Lock
+
+try:
+    from socketserver import ThreadingMixIn, UnixStreamServer, StreamRequestHandler
+except ImportError:
+    from SocketServer import ThreadingMixIn, UnixStreamServer, StreamRequestHandler
+
+try:
+    from queue import Queue, Full, Empty
+except ImportError:
+    from Queue import Queue, Full, Empty
+
+from .gtsocket import get_config_registry, Socket, SocketError, initialize_GPIOs, clear_GPIOs, get_transmit_scheduler, get_stats
+
+DEFAULT_SOCKET_PATH = os.path.expanduser('~/.gtsocket/gtsocketd.sock')
+"""Path of the Unix domain socket the daemon listens on (if not given otherwise)."""
+SUBSCRIBER_QUEUE_SIZE = 256
+"""Max number of events waiting to be written to a subscriber (further events are dropped)."""
+
+try:
+    _string_types = (basestring,) # python 2 compatibility
+except NameError:
+    _string_types = (str,)
+
+def get_socket_names():
+    """Return names of all sockets configured."""
+    return list(get_config_registry().get_socket_names())
+
+def _check_request(request):
+    """Raise ValueError if given request is no dict or its socket, command or sockets are neither strings nor lists of strings."""
+    if not isinstance(request, dict): raise ValueError('request is no object')
+    for key in ['socket', 'command', 'sockets']:
+        value = request.get(key)
+        if value is None or isinstance(value, _string_types): continue
+        if not isinstance(value, list) or not all(isinstance(item, _string_types) for item in value): raise ValueError('{} is neither a string nor a list of strings'.format(key))
+
+def _remove_stale_socket(path):
+    """Remove the Unix domain socket at given path if no daemon listens on it any longer. Raise SocketError if there is something else at the path or a daemon still listens on it."""
+    try:
+        mode = os.stat(path).st_mode
+    except OSError:
+        # nothing at the path
+        return
+    if not stat.S_ISSOCK(mode): raise SocketError('{} exists and is no Unix domain socket.'.format(path))
+    connection = socket_module.socket(socket_module.AF_UNIX, socket_module.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except socket_module.error:
+        # nobody listens, left behind by a daemon which did not stop cleanly
+        os.remove(path)
+        return
+    finally:
+        connection.close()
+    raise SocketError('Another daemon listens on {}.'.format(path))
+
+def _end_events(events):
+    """Put the end of events (None) into given queue of events of a subscriber without blocking. Events still waiting are dropped, since the client might not read any longer."""
+    while True:
+        try:
+            events.put_nowait(None)
+            return
+        except Full:
+            try:
+                events.get_nowait()
+            except Empty:
+                pass
+
+def _get_transmit_report_data(transmit_report):
+    return {'signal_count': transmit_report.signal_count, 'max_error': transmit_report.max_error, 'mean_error': transmit_report.mean_error, 'duration': transmit_report.duration, 'wait_time': transmit_report.wait_time}
+
+class DaemonRequestHandler(StreamRequestHandler):
+    """Handles the requests of one client connection: one JSON object per line, each answered with one JSON object per line."""
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode('utf-8'))
+                _check_request(request)
+            except ValueError as exception:
+                self.write({'ok': False, 'error': 'Invalid request: {}'.format(exception)})
+                continue
+            if request.get('action') == 'subscribe':
+                # connection only transports events from now on
+                self.server.daemon.subscribe(self, request)
+                return
+            self.write(self.server.daemon.handle_request(request))
+
+    def write(self, data):
+        self.wfile.write((json.dumps(data) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+class DaemonServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+class Daemon():
+    """Owns the GPIO pins and all configured sockets (with their signals prerendered) and serves requests of clients on a Unix domain socket.
+
+    Requests are JSON objects, one per line, with an 'action':
+
+    - send: send 'command' to 'socket' (wait until it was sent unless 'wait' is false), answered with the TransmitReport
+    - status: answered with the names of the sockets and, for each sending pin, its sockets and queue depth and wait time of its transmit scheduler
+    - stats: answered with a snapshot of the stats (None if stats are disabled, see enable_stats())
+    - subscribe: from now on receive a JSON object for each command received for one of 'sockets' (default: all sockets),
+      when the first frame was received or (if 'complete' is true) once the command window has passed
+
+    Each request except subscribe is answered with a JSON object containing 'ok' (and 'error' if not ok).
+    """
+    def __init__(self, path = None, socket_names = None, receive = True):
+        self.path = path if path is not None else DEFAULT_SOCKET_PATH
+        self.receive = receive
+        self.sockets = {}
+        """Sockets by name."""
+        for socket_name in socket_names if socket_names is not None else get_socket_names():
+            self.sockets[socket_name] = Socket(socket_name, prerender_commands=True)
+        self.server = None
+        self.__subscribers = []
+        """Tuples of queue of events to write, socket names and whether to write complete events for each subscriber."""
+        self.__subscribers_lock = Lock()
+        self.__closed = False
+        """Whether the daemon was closed (no events are published any longer)."""
+
+    def start(self):
+        """Initialize GPIOs, start receiving and listen on the Unix domain socket (creating its directory if needed)."""
+        _remove_stale_socket(self.path)
+        directory = os.path.dirname(self.path)
+        if directory != '' and not os.path.isdir(directory): os.makedirs(directory)
+        initialize_GPIOs()
+        if self.receive:
+            for socket in self.sockets.values():
+                socket.add_command_event_handler(lambda command_event: self.publish(command_event, False))
+                socket.add_command_event_handler(lambda command_event: self.publish(command_event, True), when_complete=True)
+                socket.start_receiving()
+        self.server = DaemonServer(self.path, DaemonRequestHandler)
+        self.server.daemon = self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        """Stop serving requests (call from another thread than the one serving)."""
+        self.server.shutdown()
+
+    def close(self):
+        """Close the Unix domain socket, end all subscriptions, stop receiving and clear GPIOs."""
+        if self.server is not None:
+            self.server.server_close()
+            if os.path.exists(self.path): os.remove(self.path)
+        with self.__subscribers_lock:
+            self.__closed = True
+            subscribers = list(self.__subscribers)
+        for events, _, _ in subscribers:
+            _end_events(events)
+        for socket in self.sockets.values():
+            socket.stop_receiving()
+        clear_GPIOs()
+
+    def handle_request(self, request):
+        """Handle given request (dict) and return response (dict)."""
+        try:
+            _check_request(request)
+        except ValueError as exception:
+            return {'ok': False, 'error': 'Invalid request: {}'.format(exception)}
+        action = request.get('action')
+        try:
+            if action == 'send':
+                socket = self.sockets.get(request.get('socket')) if isinstance(request.get('socket'), _string_types) else None
+                if socket is None: raise SocketError('Unknown socket {}.'.format(request.get('socket')))
+                if request.get('command') not in ['on', 'off']: raise SocketError('Unknown command {}.'.format(request.get('command')))
+                if request.get('wait', True):
+                    return {'ok': True, 'report': _get_transmit_report_data(socket.send_command(request['command']))}
+                socket.send_command(request['command'], False)
+                return {'ok': True}
+            elif action == 'status':
+                return {'ok': True, 'sockets': sorted(self.sockets.keys()), 'sending_pins': self.get_sending_pin_status()}
+            elif action == 'stats':
+                stats = get_stats()
+                return {'ok': True, 'stats': stats.get_snapshot() if stats is not None else None}
+            else:
+                return {'ok': False, 'error': 'Unknown action {}.'.format(action)}
+        except SocketError as exception:
+            return {'ok': False, 'error': str(exception)}
+
+    def get_sending_pin_status(self):
+        """Return list of dicts with sending pin, names of its sockets and queue depth and wait time of its transmit scheduler for each sending pin of the sockets (sorted by pin)."""
+        socket_names_by_pin = {}
+        for socket_name, socket in self.sockets.items():
+            try:
+                pin = socket._get_pin('sending_pin')
+            except SocketError:
+                # socket only receives
+                continue
+            socket_names_by_pin.setdefault(pin, []).append(socket_name)
+        status = []
+        for pin in sorted(socket_names_by_pin):
+            transmit_scheduler = get_transmit_scheduler(pin)
+            status.append({'pin': pin, 'sockets': sorted(socket_names_by_pin[pin]), 'queue_depth': transmit_scheduler.get_queue_depth(), 'wait_time': transmit_scheduler.get_wait_time()})
+        return status
+
+    def subscribe(self, request_handler, request):
+        """Write events of commands received to the client of given request handler until it disconnects or the daemon is closed."""
+        socket_names = request.get('sockets')
+        if isinstance(socket_names, _string_types): socket_names = [socket_names]
+        if socket_names is not None: socket_names = set(socket_names)
+        subscriber = (Queue(SUBSCRIBER_QUEUE_SIZE), socket_names, bool(request.get('complete', False)))
+        with self.__subscribers_lock:
+            if self.__closed: return
+            self.__subscribers.append(subscriber)
+        try:
+            request_handler.write({'ok': True})
+            while True:
+                event = subscriber[0].get()
+                if event is None: break
+                request_handler.write(event)
+        except (IOError, OSError):
+            # client disconnected
+            pass
+        finally:
+            with self.__subscribers_lock:
+                self.__subscribers.remove(subscriber)
+
+    def publish(self, command_event, complete):
+        """Hand given command event to all subscribers of the socket (called in the receiving thread)."""
+        socket_name = command_event.socket.get_name()
+        event = {'event': 'command', 'socket': socket_name, 'command': command_event.command, 'time': command_event.time, 'frame_count': command_event.frame_count, 'encodings': sorted(command_event.encodings), 'complete': complete}
+        with self.__subscribers_lock:
+            if self.__closed: return
+            for events, socket_names, complete_events in self.__subscribers:
+                if complete_events != complete or (socket_names is not None and socket_name not in socket_names): continue
+                try:
+                    events.put_nowait(event)
+                except Full:
+                    # subscriber does not keep up, do not block receiving
+                    pass
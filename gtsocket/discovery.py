@@ -0,0 +1,289 @@
+from __future__ import division # python 2 compatibility
+"""Discover the encodings and data sequences a remote sends in captured signals with NumPy (used by the gtsocket-setup script). Requires numpy (pip install gtsocket[batch])."""
+"""
+    Copyright (C) 2018  Markus Funke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy
+
+from .gtsocket import Encoding, _setting
+from .batch import DecodedFrame
+
+HISTOGRAM_BINS_PER_DIFFERENCE = 8
+"""Number of histogram bins per max signal difference when looking for the peaks of the signal lengths."""
+
+class SignalClusters():
+    """Signal lengths found in captured signals. Each signal belongs to the cluster of the signal length it is closest to."""
+    def __init__(self, signals, counts, labels):
+        self.signals = signals
+        """List of signal lengths (microsec, negative if OFF, median of the signals of each cluster), sorted."""
+        self.counts = counts
+        """List of the number of captured signals of each cluster."""
+        self.labels = labels
+        """Array of the index of the cluster of each captured signal (-1 if it belongs to none, e.g. noise)."""
+
+    def __len__(self):
+        return len(self.signals)
+
+    def __repr__(self):
+        return 'SignalClusters({})'.format(', '.join('{}x{}'.format(signal, count) for signal, count in zip(self.signals, self.counts)))
+
+def cluster_signals(signals, max_signal_difference = None, min_share = 0.001):
+    """Return SignalClusters of given signals (microsec, negative if OFF).
+
+    The lengths of the ON and the OFF signals are counted in a histogram
+    of their logarithms, so that a difference in % is the same distance for
+    short and long signals. The peaks of the smoothed histogram are the
+    clusters. Signal lengths the receiver can tell apart differ by more than
+    twice max_signal_difference (in %, default: setting MAX_SIGNAL_DIFFERENCE),
+    so weaker peaks closer to a stronger one belong to its cluster. Each
+    signal belongs to the closest peak within twice this distance. Clusters
+    with less than min_share of all signals are dismissed as noise.
+    """
+    signals = numpy.asarray(signals, dtype=numpy.int64)
+    if max_signal_difference is None: max_signal_difference = _setting('MAX_SIGNAL_DIFFERENCE')
+    max_distance = 2 * numpy.log1p(max_signal_difference / 100)
+    min_count = max(2, int(min_share * len(signals)))
+
+    labels = numpy.full(len(signals), -1, dtype=numpy.int64)
+    cluster_signals = []
+    counts = []
+    for sign in (-1, 1):
+        positions = numpy.flatnonzero(signals * sign > 0)
+        if len(positions) == 0: continue
+        lengths = numpy.log(signals[positions] * sign)
+        peaks = _find_peaks(lengths, max_distance, min_count)
+        if len(peaks) == 0: continue
+        nearest_peaks = numpy.searchsorted((peaks[1:] + peaks[:-1]) / 2, lengths)
+        nearest_peaks[numpy.abs(lengths - peaks[nearest_peaks]) > 2 * max_distance] = -1
+        peak_counts = numpy.bincount(nearest_peaks[nearest_peaks >= 0], minlength=len(peaks))
+        # OFF signals from the longest to the shortest, so that all signals are sorted
+        for peak in (range(len(peaks)) if sign > 0 else reversed(range(len(peaks)))):
+            if peak_counts[peak] < min_count: continue
+            members = positions[nearest_peaks == peak]
+            labels[members] = len(cluster_signals)
+            cluster_signals.append(_round_signal(numpy.median(signals[members])))
+            counts.append(len(members))
+    return SignalClusters(cluster_signals, counts, labels)
+
+def _find_peaks(lengths, max_distance, min_count):
+    """Return sorted array of the peaks of the smoothed histogram of given logarithms of signal lengths with at least min_count signals around them and no stronger peak within max_distance."""
+    bin_width = max_distance / 2 / HISTOGRAM_BINS_PER_DIFFERENCE
+    first_length = lengths.min()
+    histogram = numpy.bincount(((lengths - first_length) / bin_width).astype(numpy.int64)).astype(numpy.float64)
+    kernel_range = numpy.arange(-HISTOGRAM_BINS_PER_DIFFERENCE, HISTOGRAM_BINS_PER_DIFFERENCE + 1)
+    # gaussian kernel with standard deviation of a quarter max signal difference
+    smoothed = numpy.convolve(histogram, numpy.exp(-0.5 * (kernel_range / (HISTOGRAM_BINS_PER_DIFFERENCE / 4)) ** 2), 'same')
+    padded = numpy.concatenate(([-1], smoothed, [-1]))
+    peaks = numpy.flatnonzero((smoothed > padded[:-2]) & (smoothed >= padded[2:]) & (smoothed >= min_count))
+    kept_peaks = []
+    for peak in peaks[numpy.argsort(-smoothed[peaks], kind='mergesort')]:
+        if all(abs(peak - kept_peak) * bin_width > max_distance for kept_peak in kept_peaks): kept_peaks.append(peak)
+    return first_length + (numpy.sort(numpy.array(kept_peaks, dtype=numpy.int64)) + 0.5) * bin_width
+
+def _round_signal(signal):
+    """Return given signal length rounded to 10 microsec."""
+    return int(round(signal, -1))
+
+class DiscoveredEncoding():
+    """Encoding found in captured signals: the signal pairs of the init sequence and the binary values of its frames (medians of the captured signals)."""
+    def __init__(self, init_signal_sequence, binary_0_signal_sequence, binary_1_signal_sequence, frame_count):
+        self.init_signal_sequence = init_signal_sequence
+        self.binary_0_signal_sequence = binary_0_signal_sequence
+        self.binary_1_signal_sequence = binary_1_signal_sequence
+        self.frame_count = frame_count
+        """Number of frames found with this encoding."""
+
+    def get_encoding(self):
+        return Encoding(self.init_signal_sequence, self.binary_0_signal_sequence, self.binary_1_signal_sequence)
+
+    def __repr__(self):
+        return 'DiscoveredEncoding(init={}, 0={}, 1={}, frames={})'.format(self.init_signal_sequence, self.binary_0_signal_sequence, self.binary_1_signal_sequence, self.frame_count)
+
+class Discovery():
+    """Encodings and frames found in captured signals by discover()."""
+    def __init__(self, clusters, encodings, frames):
+        self.clusters = clusters
+        """SignalClusters of the captured signals."""
+        self.encodings = encodings
+        """List of DiscoveredEncodings in the order they were first received in."""
+        self.frames = frames
+        """List of DecodedFrames (with encoding names 1, 2, ... in the order of the encodings)."""
+
+    def get_data_sequences(self):
+        """Return list of tuples of data sequence and number of frames of the data sequences sent (in the order they were first received in).
+
+        Only frames of the most common length are considered, since the last
+        frame before a pause (or a frame disturbed by noise) lacks bits.
+        Data sequences of less than two frames are most probably disturbed.
+        """
+        lengths = [len(frame.data_sequence) for frame in self.frames]
+        if len(lengths) == 0: return []
+        data_length = max(set(lengths), key=lengths.count)
+        frame_counts = {}
+        data_sequences = []
+        for frame in self.frames:
+            if len(frame.data_sequence) != data_length: continue
+            if frame.data_sequence not in frame_counts:
+                frame_counts[frame.data_sequence] = 0
+                data_sequences.append(frame.data_sequence)
+            frame_counts[frame.data_sequence] += 1
+        return [(data_sequence, frame_counts[data_sequence]) for data_sequence in data_sequences if frame_counts[data_sequence] > 1]
+
+    def get_config(self, group_name, socket_name, command, encoding_names = None, start_length = 4, end_length = 4):
+        """Return list of tuples of section and list of tuples of option and value of the config of the encodings (named by given encoding names, default: 1, 2, ...), the group and the command of the socket found.
+
+        The start data is the beginning (start_length bits) and the end data
+        the end (end_length bits) all data sequences have in common. The
+        command data is what is between them.
+        """
+        if encoding_names is None: encoding_names = [str(index + 1) for index in range(len(self.encodings))]
+        if len(encoding_names) != len(self.encodings): raise ValueError('{} encoding names are needed'.format(len(self.encodings)))
+        data_sequences = [data_sequence for data_sequence, _ in self.get_data_sequences()]
+        start_data = _get_common_prefix(data_sequences)[:start_length]
+        end_data = _get_common_prefix([data_sequence[::-1] for data_sequence in data_sequences])[:end_length][::-1]
+        command_data = [data_sequence[len(start_data):len(data_sequence) - len(end_data)] for data_sequence in data_sequences]
+
+        config = []
+        for encoding_name, encoding in zip(encoding_names, self.encodings):
+            config.append(('encoding:' + encoding_name, [(name, ','.join(str(signal) for signal in signal_sequence)) for name, signal_sequence in [('init', encoding.init_signal_sequence), ('1', encoding.binary_1_signal_sequence), ('0', encoding.binary_0_signal_sequence)]]))
+        config.append(('group:' + group_name, [('encodings', ','.join(encoding_names)), ('start_data', start_data)]))
+        config.append(('socket:' + socket_name, [('group', group_name), (command + '_command_data', ','.join(command_data)), ('end_data', end_data)]))
+        return config
+
+def _get_common_prefix(strings):
+    if len(strings) == 0: return ''
+    prefix = strings[0]
+    for string in strings[1:]:
+        while not string.startswith(prefix):
+            prefix = prefix[:-1]
+    return prefix
+
+def discover(signals, max_signal_difference = None, min_frame_count = 2, min_frame_share = 4):
+    """Return Discovery of the encodings and frames in given signals (microsec, negative if OFF), e.g. captured while a button of the remote was held.
+
+    The signals are clustered (see cluster_signals()) and each ON signal
+    with the following OFF signal is a pair. Init pairs do not repeat
+    directly. The two pairs most often following an init pair are its
+    binary values. Each encoding is an init pair with its binary values, so
+    encodings whose binary values are in the same clusters are told apart
+    anyway. Frames have the most common number of bits (at least half
+    setting SEQUENCE_MIN_LENGTH) unless they were disturbed. Init pairs with
+    less than min_frame_count of these frames or less than 1 / min_frame_share
+    of the frames of the most frequent init pair are most probably signals
+    split by noise.
+
+    Binary 1 is the pair with the longer share of ON, unless swapping 1 and
+    0 in an encoding makes more of its data sequences match those of the
+    first encoding (the remote sends the same data in each encoding).
+    """
+    signals = numpy.asarray(signals, dtype=numpy.int64)
+    clusters = cluster_signals(signals, max_signal_difference)
+    pair_positions = numpy.flatnonzero((signals[:-1] > 0) & (signals[1:] < 0))
+    on_labels = clusters.labels[pair_positions]
+    off_labels = clusters.labels[pair_positions + 1]
+    symbol_count = max(2, len(clusters) ** 2)
+    pair_symbols = numpy.where((on_labels >= 0) & (off_labels >= 0), on_labels * len(clusters) + off_labels, -1)
+    valid = pair_symbols >= 0
+
+    symbol_counts = numpy.bincount(pair_symbols[valid], minlength=symbol_count)
+    repeated = (pair_symbols[:-1] == pair_symbols[1:]) & valid[:-1]
+    repetition_counts = numpy.bincount(pair_symbols[:-1][repeated], minlength=symbol_count)
+    init_symbols = numpy.flatnonzero((symbol_counts >= min_frame_count) & (repetition_counts == 0))
+    min_data_length = max(1, _setting('SEQUENCE_MIN_LENGTH') // 2)
+    while True:
+        binary_symbols, frame_positions, frame_inits, data_lengths, binary_values, bit_inits = _find_frames(pair_symbols, init_symbols, symbol_count)
+        long_data_lengths = data_lengths[data_lengths >= min_data_length]
+        data_length = numpy.bincount(long_data_lengths).argmax() if len(long_data_lengths) > 0 else -1
+        frame_counts = numpy.bincount(frame_inits[data_lengths == data_length], minlength=len(init_symbols))
+        valid_inits = [init for init in range(len(init_symbols)) if binary_symbols[init, 1] >= 0 and frame_counts[init] >= min_frame_count and frame_counts[init] * min_frame_share >= frame_counts.max()]
+        if len(valid_inits) == len(init_symbols): break
+        init_symbols = init_symbols[valid_inits]
+
+    # encodings in the order of their first frames
+    encodings = []
+    swapped_encodings = []
+    for init in sorted(range(len(init_symbols)), key=lambda init: numpy.flatnonzero(frame_inits == init)[0]):
+        pairs = []
+        for pair_mask in [pair_symbols == init_symbols[init]] + [(bit_inits == init) & (binary_values == value) for value in (0, 1)]:
+            signal_positions = pair_positions[pair_mask]
+            pairs.append([_round_signal(numpy.median(signals[signal_positions])), _round_signal(numpy.median(signals[signal_positions + 1]))])
+        swapped = _get_on_share(pairs[1]) > _get_on_share(pairs[2])
+        if swapped: pairs[1], pairs[2] = pairs[2], pairs[1]
+        encodings.append((init, DiscoveredEncoding(pairs[0], pairs[1], pairs[2], int(numpy.count_nonzero(frame_inits == init)))))
+        swapped_encodings.append(swapped)
+
+    data = binary_values.astype(numpy.uint8) + ord('0')
+    frames = []
+    first_data_sequences = None
+    for encoding_index, (init, encoding) in enumerate(encodings):
+        mask = frame_inits == init
+        data_sequences = [data[position + 1:position + 1 + length].tobytes().decode('ascii') for position, length in zip(frame_positions[mask].tolist(), data_lengths[mask].tolist())]
+        if swapped_encodings[encoding_index]: data_sequences = [_swap_binary_values(data_sequence) for data_sequence in data_sequences]
+        if first_data_sequences is None:
+            first_data_sequences = set(data_sequences)
+        elif len(first_data_sequences & set(_swap_binary_values(data_sequence) for data_sequence in data_sequences)) > len(first_data_sequences & set(data_sequences)):
+            encoding.binary_0_signal_sequence, encoding.binary_1_signal_sequence = encoding.binary_1_signal_sequence, encoding.binary_0_signal_sequence
+            data_sequences = [_swap_binary_values(data_sequence) for data_sequence in data_sequences]
+        encoding_object = encoding.get_encoding()
+        for position, data_sequence in zip(frame_positions[mask].tolist(), data_sequences):
+            if data_sequence == '': continue
+            offset = int(pair_positions[position])
+            length = len(encoding.init_signal_sequence) + 2 * len(data_sequence)
+            frames.append(DecodedFrame(offset, length, str(encoding_index + 1), encoding_object, encoding_object.encode(data_sequence), data_sequence))
+    frames.sort(key=lambda frame: frame.offset)
+    return Discovery(clusters, [encoding for _, encoding in encodings], frames)
+
+def _find_frames(pair_symbols, init_symbols, symbol_count):
+    """Return tuple of the two binary symbols of each init (-1 if not found), the pair positions of the frames, the index of the init of each frame, the number of bits of each frame and for each pair its binary value and the index of the init of its frame (-1 if it is no bit of a frame)."""
+    valid = pair_symbols >= 0
+    init_indices = numpy.full(symbol_count, -1, dtype=numpy.int64)
+    init_indices[init_symbols] = numpy.arange(len(init_symbols))
+    pair_inits = numpy.where(valid, init_indices[numpy.maximum(pair_symbols, 0)], -1)
+
+    # pairs following an init pair (up to the next init or invalid pair) are counted for this init
+    boundaries = (pair_inits >= 0) | ~valid
+    frame_ids = numpy.cumsum(boundaries) - 1
+    members = numpy.flatnonzero(~boundaries & (frame_ids >= 0))
+    member_inits = pair_inits[boundaries][frame_ids[members]]
+    members, member_inits = members[member_inits >= 0], member_inits[member_inits >= 0]
+    symbol_counts = numpy.bincount(member_inits * symbol_count + pair_symbols[members], minlength=len(init_symbols) * symbol_count).reshape(len(init_symbols), symbol_count)
+    binary_symbols = numpy.argsort(-symbol_counts, axis=1, kind='mergesort')[:, :2]
+    binary_symbols[numpy.take_along_axis(symbol_counts, binary_symbols, 1) == 0] = -1
+
+    binary_values = numpy.full(len(pair_symbols), -1, dtype=numpy.int64)
+    for value in (0, 1):
+        member_binary_symbols = binary_symbols[member_inits, value]
+        binary_values[members[(pair_symbols[members] == member_binary_symbols) & (member_binary_symbols >= 0)]] = value
+
+    # the bits of a frame end at the first pair which is no binary value of its init
+    run_boundaries = binary_values < 0
+    run_ids = numpy.cumsum(run_boundaries) - 1
+    run_positions = numpy.flatnonzero(run_boundaries)
+    bits = numpy.flatnonzero(~run_boundaries & (run_ids >= 0))
+    run_lengths = numpy.bincount(run_ids[bits], minlength=len(run_positions))
+    run_inits = pair_inits[run_positions]
+    bit_inits = numpy.full(len(pair_symbols), -1, dtype=numpy.int64)
+    bit_inits[bits] = run_inits[run_ids[bits]]
+    binary_values[bit_inits < 0] = -1
+    frames = run_inits >= 0
+    return binary_symbols, run_positions[frames], run_inits[frames], run_lengths[frames], binary_values, bit_inits
+
+def _get_on_share(signal_pair):
+    return signal_pair[0] / (signal_pair[0] - signal_pair[1])
+
+def _swap_binary_values(data_sequence):
+    return data_sequence.replace('0', '2').replace('1', '0').replace('2', '1')
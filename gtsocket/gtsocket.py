@@ -18,6 +18,11 @@ from __future__ import division # python 2 compatibility
 """
 
 import os
+import sys
+import mmap
+import struct
+import pickle
+from collections import namedtuple
 
 try:
     from configparser import ConfigParser
@@ -25,66 +30,575 @@ except ImportError:
     from ConfigParser import SafeConfigParser as ConfigParser
     
 import time
-from datetime import datetime
-from threading import Thread
-from RPi import GPIO
+import random
+from array import array
+from threading import Thread, Event, Lock
+from concurrent.futures import Future
+from .stats import Stats, enable_stats, disable_stats, get_stats
+
+try:
+    from time import perf_counter_ns as _perf_counter_ns
+except ImportError:
+    # python 2 compatibility (no monotonic clock available)
+    def _perf_counter_ns():
+        return int(time.time() * 1000000000)
 
 # get full path to configuration file which is in the same directory as this module file
 CONFIG_FILE = os.path.join(os.path.abspath(os.path.dirname(__file__)), os.path.splitext(os.path.basename(__file__))[0] + '.cfg')
+USER_CONFIG_FILE = os.path.expanduser('~/.gtsocket/config.ini')
+CONFIG_CACHE_FILE = os.path.expanduser('~/.gtsocket/config.cache') # compiled config (only written if the folder exists)
+CONFIG_CACHE_VERSION = 3
+
+_SETTINGS = {
+    'SENDING_PIN': ('sending_GPIO_pin', int, None),
+    'RECEIVING_PIN': ('receiving_GPIO_pin', int, None),
+    'SEQUENCE_REPETITIONS': ('sequence_repetitions', int, None),
+    'MAX_SIGNAL_DIFFERENCE': ('max_signal_difference', int, 20), # max difference (in %) of the measured signal length to a pre-defined signal length (in socket_signals.py) to be matched
+    'SEQUENCE_MIN_LENGTH': ('sequence_min_length', int, 10), # a measures sequence of signals must consist of at least this amount of signal to be considered a signal_sequence
+    'RECEIVING_MODE': ('receiving_mode', str, 'interrupt'), # 'interrupt' (capture edges with GPIO edge detection) or 'polling' (poll receiving pin in a loop)
+    'EDGE_BUFFER_SIZE': ('edge_buffer_size', int, 4096), # number of edges buffered between edge interrupt and decoding
+    'COMMAND_WINDOW': ('command_window', int, 2000), # time (in millisec) after the first frame of a command in which further frames of the same command for the same socket are merged into one command event (0: each frame is a command event)
+    'DECODE_WORKERS': ('decode_workers', int, 0), # 1: decode the edges of each receiving pin in a worker process and dispatch the frames of all pins in one thread in the order they were received (see gtsocket.workers)
+}
+"""Option in section [general], type and default value of each setting by the name of the module attribute it is available as."""
+
+EncodingDefinition = namedtuple('EncodingDefinition', ['init_signal_sequence', 'binary_0_signal_sequence', 'binary_1_signal_sequence'])
+GroupDefinition = namedtuple('GroupDefinition', ['encodings', 'start_data', 'transceiver'])
+TransceiverDefinition = namedtuple('TransceiverDefinition', ['receiving_pin', 'sending_pin'])
+
+DEFAULT_TRANSCEIVER_NAME = 'default'
+"""Name of the transceiver with the pins of section [general], which is used by groups not bound to a transceiver."""
+SocketDefinition = namedtuple('SocketDefinition', ['group', 'end_data', 'command_data'])
+
+def _get_command_data(config, socket_config_section, command):
+    """Return list of data sequences configured for given command in given socket section (following references to data sequences of other sockets) or None."""
+    command_data = config.get(socket_config_section, '{}_command_data'.format(command)) if config.has_option(socket_config_section, '{}_command_data'.format(command)) else None
+    while command_data is not None and '|' in command_data:
+        command_data = config.get(command_data.split('|')[0], command_data.split('|')[1]) if config.has_option(command_data.split('|')[0], command_data.split('|')[1]) else None
+    return command_data.split(',') if command_data is not None else None
+
+def _get_signals(config, section, option):
+    return tuple(int(signal) for signal in config.get(section, option).split(',')) if config.has_option(section, option) else ()
+
+def _get_pin(config, section, option):
+    return int(config.get(section, option)) if config.has_option(section, option) else None
+
+class ConfigRegistry():
+    """Compiled config: settings, transceivers, encodings, groups and sockets, with signals as tuples of ints and references to data sequences of other sockets resolved.
+    
+    The registry is compiled once from the config files (and cached on disk, 
+    see get_config_registry()). Its definitions are namedtuples and cannot be 
+    changed.
+    """
+    def __init__(self, config):
+        self._settings = {}
+        for name, (option, setting_type, default) in _SETTINGS.items():
+            self._settings[name] = setting_type(config.get('general', option)) if config.has_option('general', option) else default
+        
+        self._transceivers = {}
+        self._encodings = {}
+        self._groups = {}
+        self._sockets = {}
+        transceiver_names = []
+        socket_names = []
+        for section in config.sections():
+            section_type, _, name = section.partition(':')
+            if section_type == 'transceiver':
+                transceiver_names.append(name)
+                self._transceivers[name] = TransceiverDefinition(_get_pin(config, section, 'receiving_GPIO_pin'), _get_pin(config, section, 'sending_GPIO_pin'))
+            elif section_type == 'encoding':
+                self._encodings[name] = EncodingDefinition(_get_signals(config, section, 'init'), _get_signals(config, section, '0'), _get_signals(config, section, '1'))
+            elif section_type == 'group':
+                encodings = tuple(config.get(section, 'encodings').split(',')) if config.has_option(section, 'encodings') else None
+                self._groups[name] = GroupDefinition(encodings, config.get(section, 'start_data') if config.has_option(section, 'start_data') else None, config.get(section, 'transceiver') if config.has_option(section, 'transceiver') else None)
+            elif section_type == 'socket':
+                socket_names.append(name)
+                command_data = {}
+                for command in ['on', 'off']:
+                    data_sequences = _get_command_data(config, section, command)
+                    command_data[command] = tuple(data_sequences) if data_sequences is not None else None
+                group_name = config.get(section, 'group') if config.has_option(section, 'group') else None
+                self._sockets[name] = SocketDefinition(group_name, config.get(section, 'end_data') if config.has_option(section, 'end_data') else None, command_data)
+        self._transceiver_names = tuple(transceiver_names)
+        self._socket_names = tuple(socket_names)
+        
+    def get_setting(self, name):
+        """Return value of setting with given name (see _SETTINGS)."""
+        return self._settings[name]
+    
+    def get_transceiver_names(self):
+        """Return names of all configured transceivers (in order of the config)."""
+        return self._transceiver_names
+    
+    def get_transceiver(self, name):
+        """Return TransceiverDefinition of transceiver with given name or None if there is no section for it."""
+        return self._transceivers.get(name)
+    
+    def get_socket_names(self):
+        """Return names of all configured sockets (in order of the config)."""
+        return self._socket_names
+    
+    def get_socket(self, name):
+        """Return SocketDefinition of socket with given name or None."""
+        return self._sockets.get(name)
+    
+    def get_group(self, name):
+        """Return GroupDefinition of group with given name or None."""
+        return self._groups.get(name)
+    
+    def get_encoding(self, name):
+        """Return EncodingDefinition of encoding with given name (without signals if not configured)."""
+        return self._encodings.get(name, EncodingDefinition((), (), ()))
 
-config = ConfigParser({})
-# read standard config shipped with this package and overwrite with config in .gtsocket folder in home folder (if exists)
-config.read([CONFIG_FILE, os.path.expanduser('~/.gtsocket/config.ini')])
+def _get_config_files_state(config_files):
+    """Return tuple of path, modification time and size of each of the given config files (None if it does not exist)."""
+    config_files_state = []
+    for config_file in config_files:
+        try:
+            stat = os.stat(config_file)
+            config_files_state.append((config_file, stat.st_mtime, stat.st_size))
+        except OSError:
+            config_files_state.append((config_file, None, None))
+    return (CONFIG_CACHE_VERSION, sys.version_info[0]) + tuple(config_files_state)
 
-SENDING_PIN = int(config.get('general', 'sending_GPIO_pin')) if config.has_option('general', 'sending_GPIO_pin') else None
-RECEIVING_PIN = int(config.get('general', 'receiving_GPIO_pin')) if config.has_option('general', 'receiving_GPIO_pin') else None
+def load_config(config_files = None):
+    """Read and return config (ConfigParser) from given files (default: standard config shipped with this package overwritten with config in .gtsocket folder in home folder (if exists))."""
+    config = ConfigParser({})
+    config.read(config_files if config_files is not None else [CONFIG_FILE, USER_CONFIG_FILE])
+    return config
 
-SEQUENCE_REPETITIONS = int(config.get('general', 'sequence_repetitions')) if config.has_option('general', 'sequence_repetitions') else None
-MAX_SIGNAL_DIFFERENCE = int(config.get('general', 'max_signal_difference')) if config.has_option('general', 'max_signal_difference') else 20 # max difference (in %) of the measured signal length to a pre-defined signal length (in socket_signals.py) to be matched
-SEQUENCE_MIN_LENGTH = int(config.get('general', 'sequence_min_length')) if config.has_option('general', 'sequence_min_length') else 10 # a measures sequence of signals must consist of at least this amount of signal to be considered a signal_sequence
+def load_config_registry(config_files = None, cache_file = None):
+    """Return ConfigRegistry compiled from given config files. Use the registry cached in given file if none of the config files changed since, otherwise compile and cache it."""
+    if config_files is None: config_files = [CONFIG_FILE, USER_CONFIG_FILE]
+    config_files_state = _get_config_files_state(config_files)
+    if cache_file is not None:
+        try:
+            with open(cache_file, 'rb') as cache:
+                cached_config_files_state, config_registry = pickle.load(cache)
+            if cached_config_files_state == config_files_state: return config_registry
+        except Exception:
+            # no cache (or an unreadable one), compile config
+            pass
+        
+    config_registry = ConfigRegistry(load_config(config_files))
+    if cache_file is not None and os.path.isdir(os.path.dirname(cache_file)):
+        try:
+            temporary_cache_file = '{}.{}'.format(cache_file, os.getpid())
+            with open(temporary_cache_file, 'wb') as cache:
+                pickle.dump((config_files_state, config_registry), cache, 2)
+            os.rename(temporary_cache_file, cache_file)
+        except (IOError, OSError):
+            pass
+    return config_registry
+
+_config = None
+_config_registry = None
+
+def get_config():
+    """Return the config (ConfigParser) read from the config files. Read it on first use."""
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
+
+def get_config_registry():
+    """Return the compiled config. Compile it (or load it from the cache) on first use."""
+    global _config_registry
+    if _config_registry is None:
+        _config_registry = load_config_registry(cache_file=CONFIG_CACHE_FILE)
+    return _config_registry
+
+def get_transceiver_names():
+    """Return names of the default transceiver (see DEFAULT_TRANSCEIVER_NAME) and all configured transceivers."""
+    return (DEFAULT_TRANSCEIVER_NAME,) + tuple(name for name in get_config_registry().get_transceiver_names() if name != DEFAULT_TRANSCEIVER_NAME)
+
+def get_transceiver(name = None):
+    """Return TransceiverDefinition of the transceiver with given name (default: the default transceiver, which has the pins of section [general] unless there is a section [transceiver:default])."""
+    if name is None: name = DEFAULT_TRANSCEIVER_NAME
+    transceiver_definition = get_config_registry().get_transceiver(name)
+    if transceiver_definition is not None: return transceiver_definition
+    if name != DEFAULT_TRANSCEIVER_NAME: raise SocketError('Unknown transceiver {}.'.format(name))
+    return TransceiverDefinition(_setting('RECEIVING_PIN'), _setting('SENDING_PIN'))
+
+def _get_transceiver_name(socket_name):
+    """Return name of the transceiver the group of the socket with given name is bound to."""
+    config_registry = get_config_registry()
+    socket_definition = config_registry.get_socket(socket_name)
+    group_definition = config_registry.get_group(socket_definition.group) if socket_definition is not None else None
+    return group_definition.transceiver if group_definition is not None and group_definition.transceiver is not None else DEFAULT_TRANSCEIVER_NAME
+
+def _get_transceiver_pins(pin_type):
+    """Return the different pins of given type ('receiving_pin' or 'sending_pin') of all transceivers."""
+    pins = []
+    for name in get_transceiver_names():
+        pin = getattr(get_transceiver(name), pin_type)
+        if pin is not None and pin not in pins: pins.append(pin)
+    return pins
+
+def _setting(name):
+    """Return value of setting with given name (see _SETTINGS), unless it was set as module attribute."""
+    value = globals().get(name, _setting)
+    return value if value is not _setting else get_config_registry().get_setting(name)
+
+def __getattr__(name):
+    """Return settings (see _SETTINGS) and config as module attributes, loaded on first access (python 3.7+)."""
+    if name in _SETTINGS: return _setting(name)
+    if name == 'config': return get_config()
+    raise AttributeError('module {} has no attribute {}'.format(__name__, name))
 
 receiving_GPIO_initialized = False
 sending_GPIO_initialized = False
 
+class GPIOBackend():
+    """Interface to the GPIO pins used to receive and send signals.
+    
+    Times are given in nanosec of the backend's clock. The clock and sleep 
+    function of the backend are used to send signals at the right time.
+    """
+    spin_time = 200000
+    """Time (nanosec) before a deadline from which on to spin instead of sleeping when sending signals."""
+    
+    def clock(self):
+        """Return current time in nanosec."""
+        return _perf_counter_ns()
+    
+    def sleep(self, seconds):
+        time.sleep(seconds)
+        
+    def setup_input(self, pin):
+        raise NotImplementedError()
+    
+    def setup_output(self, pin):
+        raise NotImplementedError()
+    
+    def input(self, pin):
+        """Return current value (1 or 0) of given pin."""
+        raise NotImplementedError()
+    
+    def output(self, pin, value):
+        """Set given output pin to given value (1 or 0)."""
+        raise NotImplementedError()
+    
+    def add_edge_detection(self, pin, callback):
+        """Call callback with time and value after the edge for each edge (rising and falling) on given input pin."""
+        raise NotImplementedError()
+    
+    def begin_transmission(self, pin):
+        """Called before signals are sent on given output pin."""
+        pass
+    
+    def end_transmission(self, pin):
+        """Called after signals were sent on given output pin."""
+        pass
+    
+    def remove_edge_detection(self, pin):
+        raise NotImplementedError()
+    
+    def cleanup(self):
+        """Reset all pins which have been set up."""
+        raise NotImplementedError()
+
+class RPiGPIOBackend(GPIOBackend):
+    """GPIO backend using the pins of the Raspberry Pi with the RPi.GPIO module (BCM numbering)."""
+    resync_time = 20000000
+    """Time (nanosec, longer than any signal) without edges after which the value after the next edge is read from the pin instead of being toggled."""
+    
+    def __init__(self):
+        from RPi import GPIO
+        self.GPIO = GPIO
+        
+    def setup_input(self, pin):
+        self.GPIO.setmode(self.GPIO.BCM)
+        self.GPIO.setup(pin, self.GPIO.IN)
+        
+    def setup_output(self, pin):
+        self.GPIO.setmode(self.GPIO.BCM)
+        self.GPIO.setup(pin, self.GPIO.OUT)
+        
+    def input(self, pin):
+        return self.GPIO.input(pin)
+    
+    def output(self, pin, value):
+        self.GPIO.output(pin, value)
+        
+    def add_edge_detection(self, pin, callback):
+        GPIO = self.GPIO
+        # value after the last edge and time of the last edge
+        state = [GPIO.input(pin), None]
+        def edge_callback(channel):
+            edge_time = _perf_counter_ns()
+            if state[1] is None or edge_time - state[1] > self.resync_time:
+                # the pin was quiet for longer than any signal, so it does not change again before it is read (an edge missed before does not invert the following values)
+                state[0] = GPIO.input(channel)
+            else:
+                # the pin may already have changed again before the callback runs, so the value is derived from the edge order
+                state[0] = 1 - state[0]
+            state[1] = edge_time
+            callback(edge_time, state[0])
+        GPIO.add_event_detect(pin, GPIO.BOTH, callback=edge_callback)
+        
+    def remove_edge_detection(self, pin):
+        self.GPIO.remove_event_detect(pin)
+        
+    def cleanup(self):
+        self.GPIO.cleanup()
+        
+class SimulatedBackend(GPIOBackend):
+    """GPIO backend simulating the air between 433Mhz senders and receivers in memory (a loopback channel).
+    
+    Whenever an output pin is set, the air carries a signal if any output 
+    pin is set to 1. Each change of the air is an edge on all input pins. 
+    Edges are delayed or advanced by a random time of up to jitter nanosec and 
+    with noise_probability a short noise signal (noise_length microsec, 
+    given as tuple of min and max) is added before an edge. This way a socket 
+    sending a command and a socket receiving it can run in the same process 
+    without any hardware.
+    
+    If realtime is False, sleeping does not wait but moves the clock of the 
+    backend forward, so signals are sent as fast as possible (but with the 
+    correct times). The clock stands still between sleeps (so the time it 
+    takes to send a signal does not change its length), unless nobody slept 
+    for idle_time nanosec, then it moves on with real time. It never moves on 
+    with real time while signals are sent (even if the sending thread does 
+    not run for a while), since that would stretch the signal being sent.
+    """
+    idle_time = 10000000
+    
+    def __init__(self, realtime = False, jitter = 0, noise_probability = 0, noise_length = (20, 100), seed = None):
+        self.realtime = realtime
+        self.jitter = jitter
+        self.noise_probability = noise_probability
+        self.noise_length = noise_length
+        if not realtime: self.spin_time = 0
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._clock_time = self._last_sleep_time = _perf_counter_ns()
+        """Time of backend's clock and real time of last sleep (nanosec) if not realtime."""
+        self._transmissions = 0
+        """Number of output pins signals are being sent on."""
+        self._input_pins = set()
+        self._output_values = {}
+        self._edge_callbacks = {}
+        self._air_value = 0
+        self._last_air_edge_time = None
+        self._last_edge_time = None
+        
+    def clock(self):
+        if self.realtime: return _perf_counter_ns()
+        time_since_sleep = _perf_counter_ns() - self._last_sleep_time
+        return self._clock_time + time_since_sleep if time_since_sleep > self.idle_time and self._transmissions == 0 else self._clock_time
+    
+    def sleep(self, seconds):
+        if self.realtime:
+            time.sleep(seconds)
+        else:
+            self._clock_time = self.clock() + int(round(seconds * 1000000000))
+            self._last_sleep_time = _perf_counter_ns()
+            
+    def begin_transmission(self, pin):
+        with self._lock:
+            if self._transmissions == 0 and not self.realtime:
+                # the time which passed while nobody sent is kept
+                self._clock_time = self.clock()
+                self._last_sleep_time = _perf_counter_ns()
+            self._transmissions += 1
+            
+    def end_transmission(self, pin):
+        with self._lock:
+            self._transmissions -= 1
+            
+    def setup_input(self, pin):
+        self._input_pins.add(pin)
+        
+    def setup_output(self, pin):
+        self._output_values[pin] = 0
+        
+    def input(self, pin):
+        if pin in self._input_pins: return self._air_value
+        return self._output_values.get(pin, 0)
+    
+    def output(self, pin, value):
+        with self._lock:
+            self._output_values[pin] = value
+            air_value = 1 if any(self._output_values.values()) else 0
+            if air_value != self._air_value:
+                self._air_value = air_value
+                self._add_air_edge(self.clock(), air_value)
+                
+    def _add_air_edge(self, edge_time, value):
+        """Send edge (with jitter and maybe noise before it) to all input pins."""
+        last_air_edge_time = self._last_air_edge_time
+        self._last_air_edge_time = edge_time
+        
+        if self.noise_probability > 0 and last_air_edge_time is not None and self._random.random() < self.noise_probability:
+            noise_length = self._random.randint(*self.noise_length) * 1000
+            if edge_time - last_air_edge_time > noise_length * 2:
+                # noise within signal before this edge: flip value for noise_length
+                noise_time = self._random.randint(last_air_edge_time + noise_length // 2, edge_time - noise_length * 3 // 2)
+                self._send_edge(noise_time, value)
+                self._send_edge(noise_time + noise_length, 1 - value)
+                
+        if self.jitter > 0:
+            edge_time += self._random.randint(-self.jitter, self.jitter)
+        self._send_edge(edge_time, value)
+        
+    def _send_edge(self, edge_time, value):
+        if self._last_edge_time is not None and edge_time <= self._last_edge_time:
+            edge_time = self._last_edge_time + 1 # jitter must not change order of edges
+        self._last_edge_time = edge_time
+        for pin in self._input_pins:
+            callback = self._edge_callbacks.get(pin)
+            if callback is not None: callback(edge_time, value)
+        
+    def add_edge_detection(self, pin, callback):
+        self._edge_callbacks[pin] = callback
+        
+    def remove_edge_detection(self, pin):
+        self._edge_callbacks.pop(pin, None)
+        
+    def cleanup(self):
+        with self._lock:
+            self._input_pins.clear()
+            self._output_values.clear()
+            self._edge_callbacks.clear()
+            self._air_value = 0
+
+_backend = None
+
+def get_backend():
+    """Return GPIO backend used to receive and send signals (a RPiGPIOBackend if none was set)."""
+    global _backend
+    if _backend is None:
+        _backend = RPiGPIOBackend()
+    return _backend
+
+def set_backend(backend):
+    """Set GPIO backend used to receive and send signals (for example a SimulatedBackend to run without Raspberry Pi). Receivers and transmit schedulers are created again for the new backend."""
+    global _backend
+    _backend = backend
+    _clear_pin_registries()
+
 def initialize_receiving_GPIO():
-    """Set up that GPIO pin of Raspberry Pi as input pin, which was configured as receiving pin in config."""
-    if RECEIVING_PIN is None: raise SocketError('Cannot initialize receiving GPIO. No sending pin given in config.')
+    """Set up those GPIO pins of Raspberry Pi as input pins, which were configured as receiving pins of the transceivers in config."""
+    pins = _get_transceiver_pins('receiving_pin')
+    if len(pins) == 0: raise SocketError('Cannot initialize receiving GPIO. No receiving pin given in config.')
     global receiving_GPIO_initialized
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(RECEIVING_PIN, GPIO.IN)
+    for pin in pins:
+        get_backend().setup_input(pin)
     receiving_GPIO_initialized = True
 
 def initialize_sending_GPIOs():
-    """Set up that GPIO pin of Raspberry Pi as output pin, which was configured as sending pin in config."""
-    if SENDING_PIN is None: raise SocketError('Cannot initialize sending GPIO. No sending pin given in config.')
+    """Set up those GPIO pins of Raspberry Pi as output pins, which were configured as sending pins of the transceivers in config."""
+    pins = _get_transceiver_pins('sending_pin')
+    if len(pins) == 0: raise SocketError('Cannot initialize sending GPIO. No sending pin given in config.')
     global sending_GPIO_initialized
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(SENDING_PIN, GPIO.OUT)
+    for pin in pins:
+        get_backend().setup_output(pin)
     sending_GPIO_initialized = True
     
 def initialize_GPIOs():
-    """Initialize both receiving and sending GPIO pin of Raspberry Pi with RPi.GPIO module."""
+    """Initialize both receiving and sending GPIO pin of Raspberry Pi with the GPIO backend (RPi.GPIO module by default)."""
     initialize_receiving_GPIO()
     initialize_sending_GPIOs()
     
 def clear_GPIOs():
     """Clear (configure as input pin) all used GPIO Raspberry Pi pins to prevent damage to Raspberry Pi board."""
     global sending_GPIO_initialized, receiving_GPIO_initialized
-    GPIO.cleanup()
+    get_backend().cleanup()
     sending_GPIO_initialized = False
     receiving_GPIO_initialized = False
+    _clear_pin_registries()
 
 class EncodingError(Exception):
     """Exception raised by Encoding class."""
     def __init__(self, message):
         Exception.__init__(self, message)
 
+def _find_best_fitting_signal(signal, allowed_signals, max_signal_difference):
+    """Return that signal of allowed_signals with smallest difference to given signal and not more difference (in %) than max_signal_difference."""
+    smallest_difference = None
+    best_fitting_signal = None
+    for possible_signal in allowed_signals:
+        difference = abs(signal - possible_signal)
+        if (abs(difference / possible_signal) * 100) > max_signal_difference: continue
+        if smallest_difference is None or difference < smallest_difference:
+            smallest_difference = difference
+            best_fitting_signal = possible_signal
+    return best_fitting_signal
+
+class SignalClassifier():
+    """Lookup table which maps each measured signal (int, microsec) to the best fitting of a list of allowed signals in constant time.
+    
+    The table covers all signals which are within max_signal_difference of 
+    any allowed signal and holds for each of them the same best fitting 
+    signal _find_best_fitting_signal() would return. It is built from the 
+    few ranges of signals between which the best fitting signal changes: 
+    the borders of the allowed range around each allowed signal and the 
+    middle between each two allowed signals.
+    """
+    def __init__(self, allowed_signals, max_signal_difference):
+        self.allowed_signals = list(allowed_signals)
+        self.max_signal_difference = max_signal_difference
+        self.offset = 0
+        """The signal the first table entry belongs to."""
+        self.table = []
+        if len(self.allowed_signals) == 0: return
+        
+        max_differences = [abs(allowed_signal) * max_signal_difference / 100 for allowed_signal in self.allowed_signals]
+        first_signal = int(min(allowed_signal - max_difference for allowed_signal, max_difference in zip(self.allowed_signals, max_differences))) - 2
+        last_signal = int(max(allowed_signal + max_difference for allowed_signal, max_difference in zip(self.allowed_signals, max_differences))) + 2
+        
+        # signals at which the best fitting signal might change (+/- 2 to be independent of rounding)
+        borders = set([first_signal, last_signal + 1])
+        border_values = [allowed_signal + sign * max_difference for allowed_signal, max_difference in zip(self.allowed_signals, max_differences) for sign in [-1, 1]]
+        border_values += [(signal_a + signal_b) / 2 for signal_a in self.allowed_signals for signal_b in self.allowed_signals if signal_a < signal_b]
+        for border_value in border_values:
+            for border in range(int(border_value) - 2, int(border_value) + 3):
+                if first_signal <= border <= last_signal: borders.add(border)
+        borders = sorted(borders)
+        
+        self.offset = first_signal
+        for border, next_border in zip(borders, borders[1:]):
+            self.table.append(_find_best_fitting_signal(border, self.allowed_signals, max_signal_difference))
+            if next_border - border > 1:
+                # best fitting signal does not change between two borders
+                self.table.extend([_find_best_fitting_signal(border + 1, self.allowed_signals, max_signal_difference)] * (next_border - border - 1))
+                
+    def get_best_fitting_signal(self, signal):
+        """Return that allowed signal with smallest difference to given signal and not more difference than max_signal_difference."""
+        index = signal - self.offset
+        if 0 <= index < len(self.table):
+            try:
+                return self.table[index]
+            except TypeError:
+                # signal is no int (no table entry)
+                return _find_best_fitting_signal(signal, self.allowed_signals, self.max_signal_difference)
+        return None
+
+_signal_classifiers = {}
+
+def _get_signal_classifier(allowed_signals, max_signal_difference):
+    """Return signal classifier for given allowed signals. Classifiers are shared by all encodings with the same allowed signals."""
+    key = (tuple(allowed_signals), max_signal_difference)
+    if key not in _signal_classifiers:
+        _signal_classifiers[key] = SignalClassifier(allowed_signals, max_signal_difference)
+    return _signal_classifiers[key]
+
 class Encoding():
     def __init__(self, init_signal_sequence, binary_0_signal_sequence, binary_1_signal_sequence):
         self.init_signal_sequence = init_signal_sequence
         self.binary_0_signal_sequence = binary_0_signal_sequence
         self.binary_1_signal_sequence = binary_1_signal_sequence
         
+        self._signal_classifiers = {}
+        """Signal classifiers by mode, built once with setting MAX_SIGNAL_DIFFERENCE at time of creation to find best fitting signals."""
+        for mode in ['init', 'binary', 'all']:
+            self._signal_classifiers[mode] = _get_signal_classifier(self.get_allowed_signals(mode), _setting('MAX_SIGNAL_DIFFERENCE'))
+        self._bits_by_signal_pair = {}
+        """Binary value ('0' or '1') by tuple of the two best fitting signals encoding it (as decode() does, binary 0 wins if both are encoded the same)."""
+        for bit, binary_signal_sequence in [('1', binary_1_signal_sequence), ('0', binary_0_signal_sequence)]:
+            if len(binary_signal_sequence) == 2: self._bits_by_signal_pair[tuple(binary_signal_sequence)] = bit
+        
     def encode(self, data_sequence, add_init_sequence = True):
         """Convert given data_sequence (str) (consisting of 1s and 0s) to list of signals (time periods w/ or w/o radio signal)."""
         signal_sequence = self.get_init_sequence() if add_init_sequence else []
@@ -97,23 +611,21 @@ class Encoding():
     def decode(self, signal_sequence):
         """Convert given list of signals (time periods w/ or w/o radio signal) to data string (consisting of 1s and 0s)."""
         
-        # if signal sequence starts with init sequence, strip off this init sequence
-        if signal_sequence[0:len(self.get_init_sequence())] == self.get_init_sequence():
-            signal_sequence = signal_sequence[len(self.get_init_sequence()):]
+        # if signal sequence starts with init sequence, skip this init sequence
+        init_sequence = self.get_init_sequence()
+        start = len(init_sequence) if signal_sequence[0:len(init_sequence)] == init_sequence else 0
         
         binary_signal_sequences = [self.binary_0_signal_sequence, self.binary_1_signal_sequence]
         
-        data_sequence = ''
-        while signal_sequence and len(signal_sequence) >= 2:
-            one_bit_signals = signal_sequence[0:2]
+        data = []
+        for index in range(start, len(signal_sequence) - 1, 2):
+            one_bit_signals = signal_sequence[index:index + 2]
             
             try:
-                signal_sequence_index = binary_signal_sequences.index(one_bit_signals)
-                data_sequence += str(signal_sequence_index)
-                signal_sequence = signal_sequence[2:]
+                data.append(str(binary_signal_sequences.index(one_bit_signals)))
             except ValueError:
                 return ''
-        return data_sequence
+        return ''.join(data)
     
     def get_init_sequence(self):
         return list(self.init_signal_sequence)
@@ -130,35 +642,412 @@ class Encoding():
     
     def get_best_fitting_signal(self, signal, mode='all'):
         """Return that init or binary signal (depends on mode) with smallest difference to given signal and not more difference than MAX_SIGNAL_DIFFERENCE."""
-        allowed_signals = self.get_allowed_signals(mode)
-        
-        smallest_difference = None
-        best_fitting_signal = None
-        for possible_signal in allowed_signals:
-            difference = abs(signal - possible_signal)
-            if (abs(difference / possible_signal) * 100) > MAX_SIGNAL_DIFFERENCE: continue
-            if smallest_difference is None or difference < smallest_difference:
-                smallest_difference = difference
-                best_fitting_signal = possible_signal
-        return best_fitting_signal
+        signal_classifier = self._signal_classifiers.get(mode)
+        if signal_classifier is None: signal_classifier = self._signal_classifiers['all']
+        return signal_classifier.get_best_fitting_signal(signal)
     
     def convert_to_best_fitting_sequence(self, signal_sequence, mode='all'):
         return [self.get_best_fitting_signal(signal, mode) for signal in signal_sequence]
     
     def find_init_sequence(self, signal_sequence):
-        best_fitting_signal_sequence = self.convert_to_best_fitting_sequence(signal_sequence, 'init')
-        init_sequence = self.get_init_sequence()
-        if len(init_sequence) == 0:
-            return None
+        """Return position of first init sequence in given signal sequence or None if it does not contain the init sequence."""
+        init_sequence_matcher = InitSequenceMatcher([(None, self)])
+        for position, signal in enumerate(signal_sequence):
+            if init_sequence_matcher.add_signal(signal) is not None:
+                return position + 1 - len(self.init_signal_sequence)
+        return None
+
+class InitSequenceMatcher():
+    """Finds init sequences of several encodings in a stream of signals by looking at each signal only once.
+    
+    For each encoding with an init sequence the matcher keeps the length of 
+    the longest part of the init sequence the last received signals match 
+    (the state of a Knuth-Morris-Pratt automaton). Each received signal is 
+    converted to the best fitting init signal of each encoding and advances 
+    the state of each encoding, without looking at previous signals again.
+    """
+    def __init__(self, encodings):
+        """Initialize matcher with given list of tuples of encoding name and encoding (in the order encodings are checked)."""
+        self._init_signal_classifiers = [encoding._signal_classifiers['init'] for _, encoding in encodings]
+        self._encodings = []
+        """Tuples of encoding name, encoding, init sequence, fallback states and position in the list of encodings given."""
+        for position, (encoding_name, encoding) in enumerate(encodings):
+            init_sequence = encoding.get_init_sequence()
+            if len(init_sequence) == 0: continue
+            # fallback_states[i]: length of longest proper prefix of init sequence which is also suffix of init_sequence[:i+1]
+            fallback_states = [0] * len(init_sequence)
+            state = 0
+            for index in range(1, len(init_sequence)):
+                while state > 0 and init_sequence[index] != init_sequence[state]:
+                    state = fallback_states[state - 1]
+                if init_sequence[index] == init_sequence[state]:
+                    state += 1
+                fallback_states[index] = state
+            self._encodings.append((encoding_name, encoding, init_sequence, fallback_states, position))
+        self._states = [0] * len(self._encodings)
+        
+    def reset(self):
+        """Forget all signals received so far."""
+        self._states = [0] * len(self._encodings)
+        
+    def add_signal(self, signal):
+        """Process next received signal. Return tuple of encoding name and encoding of first encoding whose init sequence ends with this signal or None."""
+        return self.add_classified_signal([signal_classifier.get_best_fitting_signal(signal) for signal_classifier in self._init_signal_classifiers])
+    
+    def add_classified_signal(self, best_fitting_init_signals):
+        """Process next received signal given as its best fitting init signal of each encoding (see classify_signals()). Return like add_signal()."""
+        found_encoding = None
+        states = self._states
+        for index, (encoding_name, encoding, init_sequence, fallback_states, position) in enumerate(self._encodings):
+            best_fitting_signal = best_fitting_init_signals[position]
+            state = states[index]
+            while state > 0 and init_sequence[state] != best_fitting_signal:
+                state = fallback_states[state - 1]
+            if init_sequence[state] == best_fitting_signal:
+                state += 1
+            if state == len(init_sequence):
+                if found_encoding is None: found_encoding = (encoding_name, encoding)
+                state = fallback_states[state - 1]
+            states[index] = state
+        return found_encoding
+
+class CommandIndex():
+    """Index of all commands configured for any socket by the complete data sequence (start + data + end) sent for them.
+    
+    The index is built once from the config. Looking up the socket(s) and 
+    command a received data sequence belongs to is a single dict lookup for 
+    all sockets together. Since data sequences are shared by several 
+    sockets (see socket:C, which references the data sequences of socket:A), 
+    the index holds the complete data sequences including the end data, 
+    which is unique for each socket.
+    
+    Use get_command_index() to get the index built from the current config.
+    """
+    def __init__(self, config_registry):
+        self._commands = {}
+        """Tuples of socket name and command by complete data sequence."""
+        for socket_name in config_registry.get_socket_names():
+            socket_definition = config_registry.get_socket(socket_name)
+            group_definition = config_registry.get_group(socket_definition.group)
+            start_data = group_definition.start_data if group_definition is not None and group_definition.start_data is not None else ''
+            end_data = socket_definition.end_data if socket_definition.end_data is not None else ''
+            
+            for command in ['on', 'off']:
+                for data_sequence in socket_definition.command_data[command] or []:
+                    commands = self._commands.setdefault(start_data + data_sequence + end_data, ())
+                    if (socket_name, command) not in commands:
+                        self._commands[start_data + data_sequence + end_data] = commands + ((socket_name, command),)
+                        
+    def __len__(self):
+        return len(self._commands)
         
-        position = 0
-        while len(best_fitting_signal_sequence) >= len(init_sequence):
-            if best_fitting_signal_sequence[:len(init_sequence)] == init_sequence:
-                return position
-            best_fitting_signal_sequence = best_fitting_signal_sequence[1:] if len(best_fitting_signal_sequence) > 1 else []
-            position += 1
+    def get_commands(self, data_sequence):
+        """Return tuple of tuples of socket name and command, which given complete data sequence was configured for (usually only one)."""
+        return self._commands.get(data_sequence, ())
+    
+    def get_command(self, data_sequence, socket_name):
+        """Return command for socket with given name, which given complete data sequence was configured for, or None."""
+        for command_socket_name, command in self._commands.get(data_sequence, ()):
+            if command_socket_name == socket_name:
+                return command
         return None
 
+_command_index = None
+
+def get_command_index():
+    """Return index of all commands configured for any socket by their complete data sequence. Build it if it does not exist yet."""
+    global _command_index
+    if _command_index is None:
+        _command_index = CommandIndex(get_config_registry())
+    return _command_index
+
+class CommandTrieNode():
+    """Node of the CommandTrie, stands for the data sequence leading to it from the root."""
+    def __init__(self):
+        self.children = {}
+        """Nodes by next bit ('0' or '1') for which any complete data sequence continues this data sequence."""
+        self.commands = None
+        """Tuple of tuples of socket name and command if this data sequence is a complete data sequence of a command, otherwise None."""
+        self.decided_commands = None
+        """Commands of all complete data sequences continuing this data sequence if they are all the same, otherwise None."""
+
+class CommandTrie():
+    """Prefix tree of the complete data sequences of all configured commands (see CommandIndex).
+    
+    While the binary signals of a frame are being received, the receiver 
+    walks the tree one bit at a time. As soon as there is no node for the 
+    received bits, the frame cannot be a command. As soon as all complete 
+    data sequences continuing the received bits are for the same command(s), 
+    the command is known without waiting for the rest of the frame.
+    
+    Use get_command_trie() to get the tree built from the current config.
+    """
+    def __init__(self, command_index):
+        self.root = CommandTrieNode()
+        for data_sequence, commands in command_index._commands.items():
+            node = self.root
+            for bit in data_sequence:
+                node = node.children.setdefault(bit, CommandTrieNode())
+            node.commands = commands
+        self.__decide_commands(self.root)
+        
+    def __decide_commands(self, node):
+        """Set decided commands of given node and all nodes below. Return set of commands of all complete data sequences below given node."""
+        commands = set([node.commands]) if node.commands is not None else set()
+        for child in node.children.values():
+            commands.update(self.__decide_commands(child))
+        if len(commands) == 1: node.decided_commands = next(iter(commands))
+        return commands
+    
+_command_trie = None
+
+def get_command_trie():
+    """Return prefix tree of the complete data sequences of all configured commands. Build it if it does not exist yet."""
+    global _command_trie
+    if _command_trie is None:
+        _command_trie = CommandTrie(get_command_index())
+    return _command_trie
+
+class TransmitReport():
+    """Timing errors (nanosec) of the edges sent by a transmitter, i.e. how late each edge was sent compared to its deadline."""
+    def __init__(self, signal_count, max_error, mean_error, frame_errors, duration):
+        self.signal_count = signal_count
+        self.max_error = max_error
+        self.mean_error = mean_error
+        self.frame_errors = frame_errors
+        """List of tuples of max and mean error of each frame (signal sequence)."""
+        self.duration = duration
+        """Time (nanosec) it took to send all signals."""
+        self.wait_time = 0
+        """Time (nanosec) the command waited in the queue of the transmit scheduler before it was sent."""
+        
+    def __repr__(self):
+        return 'TransmitReport(signals={}, max_error={}ns, mean_error={:.0f}ns, duration={}ns, wait_time={}ns)'.format(self.signal_count, self.max_error, self.mean_error, self.duration, self.wait_time)
+
+class Transmitter():
+    """Sends signals by writing a pin at absolute deadlines.
+    
+    The deadline of each edge is the start time plus the lengths of all 
+    signals before it, so the time it takes to write the pin and to wait 
+    does not add up over the signals. Waiting for a deadline sleeps for most 
+    of the time and spins (busy waits) for the last spin_time nanosec, since 
+    sleeping is not precise enough for signals of a few hundred microsec.
+    
+    Clock, sleep function and pin writer can be replaced (e.g. to test timing 
+    without a Raspberry Pi).
+    """
+    DEFAULT_SPIN_TIME = 200000
+    
+    def __init__(self, write_pin, clock = _perf_counter_ns, sleep = time.sleep, spin_time = DEFAULT_SPIN_TIME):
+        """Initialize transmitter.
+        
+        Args
+        ----------
+        write_pin : function
+            Called with 1 or 0 to switch sending on or off.
+        clock : function
+            Returns current time in nanosec.
+        sleep : function
+            Sleeps for given time in sec.
+        spin_time : int
+            Time in nanosec before a deadline from which on the transmitter spins instead of sleeping.
+        """
+        self.write_pin = write_pin
+        self.clock = clock
+        self.sleep = sleep
+        self.spin_time = spin_time
+        
+    def transmit(self, signals, frame_lengths = None):
+        """Send given signals (microsec, negative if OFF) and return TransmitReport. frame_lengths are the numbers of signals of each frame (for frame errors)."""
+        clock = self.clock
+        write_pin = self.write_pin
+        frame_lengths = list(frame_lengths) if frame_lengths else [len(signals)]
+        
+        frame_errors = []
+        frame_max_error = frame_error_sum = error_sum = max_error = 0
+        frame_index = frame_signal_count = 0
+        
+        write_pin(0)
+        start_time = deadline = clock()
+        for signal in signals:
+            self._wait_until(deadline)
+            now = clock()
+            write_pin(1 if signal > 0 else 0)
+            error = now - deadline
+            
+            if error > frame_max_error: frame_max_error = error
+            frame_error_sum += error
+            frame_signal_count += 1
+            if frame_index < len(frame_lengths) and frame_signal_count == frame_lengths[frame_index]:
+                frame_errors.append((frame_max_error, frame_error_sum / frame_signal_count))
+                if frame_max_error > max_error: max_error = frame_max_error
+                error_sum += frame_error_sum
+                frame_max_error = frame_error_sum = frame_signal_count = 0
+                frame_index += 1
+                
+            deadline += abs(signal) * 1000
+        if frame_signal_count > 0:
+            frame_errors.append((frame_max_error, frame_error_sum / frame_signal_count))
+            if frame_max_error > max_error: max_error = frame_max_error
+            error_sum += frame_error_sum
+        
+        self._wait_until(deadline)
+        write_pin(0)
+        return TransmitReport(len(signals), max_error, error_sum / len(signals) if len(signals) > 0 else 0, frame_errors, clock() - start_time)
+    
+    def _wait_until(self, deadline):
+        """Sleep until shortly before and spin until given deadline (nanosec)."""
+        remaining_time = deadline - self.clock()
+        if remaining_time > self.spin_time:
+            self.sleep((remaining_time - self.spin_time) / 1000000000)
+        while self.clock() < deadline:
+            pass
+
+class QueuedCommand():
+    """Command queued in a TransmitScheduler to be sent to a socket."""
+    def __init__(self, socket_name, command, signals, frame_lengths, queue_time):
+        self.socket_name = socket_name
+        self.command = command
+        self.signals = signals
+        self.frame_lengths = frame_lengths
+        self.queue_time = queue_time
+        """Time (nanosec, clock of GPIO backend) when the (first replaced) command was queued."""
+        self.duration = sum(abs(signal) for signal in signals) * 1000
+        """Time (nanosec) it takes to send the signals."""
+        self.futures = []
+        """Futures of this command and all commands it replaced."""
+
+class TransmitScheduler():
+    """Sends commands for all sockets one at a time on one sending pin.
+    
+    Commands are queued without blocking the caller, which gets a future of 
+    the TransmitReport. A thread sends the queued commands in order, so the 
+    signals of commands sent by several threads do not interleave. If a 
+    command for a socket is queued while another command for the same socket 
+    is still waiting, the new command replaces the waiting one (at its place 
+    in the queue), so only the last command is sent. The futures of replaced 
+    commands get the TransmitReport of the command which replaced them.
+    
+    Use get_transmit_scheduler() instead of creating objects of this class 
+    directly, so that all sockets share the same scheduler.
+    """
+    def __init__(self, pin):
+        self.pin = pin
+        self.sending_thread = None
+        """The thread sending queued commands (None if the queue is empty)."""
+        self.__lock = Lock()
+        self.__queue = []
+        """Queued commands waiting to be sent."""
+        self.__sending_end_time = None
+        """Time (nanosec) when the command being sent will presumably be sent completely."""
+        
+    def get_queue_depth(self):
+        """Return number of commands waiting to be sent (not including the command being sent)."""
+        with self.__lock:
+            return len(self.__queue)
+    
+    def get_wait_time(self):
+        """Return time (nanosec) a command queued now would presumably wait before it is sent."""
+        with self.__lock:
+            wait_time = sum(queued_command.duration for queued_command in self.__queue)
+            if self.__sending_end_time is not None:
+                wait_time += max(0, self.__sending_end_time - get_backend().clock())
+        return wait_time
+    
+    def submit(self, socket, command):
+        """Queue given command for given socket and return Future of its TransmitReport."""
+        return self.__submit(QueuedCommand(socket.get_name(), command, socket.get_command_waveform(command), socket.get_command_frame_lengths(command), get_backend().clock()))
+    
+    def submit_plan(self, transmission_plan):
+        """Queue given TransmissionPlan and return Future of its TransmitReport. A plan never replaces or is replaced by other commands."""
+        return self.__submit(QueuedCommand(None, 'scene', transmission_plan.signals, transmission_plan.frame_lengths, get_backend().clock()))
+    
+    def __submit(self, queued_command):
+        future = Future()
+        with self.__lock:
+            for index, waiting_command in enumerate(self.__queue):
+                if queued_command.socket_name is not None and waiting_command.socket_name == queued_command.socket_name:
+                    # the waiting command is outdated, send new command instead
+                    queued_command.futures = waiting_command.futures
+                    queued_command.queue_time = waiting_command.queue_time
+                    self.__queue[index] = queued_command
+                    break
+            else:
+                self.__queue.append(queued_command)
+            queued_command.futures.append(future)
+            
+            if self.sending_thread is None:
+                self.sending_thread = Thread(target=self.__send_queued_commands)
+                self.sending_thread.start()
+        return future
+    
+    def __send_queued_commands(self):
+        """Send queued commands one after the other until the queue is empty."""
+        backend = get_backend()
+        while True:
+            with self.__lock:
+                if len(self.__queue) == 0:
+                    self.sending_thread = None
+                    return
+                queued_command = self.__queue.pop(0)
+                start_time = backend.clock()
+                self.__sending_end_time = start_time + queued_command.duration
+                
+            futures = [future for future in queued_command.futures if future.set_running_or_notify_cancel()]
+            transmit_report = error = None
+            if len(futures) > 0:
+                try:
+                    transmit_report = self._transmit(queued_command.signals, queued_command.frame_lengths)
+                except Exception as exception:
+                    error = exception
+                else:
+                    transmit_report.wait_time = start_time - queued_command.queue_time
+                    stats = get_stats()
+                    if stats is not None: self.__count_transmission(stats, transmit_report)
+                    
+            # the command was sent, callers woken up by the futures must not see it as being sent any longer
+            with self.__lock:
+                self.__sending_end_time = None
+                queue_empty = len(self.__queue) == 0
+                if queue_empty: self.sending_thread = None
+            for future in futures:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(transmit_report)
+            if queue_empty: return
+            
+    def __count_transmission(self, stats, transmit_report):
+        labels = (('pin', self.pin),)
+        stats.increment('commands_sent', labels=labels)
+        stats.observe('transmit_wait_seconds', transmit_report.wait_time / 1000000000, labels)
+        for frame_max_error, _ in transmit_report.frame_errors:
+            stats.observe('transmit_frame_error_seconds', frame_max_error / 1000000000, labels)
+                    
+    def _transmit(self, signals, frame_lengths):
+        """Send given signals on the pin of this scheduler and return TransmitReport."""
+        backend = get_backend()
+        backend.begin_transmission(self.pin)
+        try:
+            return Transmitter(lambda value: backend.output(self.pin, value), backend.clock, backend.sleep, backend.spin_time).transmit(signals, frame_lengths)
+        finally:
+            backend.end_transmission(self.pin)
+
+_transmit_schedulers = {}
+"""Transmit schedulers by sending pin."""
+_transmit_schedulers_lock = Lock()
+
+def get_transmit_scheduler(pin = None):
+    """Return the transmit scheduler shared by all sockets sending on the given pin (default: sending pin from config). Create it if it does not exist yet."""
+    if pin is None: pin = _setting('SENDING_PIN')
+    with _transmit_schedulers_lock:
+        if pin not in _transmit_schedulers:
+            _transmit_schedulers[pin] = TransmitScheduler(pin)
+        return _transmit_schedulers[pin]
+
+_command_waveforms = {}
+"""Tuples of array of signals to send for a command and list of frame lengths by the encodings, data sequences and repetitions they were created from."""
+
 class SocketError(Exception):
     """Exception raised by Socket class."""
     def __init__(self, message):
@@ -176,6 +1065,9 @@ class Socket():
     
     To be able to send/receive commands GPIOs have to be initialized first 
     and cleared if not needed anymore.
+    
+    Commands are sent and received with the transceiver the group of the 
+    socket is bound to (see get_transceiver()).
     """
     def __init__(self, name, **options):
         """Initialize socket and create list of data sequences configured in config file.
@@ -189,6 +1081,8 @@ class Socket():
         ------
         init_status : str ('on' or 'off)
             The status / command to initialize to socket with. This command will be sent automatically on object creation.
+        prerender_commands : bool
+            Whether to render the signals of all commands on object creation instead of when sending a command for the first time. Default: False
         """
         
         self.__receiving_active = False
@@ -199,32 +1093,39 @@ class Socket():
         """Functions registered to be called whenever a raw signal is received."""
         self._command_handlers = []
         """Functions registered to be called whenever a command for this socket is received."""
+        self._command_event_handlers = []
+        """Functions registered to be called with each command event for this socket (when it starts)."""
+        self._completed_command_event_handlers = []
+        """Functions registered to be called with each command event for this socket once it is complete."""
         
         self.__name = name
         self.__encodings = {}
+        self.__receiver = None
         
-        socket_config_section = 'socket:' + self.__name
-        group_name = config.get(socket_config_section, 'group') if config.has_option(socket_config_section, 'group') else None
-        group_config_section = 'group:' + group_name
-        if config.has_option(group_config_section, 'encodings'):
-            for encoding_name in config.get(group_config_section, 'encodings').split(','):
-                encoding_section = 'encoding:' + encoding_name
-                init_sequence = [int(signal) for signal in config.get(encoding_section, 'init').split(',')] if config.has_option(encoding_section, 'init') else []
-                binary_0_sequence = [int(signal) for signal in config.get(encoding_section, '0').split(',')] if config.has_option(encoding_section, '0') else []
-                binary_1_sequence = [int(signal) for signal in config.get(encoding_section, '1').split(',')] if config.has_option(encoding_section, '1') else []
-                self.__encodings[encoding_name] = Encoding(init_sequence, binary_0_sequence, binary_1_sequence)
+        config_registry = get_config_registry()
+        socket_definition = config_registry.get_socket(self.__name)
+        group_name = socket_definition.group if socket_definition is not None else None
+        group_definition = config_registry.get_group(group_name)
+        if group_definition is not None and group_definition.encodings is not None:
+            for encoding_name in group_definition.encodings:
+                encoding_definition = config_registry.get_encoding(encoding_name)
+                self.__encodings[encoding_name] = Encoding(list(encoding_definition.init_signal_sequence), list(encoding_definition.binary_0_signal_sequence), list(encoding_definition.binary_1_signal_sequence))
         else:
             raise SocketError('No encoding information found in config for group {}.'.format(group_name))
         
-        self._start_data = config.get(group_config_section, 'start_data') if config.has_option(group_config_section, 'start_data') else None
-        self._end_data = config.get(socket_config_section, 'end_data') if config.has_option(socket_config_section, 'end_data') else None
+        self._start_data = group_definition.start_data
+        self._end_data = socket_definition.end_data
+        self._transceiver_name = _get_transceiver_name(self.__name)
+        get_transceiver(self._transceiver_name) # transceiver has to be configured
         
         self._command_data = {}
         for command in ['on','off']:
-            command_data = config.get(socket_config_section, '{}_command_data'.format(command)) if config.has_option(socket_config_section, '{}_command_data'.format(command)) else None
-            while command_data is not None and '|' in command_data:
-                command_data = config.get(command_data.split('|')[0], command_data.split('|')[1]) if config.has_option(command_data.split('|')[0], command_data.split('|')[1]) else None
-            self._command_data[command] = command_data.split(',') if command_data is not None else None
+            data_sequences = socket_definition.command_data[command]
+            self._command_data[command] = list(data_sequences) if data_sequences is not None else None
+        
+        if options.get('prerender_commands', False):
+            for command, data_sequences in self._command_data.items():
+                if data_sequences is not None: self.get_command_waveform(command)
         
         init_status = options.get('init_status', None)
         if init_status == 'on':
@@ -234,6 +1135,15 @@ class Socket():
             
     def get_name(self):
         return self.__name
+    
+    def get_transceiver_name(self):
+        return self._transceiver_name
+    
+    def _get_pin(self, pin_type):
+        """Return pin of given type ('receiving_pin' or 'sending_pin') of the transceiver of this socket."""
+        pin = getattr(get_transceiver(self._transceiver_name), pin_type)
+        if pin is None: raise SocketError('No {} configured for transceiver {}.'.format(pin_type.replace('_', ' '), self._transceiver_name))
+        return pin
             
     def is_on(self):
         """Return boolean indicating if this socket is currently switched on."""
@@ -244,156 +1154,1067 @@ class Socket():
         else:
             return None
         
-    def switch_on(self):
-        """Switch socket on by sending command 'on' to this socket."""
-        self.send_command('on')
+    def switch_on(self, wait = True):
+        """Switch socket on by sending command 'on' to this socket (see send_command())."""
+        transmit_result = self.send_command('on', wait)
         self.status = 'on'
+        return transmit_result
     
-    def switch_off(self):
-        """Switch socket off by sending command 'off' to this socket."""
-        self.send_command('off')
+    def switch_off(self, wait = True):
+        """Switch socket off by sending command 'off' to this socket (see send_command())."""
+        transmit_result = self.send_command('off', wait)
         self.status = 'off'
+        return transmit_result
     
-    def toggle(self):
+    def toggle(self, wait = True):
         """Toggle this switch. Switch it on if it is off and switch it off if it is on."""
         if self.status is None: raise SocketError('The socket cannot be toggled. It does not yet have a status.')
         if self.status == 'on':
-            self.switch_off()
+            return self.switch_off(wait)
         else:
-            self.switch_on()
+            return self.switch_on(wait)
             
     def _get_encodings(self):
         return self.__encodings
             
-    def get_command_signal_sequences(self, command):
-        """Create and return list of signals sequences in all available encodings which need to be sent to send the given command to this socket."""
+    def get_command_signal_sequences(self, command, repetitions = None, data_sequence_count = None):
+        """Create and return list of signals sequences in all available encodings which need to be sent to send the given command to this socket.
+        
+        Each signal sequence is repeated the given number of times (default: 
+        setting SEQUENCE_REPETITIONS). Only the first data_sequence_count data 
+        sequences of the command are used (default: all).
+        """
+        if repetitions is None: repetitions = _setting('SEQUENCE_REPETITIONS')
         command_signal_sequences = []
-        for data_sequence in self._command_data[command]:
+        for data_sequence in self._command_data[command][:data_sequence_count]:
             for encoding in self.__encodings.values():
                 sequence = encoding.encode(self._start_data + data_sequence + self._end_data)
-                for _ in range(SEQUENCE_REPETITIONS):
+                for _ in range(repetitions):
                     command_signal_sequences.append(sequence)
         return command_signal_sequences
             
-    def send_command(self, command):
-        """Get signal sequences to send given command to this socket and create and start thread which sends those signal sequences."""
-        if not sending_GPIO_initialized: raise SocketError('Cannot send socket command. The sending GPIO has not been initialized.')
-        
-        signal_sequences = self.get_command_signal_sequences(command)
-        sending_thread = Thread(target=self._send_signal_sequences, args=(signal_sequences,))
-        sending_thread.start()
-        sending_thread.join()
+    def get_command_waveform(self, command):
+        """Return array of all signals which need to be sent to send the given command to this socket (see get_command_signal_sequences()).
         
-    def _send_signal_sequences(self, signal_sequences):
-        """Send given signal sequences via 433Mhz sender by switching sending GPIO pin on and off for time periods specified in signal sequences."""
-        GPIO.output(SENDING_PIN, 0)
+        The array is created once and cached for all sockets by the encodings, 
+        data sequences and number of repetitions it was created from.
+        """
+        return self.__get_cached_command_waveform(command)[0]
+    
+    def get_command_frame_lengths(self, command):
+        """Return list of lengths of the signal sequences (frames) the array returned by get_command_waveform() consists of."""
+        return self.__get_cached_command_waveform(command)[1]
+    
+    def __get_cached_command_waveform(self, command):
+        encodings = tuple((tuple(encoding.init_signal_sequence), tuple(encoding.binary_0_signal_sequence), tuple(encoding.binary_1_signal_sequence)) for encoding in self.__encodings.values())
+        key = (encodings, self._start_data, tuple(self._command_data[command]), self._end_data, _setting('SEQUENCE_REPETITIONS'))
+        cached_waveform = _command_waveforms.get(key)
+        if cached_waveform is None:
+            waveform = array('i')
+            frame_lengths = []
+            for signal_sequence in self.get_command_signal_sequences(command):
+                waveform.extend(signal_sequence)
+                frame_lengths.append(len(signal_sequence))
+            cached_waveform = _command_waveforms[key] = (waveform, frame_lengths)
+        return cached_waveform
+            
+    def send_command(self, command, wait = True):
+        """Queue given command to be sent to this socket by the transmit scheduler of the sending pin. Wait until it was sent and return its TransmitReport or (if wait is False) return a Future of it right away."""
+        if not sending_GPIO_initialized: raise SocketError('Cannot send socket command. The sending GPIO has not been initialized.')
         
-        for sequence in signal_sequences:
-            for signal in sequence:
-                signalLength = abs(signal)
-                new_value = 1 if signal > 0 else 0
-                signalSeconds = signalLength / 1000000
-                
-                GPIO.output(SENDING_PIN, new_value)
-                time.sleep(signalSeconds)
+        future = get_transmit_scheduler(self._get_pin('sending_pin')).submit(self, command)
+        return future.result() if wait else future
+    
+    def async_send_command(self, command):
+        """Queue given command to be sent to this socket and return an asyncio future of its TransmitReport to be awaited in the event loop (requires python 3)."""
+        import asyncio
+        return asyncio.wrap_future(self.send_command(command, False))
+    
+    def async_switch_on(self):
+        """Switch socket on (see async_send_command()). The status is set once the command was sent."""
+        return self.__set_status_when_sent(self.async_send_command('on'), 'on')
+    
+    def async_switch_off(self):
+        """Switch socket off (see async_send_command()). The status is set once the command was sent."""
+        return self.__set_status_when_sent(self.async_send_command('off'), 'off')
+    
+    def __set_status_when_sent(self, future, status):
+        """Set given status once given future of a TransmitReport is done (unless sending failed or was cancelled) and return the future."""
+        def set_status(future):
+            if not future.cancelled() and future.exception() is None: self.status = status
+        future.add_done_callback(set_status)
+        return future
+    
+    def async_toggle(self):
+        """Toggle this switch (see async_send_command())."""
+        if self.status is None: raise SocketError('The socket cannot be toggled. It does not yet have a status.')
+        return self.async_switch_off() if self.status == 'on' else self.async_switch_on()
                 
     def add_signal_handler(self, handler_function):
         """Register given function as signal handler which is called whenever this socket receives a signal sequence."""
         self._signal_handlers.append(handler_function)
         
     def add_command_handler(self, handler_function):
-        """Register given function as command handler which is called whenever this socket receives a command."""
+        """Register given function as command handler which is called whenever this socket receives a command.
+        
+        Frames of the same command received within the command window of the 
+        receiver (see setting COMMAND_WINDOW) are one command, so the handler is called 
+        once per button press on the remote.
+        """
         self._command_handlers.append(handler_function)
         
+    def add_command_event_handler(self, handler_function, when_complete = False):
+        """Register given function to be called with a CommandEvent whenever this socket receives a command.
+        
+        By default the function is called as soon as the first frame of the 
+        command is decoded. With when_complete=True it is called once the 
+        command window has passed, when the event holds the number of frames 
+        and encodings which confirmed the command.
+        """
+        if when_complete:
+            self._completed_command_event_handlers.append(handler_function)
+        else:
+            self._command_event_handlers.append(handler_function)
+        
     def get_command_by_data_sequence(self, data_sequence):
         """Use signal/data sequences specified in config file to determine corresponding command for given data sequence."""
-        for command, data_sequences in self._command_data.items():
-            for test_data_sequence in data_sequences:
-                test_data_sequence = self._start_data + test_data_sequence + self._end_data
-                if data_sequence == test_data_sequence:
-                    return command
-        
-        return None
+        return get_command_index().get_command(data_sequence, self.__name)
     
     def is_receiving_active(self):
         return self.__receiving_active
         
     def start_receiving(self):
-        """Create and start thread receiving signals / commands for this socket."""
+        """Register this socket at the receiver of the receiving pin of its transceiver, which starts the thread receiving signals / commands if not yet running."""
         # if there are no handers registered, we do not need to receive anything
-        if len(self._signal_handlers) == 0 and len(self._command_handlers) == 0: return
+        if len(self._signal_handlers) == 0 and len(self._command_handlers) == 0 and len(self._command_event_handlers) == 0 and len(self._completed_command_event_handlers) == 0: return
         
         if not receiving_GPIO_initialized: raise SocketError('Cannot receive signals. The receiving GPIO has not been initialized.')
         
+        receiver = get_receiver(self._get_pin('receiving_pin'))
+        receiver.add_socket(self)
+        self.__receiver = receiver
         self.__receiving_active = True
-        self.receiving_thread = Thread(target=self._receive_signals, args=(lambda: self.__receiving_active,))
-        self.receiving_thread.start()
+        self.receiving_thread = receiver.receiving_thread
         return self.receiving_thread
     
     def stop_receiving(self):
-        """Stop thread which is receiving signals / commands for this socket."""
+        """Unregister this socket from the receiver of the receiving pin. The receiving thread stops once no socket is registered anymore."""
+        if self.__receiving_active:
+            self.__receiver.remove_socket(self)
         self.__receiving_active = False
+        self.__receiver = None
+
+BROADCAST_SOCKET_NAME = 'all'
+"""Name of the socket which addresses all sockets of its group at once."""
+
+class TransmissionPlan():
+    """Signals to send to bring many sockets into a target state (a scene) at once, in as little time as possible.
+    
+    If all sockets of the group of the broadcast socket (see 
+    BROADCAST_SOCKET_NAME) have a target, the plan sends a command to the 
+    broadcast socket followed by commands to those sockets whose target 
+    differs, if this takes less time than sending a command to each socket. 
+    Commands to the broadcast socket are sent before all other commands.
+    
+    The frames of the commands are interleaved instead of being sent one 
+    command after the other: each block of repeated frames (one data sequence 
+    in one encoding) of each command in turn, so every socket receives its 
+    first frames early. Fewer repetitions and data sequences per command make 
+    the plan even shorter (at the risk of sockets missing their command).
+    
+    All sockets of a plan have to be sent with the same sending pin (see 
+    switch_scene() for sockets of several transceivers).
+    """
+    def __init__(self, targets, repetitions = None, data_sequence_count = None, use_broadcast = True):
+        """Create plan for given targets (dict of commands 'on' or 'off' by socket name).
+        
+        Kwargs
+        ------
+        repetitions : int
+            How often to send each frame. Default: setting SEQUENCE_REPETITIONS
+        data_sequence_count : int
+            Number of data sequences to send per command. Default: all
+        use_broadcast : bool
+            Whether to use the broadcast socket if it is cheaper. Default: True
+        """
+        self.targets = dict(targets)
+        self.repetitions = repetitions if repetitions is not None else _setting('SEQUENCE_REPETITIONS')
+        self.data_sequence_count = data_sequence_count
+        self.commands = []
+        """Tuples of socket name and command sent by this plan, in order of their first frame."""
+        self.signals = array('i')
+        self.frame_lengths = []
+        self.duration = 0
+        """Time (nanosec) it takes to send the signals."""
+        self.sending_pin = None
+        """Sending pin of the transceiver of the sockets (None if there are no targets)."""
+        self.__sockets = {}
+        self.__frame_blocks = {}
         
-    def _receive_signals(self, is_receiving_active):
-        """Receive signals / commands for this socket by monitoring receiving GPIO pin status and calling registered handler functions."""
-        current_encoding = None
-        current_sequence = []
+        config_registry = get_config_registry()
+        socket_names = config_registry.get_socket_names()
+        for socket_name, command in self.targets.items():
+            if socket_name not in socket_names: raise SocketError('Unknown socket {}.'.format(socket_name))
+            if command not in ['on', 'off']: raise SocketError('Unknown command {}.'.format(command))
+            sending_pin = get_transceiver(_get_transceiver_name(socket_name)).sending_pin
+            if self.sending_pin is not None and sending_pin != self.sending_pin: raise SocketError('Socket {} is sent with another sending pin than the other sockets of the plan.'.format(socket_name))
+            self.sending_pin = sending_pin
             
-        start_time = datetime.now()
-        last_value = None
+        broadcast_targets = {}
+        individual_targets = dict(self.targets)
+        broadcast_definition = config_registry.get_socket(BROADCAST_SOCKET_NAME)
+        if broadcast_definition is not None:
+            group_socket_names = [socket_name for socket_name in socket_names if socket_name != BROADCAST_SOCKET_NAME and config_registry.get_socket(socket_name).group == broadcast_definition.group]
+            group_targets = dict((socket_name, command) for socket_name, command in self.targets.items() if socket_name in group_socket_names)
+            broadcast_command = individual_targets.pop(BROADCAST_SOCKET_NAME, None)
+            if broadcast_command is None and use_broadcast and len(group_targets) > 0 and len(group_targets) == len(group_socket_names):
+                lowest_duration = sum(self.__get_duration(socket_name, command) for socket_name, command in group_targets.items())
+                for command in ['on', 'off']:
+                    duration = self.__get_duration(BROADCAST_SOCKET_NAME, command) + sum(self.__get_duration(socket_name, target) for socket_name, target in group_targets.items() if target != command)
+                    if duration < lowest_duration:
+                        lowest_duration = duration
+                        broadcast_command = command
+            if broadcast_command is not None:
+                broadcast_targets[BROADCAST_SOCKET_NAME] = broadcast_command
+                for socket_name, command in group_targets.items():
+                    if command == broadcast_command: del individual_targets[socket_name]
         
-        # find length of longest init sequence in encodings to keep current_sequence that short while searching for init sequences
-        max_init_sequence_length = 1
-        for encoding in self.__encodings.values():
-            if len(encoding.get_init_sequence()) > max_init_sequence_length:
-                max_init_sequence_length = len(encoding.get_init_sequence())
+        for stage_targets in [broadcast_targets, individual_targets]:
+            stage_commands = [(socket_name, stage_targets[socket_name]) for socket_name in socket_names if socket_name in stage_targets]
+            self.commands.extend(stage_commands)
+            stage_frame_blocks = [self.__get_frame_blocks(socket_name, command) for socket_name, command in stage_commands]
+            for index in range(max([0] + [len(frame_blocks) for frame_blocks in stage_frame_blocks])):
+                for frame_blocks in stage_frame_blocks:
+                    if index >= len(frame_blocks): continue
+                    for signal_sequence in frame_blocks[index]:
+                        self.signals.extend(signal_sequence)
+                        self.frame_lengths.append(len(signal_sequence))
+        self.duration = sum(abs(signal) for signal in self.signals) * 1000
         
+    def __repr__(self):
+        return 'TransmissionPlan(commands={}, frames={}, duration={}ns)'.format(self.commands, len(self.frame_lengths), self.duration)
+    
+    def __get_frame_blocks(self, socket_name, command):
+        """Return list of blocks of repeated frames (lists of signal sequences) of given command for given socket."""
+        key = (socket_name, command)
+        if key not in self.__frame_blocks:
+            if socket_name not in self.__sockets: self.__sockets[socket_name] = Socket(socket_name)
+            signal_sequences = self.__sockets[socket_name].get_command_signal_sequences(command, self.repetitions, self.data_sequence_count)
+            self.__frame_blocks[key] = [signal_sequences[index:index + self.repetitions] for index in range(0, len(signal_sequences), max(1, self.repetitions))]
+        return self.__frame_blocks[key]
+    
+    def __get_duration(self, socket_name, command):
+        return sum(abs(signal) for frame_block in self.__get_frame_blocks(socket_name, command) for signal_sequence in frame_block for signal in signal_sequence) * 1000
+
+def switch_scene(targets, wait = True, **options):
+    """Bring many sockets into given target states (dict of commands 'on' or 'off' by socket name) with one TransmissionPlan per sending pin.
+    
+    The plan is queued in the transmit scheduler of the sending pin. Wait 
+    until it was sent and return its TransmitReport or (if wait is False) 
+    return a Future of it right away. Options are passed to TransmissionPlan.
+    
+    If the sockets belong to transceivers with different sending pins, a 
+    plan is queued for each pin (so they are sent at the same time) and a 
+    list of their TransmitReports (or Futures) is returned.
+    """
+    if not sending_GPIO_initialized: raise SocketError('Cannot switch scene. The sending GPIO has not been initialized.')
+    
+    sending_pins = []
+    targets_by_sending_pin = {}
+    for socket_name, command in targets.items():
+        sending_pin = get_transceiver(_get_transceiver_name(socket_name)).sending_pin
+        if sending_pin not in targets_by_sending_pin:
+            sending_pins.append(sending_pin)
+            targets_by_sending_pin[sending_pin] = {}
+        targets_by_sending_pin[sending_pin][socket_name] = command
+    transmission_plans = [TransmissionPlan(targets_by_sending_pin[sending_pin], **options) for sending_pin in sending_pins] or [TransmissionPlan({}, **options)]
+    
+    futures = [get_transmit_scheduler(transmission_plan.sending_pin).submit_plan(transmission_plan) for transmission_plan in transmission_plans]
+    if wait: futures = [future.result() for future in futures]
+    return futures[0] if len(futures) == 1 else futures
+
+_receivers = {}
+"""Receivers by receiving pin."""
+_receivers_lock = Lock()
+
+def _clear_pin_registries():
+    """Forget the receivers and transmit schedulers of all pins (their times are times of the clock of the backend they were created with)."""
+    with _receivers_lock:
+        _receivers.clear()
+    with _transmit_schedulers_lock:
+        _transmit_schedulers.clear()
+
+def get_receiver(pin = None):
+    """Return the receiver shared by all sockets receiving on the given pin (default: receiving pin from config). Create it if it does not exist yet."""
+    if pin is None: pin = _setting('RECEIVING_PIN')
+    with _receivers_lock:
+        if pin not in _receivers:
+            _receivers[pin] = Receiver(pin)
+        return _receivers[pin]
+
+def _get_signal(start_time, end_time, new_value):
+    """Return signal (microsec, negative if OFF) between two edges given by their times (nanosec) and the pin value after the second edge."""
+    signal = int(round((end_time - start_time) / 1000))
+    return signal * -1 if new_value != 0 else signal
+
+def capture_edges(pin, receiving_seconds, buffer_size = None):
+    """Capture edges on given pin for given time using edge detection and return them as list of tuples of time (nanosec) and pin value, followed by an idle tick at the end of the capture (see get_signals())."""
+    edge_buffer = EdgeBuffer(buffer_size if buffer_size is not None else _setting('EDGE_BUFFER_SIZE') * 16)
+    backend = get_backend()
+    backend.setup_input(pin)
+    backend.add_edge_detection(pin, edge_buffer.put)
+    time.sleep(receiving_seconds)
+    backend.remove_edge_detection(pin)
+    return list(edge_buffer.get_edges()) + [(backend.clock(), None)]
+
+def capture_signals(pin, receiving_seconds, buffer_size = None):
+    """Capture signals on given pin for given time using edge detection and return them as list of signals (microsec, negative if OFF)."""
+    return [signal for signal in get_signals(capture_edges(pin, receiving_seconds, buffer_size)) if signal.__class__ is not IdleSignal]
+
+class IdleSignal():
+    """Signal which has not ended yet: the pin did not change for signal microsec since the last edge (negative if OFF).
+    
+    Idle signals are yielded by get_signals() for idle ticks and passed on by 
+    classify_signals(), so that get_frames() can end a frame if no further 
+    edge comes (at the end of a transmission).
+    """
+    __slots__ = ('signal',)
+    
+    def __init__(self, signal):
+        self.signal = signal
+        
+    def __repr__(self):
+        return 'IdleSignal({})'.format(self.signal)
+
+class Frame():
+    """Signal sequence (frame) received with one encoding, from its init sequence to the last binary signal."""
+    def __init__(self, encoding_name, encoding, signal_sequence, complete = True, decided = False, commands = None):
+        self.encoding_name = encoding_name
+        self.encoding = encoding
+        self.signal_sequence = signal_sequence
+        """Best fitting signals of the frame (init and binary signals)."""
+        self.complete = complete
+        """False if the frame was yielded before its end since its commands were already decided (see get_frames())."""
+        self.decided = decided
+        """Whether the commands of the frame were decided by the command trie before the frame was complete."""
+        self.commands = commands
+        """Tuple of tuples of socket name and command the frame is (None if not looked up)."""
+        self.data_sequence = None
+        """Decoded data sequence (None if not decoded)."""
+        self.time = None
+        """Time (nanosec) of the last edge of the frame (None if not known, e.g. when the frame is dispatched while its edges are decoded)."""
+        
+    def __repr__(self):
+        return 'Frame(encoding={}, signals={}, complete={}, commands={})'.format(self.encoding_name, len(self.signal_sequence), self.complete, self.commands)
+
+class FrameAssembler():
+    """Assembles frames from classified signals (see classify_signals()), one signal at a time.
+    
+    Init sequences of all encodings are searched for until one is found. 
+    Then binary signals of its encoding are collected until a signal comes 
+    which is no binary signal (or an idle signal too long to be one). The 
+    next init sequence might start with the last binary signals, so they are 
+    searched again. Frames with more than SEQUENCE_MIN_LENGTH signals are 
+    appended to frames.
+    
+    If a command trie is given, the bits of the frame being received are 
+    looked up while it is received. As soon as the bits received so far can 
+    only be one command, an incomplete frame holding the commands is 
+    appended to frames. Frames whose bits cannot be a command are dismissed 
+    right away, unless keep_unknown_frames (a function called with the name 
+    of the encoding of each frame) returns True.
+    
+    If Stats are given, init sequences found and frames dismissed are 
+    counted per encoding.
+    """
+    def __init__(self, encodings, command_trie = None, keep_unknown_frames = None, stats = None):
+        self.frames = []
+        """Frames assembled from the signals added so far (to be taken out by the caller)."""
+        self._encodings = list(encodings)
+        self.__positions = dict((encoding_name, position) for position, (encoding_name, _) in enumerate(self._encodings))
+        self.__init_sequence_matcher = InitSequenceMatcher(self._encodings)
+        self.__max_init_sequence_length = max([0] + [len(encoding.init_signal_sequence) for _, encoding in self._encodings])
+        # signals longer than this cannot be binary signals of an encoding
+        self.__max_binary_signal_lengths = [max([0] + [abs(binary_signal) for binary_signal in encoding.get_allowed_signals('binary')]) * (100 + _setting('MAX_SIGNAL_DIFFERENCE')) / 100 for _, encoding in self._encodings]
+        self.__sequence_min_length = _setting('SEQUENCE_MIN_LENGTH')
+        self.__command_trie = command_trie
+        self.__keep_unknown_frames = keep_unknown_frames
+        self.__stats = stats
+        self.__stats_labels = [(('encoding', encoding_name),) for encoding_name, _ in self._encodings]
+        
+        self.__current_encoding_name = self.__current_encoding = self.__current_position = None
+        self.__current_sequence = []
+        """Best fitting signals of signal sequence being received (init and binary signals)."""
+        self.__current_symbols = []
+        """Classified binary signals of signal sequence being received."""
+        self.__current_max_binary_signal_length = 0
+        self.__command_trie_node = None
+        """Node of the command trie for the bits of the signal sequence being received (None if not looking up commands)."""
+        self.__commands_decided = False
+        """Whether the commands of the signal sequence being received have already been decided."""
+        self.__keep_frame = True
+        self.__idle = False
+        """Whether the signal being received already ended the signal sequence as idle signal."""
+        
+    def add_symbol(self, symbol):
+        """Process next classified signal (tuple of signal and best fitting init and binary signals per encoding) or IdleSignal."""
+        if symbol.__class__ is IdleSignal:
+            if not self.__idle and self.__current_encoding is not None and abs(symbol.signal) > self.__current_max_binary_signal_length:
+                # no further edge came, end signal sequence being received
+                self.__idle = True
+                self.__end_signal_sequence(idle=True)
+            return
+        # the signal which was too long to be a binary signal is complete now, it might be the first signal of the next init sequence
+        self.__idle = False
+        self.__process_symbol(symbol)
+        
+    def __process_symbol(self, symbol):
+        """Search for init sequence or add signal to current signal sequence and end it if the signal is no binary signal."""
+        if self.__current_encoding is not None:
+            # init sequence was already found, now recording binary signals
+            best_fitting_signal = symbol[2][self.__current_position]
+            if best_fitting_signal is not None:
+                self.__current_sequence.append(best_fitting_signal)
+                self.__current_symbols.append(symbol)
+                if self.__command_trie_node is not None and len(self.__current_symbols) % 2 == 0:
+                    self.__process_bit()
+            else:
+                # found signal which is not a binary signal (maybe the next init signal?), binary data (sequence) ends here, process this sequence
+                self.__end_signal_sequence(symbol)
+        else:
+            # no encoding found yet, look for init sequences
+            found_encoding = self.__init_sequence_matcher.add_classified_signal(symbol[1])
+            if found_encoding is not None:
+                self.__start_signal_sequence(found_encoding)
+                
+    def __process_bit(self):
+        """Look up the bit encoded by the last two binary signals in the command trie. Decide commands or dismiss the signal sequence being received if possible."""
+        bit = self.__current_encoding._bits_by_signal_pair.get((self.__current_sequence[-2], self.__current_sequence[-1]))
+        self.__command_trie_node = self.__command_trie_node.children.get(bit)
+        if self.__command_trie_node is None:
+            # the bits received so far are not the beginning of any command
+            if not self.__keep_frame: self.__end_signal_sequence(dismiss=True)
+        elif self.__command_trie_node.decided_commands is not None:
+            # all commands starting with the bits received so far are the same, no need to wait for the remaining bits
+            self.__commands_decided = True
+            self.frames.append(Frame(self.__current_encoding_name, self.__current_encoding, list(self.__current_sequence), False, True, self.__command_trie_node.decided_commands))
+            self.__command_trie_node = None
+            
+    def __start_signal_sequence(self, found_encoding):
+        self.__current_encoding_name, self.__current_encoding = found_encoding
+        self.__current_position = self.__positions[self.__current_encoding_name]
+        self.__current_sequence = self.__current_encoding.get_init_sequence()
+        self.__current_symbols = []
+        self.__current_max_binary_signal_length = self.__max_binary_signal_lengths[self.__current_position]
+        self.__command_trie_node = self.__command_trie.root if self.__command_trie is not None else None
+        self.__commands_decided = False
+        self.__keep_frame = self.__keep_unknown_frames is not None and self.__keep_unknown_frames(self.__current_encoding_name)
+        if self.__stats is not None: self.__stats.increment('init_sequences', labels=self.__stats_labels[self.__current_position])
+        
+    def __end_signal_sequence(self, symbol = None, dismiss = False, idle = False):
+        """End current signal sequence with given (non-binary) signal (or after the last binary signal if None), append it to frames (unless dismissed) and look for the next init sequence.
+        
+        If idle, the signal sequence is ended by the signal being received, 
+        which is processed once it is complete.
+        """
+        encoding_name, encoding, position = self.__current_encoding_name, self.__current_encoding, self.__current_position
+        signal_sequence = self.__current_sequence
+        commands_decided = self.__commands_decided
+        self.__current_encoding_name = self.__current_encoding = self.__current_position = None
+        self.__current_sequence = []
+        self.__command_trie_node = None
+        
+        # init signals might be binary signals as well (like 300 in encoding 1), so the next init sequence might start with the last binary signals
+        self.__init_sequence_matcher.reset()
+        search_symbol_count = self.__max_init_sequence_length - 1 if symbol is not None or idle else self.__max_init_sequence_length
+        search_symbols = self.__current_symbols[len(self.__current_symbols) - min(len(self.__current_symbols), search_symbol_count):]
+        next_init_signal_count = len(search_symbols)
+        if symbol is not None: search_symbols.append(symbol)
+        found_encoding = None
+        for index, search_symbol in enumerate(search_symbols):
+            found_encoding = self.__init_sequence_matcher.add_classified_signal(search_symbol[1])
+            if found_encoding is not None:
+                next_init_signal_count -= index + 1 - len(found_encoding[1].init_signal_sequence)
+                break
+            
+        if found_encoding is not None and next_init_signal_count > 0:
+            signal_sequence = signal_sequence[:-next_init_signal_count]
+        if not dismiss and len(signal_sequence) > self.__sequence_min_length:
+            # signal sequence found
+            self.frames.append(Frame(encoding_name, encoding, signal_sequence, True, commands_decided))
+        elif self.__stats is not None:
+            self.__stats.increment('frames_dismissed' if dismiss else 'frames_too_short', labels=self.__stats_labels[position])
+            
+        if found_encoding is not None:
+            self.__start_signal_sequence(found_encoding)
+            for search_symbol in search_symbols[index + 1:]:
+                self.__process_symbol(search_symbol)
+
+def get_signals(edges):
+    """Yield signals (microsec, negative if OFF) between the given edges (tuples of time (nanosec) and pin value after the edge).
+    
+    An edge with pin value None is an idle tick: no edge came until its time. 
+    For an idle tick an IdleSignal with the time since the last edge is 
+    yielded. Edges less than half a microsec apart are ignored.
+    """
+    last_edge_time = last_value = None
+    for edge_time, value in edges:
+        if value is None:
+            # the signal since the last edge has the pin value after the last edge
+            if last_edge_time is not None: yield IdleSignal(_get_signal(last_edge_time, edge_time, 0 if last_value != 0 else 1))
+            continue
+        if last_edge_time is not None:
+            signal = _get_signal(last_edge_time, edge_time, value)
+            if signal == 0: continue
+            yield signal
+        last_edge_time = edge_time
+        last_value = value
+
+def classify_signals(signals, encodings):
+    """Yield for each of given signals a tuple of the signal and tuples of its best fitting init and binary signals in each of given encodings (list of tuples of encoding name and encoding). Idle signals are passed on."""
+    init_signal_classifiers = [encoding._signal_classifiers['init'] for _, encoding in encodings]
+    binary_signal_classifiers = [encoding._signal_classifiers['binary'] for _, encoding in encodings]
+    for signal in signals:
+        if signal.__class__ is IdleSignal:
+            yield signal
+            continue
+        yield signal, tuple([signal_classifier.get_best_fitting_signal(signal) for signal_classifier in init_signal_classifiers]), tuple([signal_classifier.get_best_fitting_signal(signal) for signal_classifier in binary_signal_classifiers])
+
+def get_frames(symbols, encodings, command_trie = None, keep_unknown_frames = None, stats = None):
+    """Yield frames (see Frame) assembled from given classified signals (see classify_signals()) of given encodings (see FrameAssembler).
+    
+    A frame still being received when the signals end is dismissed (end 
+    the edges with an idle tick to complete it).
+    """
+    frame_assembler = FrameAssembler(encodings, command_trie, keep_unknown_frames, stats)
+    frames = frame_assembler.frames
+    for symbol in symbols:
+        frame_assembler.add_symbol(symbol)
+        if frames:
+            for frame in frames:
+                yield frame
+            del frames[:]
+
+def count_rejected_signals(symbols, encodings, stats):
+    """Pass on given classified signals (see classify_signals()) and count those which are neither init nor binary signals per encoding in given Stats."""
+    labels = [(('encoding', encoding_name),) for encoding_name, _ in encodings]
+    positions = range(len(labels))
+    for symbol in symbols:
+        if symbol.__class__ is not IdleSignal:
+            best_fitting_init_signals, best_fitting_binary_signals = symbol[1], symbol[2]
+            for position in positions:
+                if best_fitting_init_signals[position] is None and best_fitting_binary_signals[position] is None:
+                    stats.increment('signals_rejected', labels=labels[position])
+        yield symbol
+
+def decode_frames(frames, command_index = None):
+    """Decode the data sequence of given complete frames, look up the commands it is in given command index (default: index of all configured commands) unless already decided and yield the frames."""
+    if command_index is None: command_index = get_command_index()
+    for frame in frames:
+        if frame.complete:
+            frame.data_sequence = frame.encoding.decode(frame.signal_sequence)
+            if not frame.decided: frame.commands = command_index.get_commands(frame.data_sequence)
+        yield frame
+
+def decode_edges(edges, encodings, command_index = None):
+    """Yield frames decoded from given edges, with all pipeline stages (get_signals(), classify_signals(), get_frames() and decode_frames()) chained."""
+    return decode_frames(get_frames(classify_signals(get_signals(edges), encodings), encodings), command_index)
+
+class EdgeBuffer():
+    """Ring buffer of a fixed size holding times (monotonic nanosec) and pin values of edges detected on a pin.
+    
+    Edges are put into the buffer by the edge detection callback and taken 
+    out by the decoding thread. Memory for all edges is allocated once. If 
+    the buffer is full, new edges are dropped and counted.
+    """
+    try:
+        TIME_TYPECODE = array('q').typecode
+    except ValueError:
+        TIME_TYPECODE = 'l' # python 2 compatibility (no 'q' typecode, 'l' is 64 bit on 64 bit Linux)
+        
+    def __init__(self, size = 4096):
+        self.size = size
+        self.dropped_edges = 0
+        """Number of edges dropped because the buffer was full."""
+        self._times = array(self.TIME_TYPECODE, [0]) * size
+        self._values = array('b', [0]) * size
+        self._put_count = 0
+        self._get_count = 0
+        self._edges_available = Event()
+        
+    def __len__(self):
+        return self._put_count - self._get_count
+        
+    def put(self, edge_time, value):
+        """Add edge with given time and pin value after the edge. Return False if it had to be dropped because the buffer is full."""
+        if self._put_count - self._get_count >= self.size:
+            self.dropped_edges += 1
+            return False
+        index = self._put_count % self.size
+        self._times[index] = edge_time
+        self._values[index] = value
+        self._put_count += 1
+        self._edges_available.set()
+        return True
+    
+    def wait(self, timeout = None):
+        """Block until edges are available or timeout (sec) is over. Return True if edges are available."""
+        if self._put_count == self._get_count:
+            self._edges_available.wait(timeout)
+        self._edges_available.clear()
+        return self._put_count != self._get_count
+        
+    def get_edges(self):
+        """Take all currently buffered edges out of the buffer and yield them as tuples of time and pin value."""
+        put_count = self._put_count
+        while self._get_count < put_count:
+            index = self._get_count % self.size
+            yield self._times[index], self._values[index]
+            self._get_count += 1
+
+EDGE_RECORDING_MAGIC = b'GTSE'
+EDGE_RECORDING_VERSION = 1
+EDGE_RECORDING_HEADER = struct.Struct('<4sHhIq') # magic, version, pin (-1 if unknown), clock resolution (nanosec per tick), start time (nanosec since epoch)
+EDGE_RECORDING_EDGE = struct.Struct('<qB') # time (ticks since start), pin value after edge
+
+class EdgeRecorder():
+    """Writes edges (times and pin values) into a binary edge recording file.
+    
+    The file starts with a header (EDGE_RECORDING_HEADER) holding the pin, 
+    the clock resolution and the start time of the recording, followed by one 
+    record (EDGE_RECORDING_EDGE) per edge with the time of the edge relative 
+    to the first edge and the pin value after the edge.
+    """
+    def __init__(self, path, pin = None):
+        self.path = path
+        self.edge_count = 0
+        self._file = open(path, 'wb')
+        self._file.write(EDGE_RECORDING_HEADER.pack(EDGE_RECORDING_MAGIC, EDGE_RECORDING_VERSION, pin if pin is not None else -1, 1, int(time.time() * 1000000000)))
+        self._first_edge_time = None
+        self._lock = Lock()
+        
+    def record(self, edge_time, value):
+        """Write given edge into the file. Edges recorded after closing the file are ignored."""
+        with self._lock:
+            if self._file.closed: return
+            if self._first_edge_time is None: self._first_edge_time = edge_time
+            self._file.write(EDGE_RECORDING_EDGE.pack(edge_time - self._first_edge_time, value))
+            self.edge_count += 1
+        
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+class EdgeRecording():
+    """Edge recording file (see EdgeRecorder) which is memory-mapped and can be iterated to get tuples of edge time (nanosec) and pin value."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as recording_file:
+            # an empty file cannot be memory-mapped
+            if os.fstat(recording_file.fileno()).st_size < EDGE_RECORDING_HEADER.size: raise SocketError('{} is no edge recording. It is too short.'.format(path))
+            self._mmap = mmap.mmap(recording_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, pin, self.clock_resolution, self.start_time = EDGE_RECORDING_HEADER.unpack_from(self._mmap, 0)
+        if magic != EDGE_RECORDING_MAGIC or version != EDGE_RECORDING_VERSION: raise SocketError('{} is no edge recording (of version {}).'.format(path, EDGE_RECORDING_VERSION))
+        self.pin = pin if pin >= 0 else None
+        
+    def __len__(self):
+        return (len(self._mmap) - EDGE_RECORDING_HEADER.size) // EDGE_RECORDING_EDGE.size
+    
+    def __iter__(self):
+        clock_resolution = self.clock_resolution
+        unpack_from = EDGE_RECORDING_EDGE.unpack_from
+        for offset in range(EDGE_RECORDING_HEADER.size, EDGE_RECORDING_HEADER.size + len(self) * EDGE_RECORDING_EDGE.size, EDGE_RECORDING_EDGE.size):
+            edge_time, value = unpack_from(self._mmap, offset)
+            yield edge_time * clock_resolution, value
+            
+    def close(self):
+        self._mmap.close()
+
+COMMAND_STREAM_OVERFLOWS = ['block', 'drop_oldest'] # what streams of command events do when full: wait until events are taken out or drop the oldest event
+
+class CommandEvent():
+    """Command received for a socket. All frames of this command for this socket received within the command window are merged into one event."""
+    def __init__(self, socket, command, event_time):
+        self.socket = socket
+        self.command = command
+        self.time = event_time
+        """Time (nanosec, clock of GPIO backend) when the first frame was received."""
+        self.last_time = event_time
+        """Time (nanosec, clock of GPIO backend) when the last frame was received."""
+        self.frame_count = 0
+        """Number of frames received for this command (so far)."""
+        self.encodings = set()
+        """Names of the encodings the frames were received with (so far)."""
+        self.complete = False
+        """Whether the command window has passed (no more frames are added)."""
+        
+    def __repr__(self):
+        return 'CommandEvent(socket={}, command={}, frame_count={}, encodings={})'.format(self.socket.get_name(), self.command, self.frame_count, sorted(self.encodings))
+    
+    def _add_frame(self, encoding_name, frame_time):
+        self.frame_count += 1
+        self.encodings.add(encoding_name)
+        self.last_time = frame_time
+
+class Receiver():
+    """Receives signals on one GPIO pin and dispatches them to all sockets registered for this pin.
+    
+    The pin is monitored and received signals are classified, searched for 
+    init sequences and assembled to signal sequences only once, in a single 
+    thread, no matter how many sockets are registered. Each completed signal 
+    sequence is handed to the signal handlers of those sockets which use the 
+    encoding it was received with. It is decoded once and handed to the 
+    command handlers of those sockets it is a command for.
+    
+    The remote sends each command many times (several data sequences in 
+    several encodings, each repeated). All frames of the same command for the 
+    same socket received within command_window millisec after the first one 
+    are merged into one CommandEvent. Handlers are called as soon as the first 
+    frame is decoded, further frames only update the event.
+    
+    While a frame is received, its bits are looked up in the CommandTrie. The 
+    command is dispatched as soon as the bits received so far can only be 
+    that command. Frames whose bits cannot be a command are dismissed right 
+    away (unless registered sockets have signal handlers, which get all 
+    frames).
+    
+    In receiving mode 'interrupt' edges are detected by the GPIO module which 
+    puts them into an edge buffer. The receiving thread sleeps until edges are 
+    available. In receiving mode 'polling' the receiving thread polls the pin 
+    in a loop (which keeps one CPU core busy).
+    
+    Received edges can be recorded into a file (see start_recording()) and 
+    recorded edges can be processed again as fast as possible with 
+    process_edges().
+    
+    Edges are decoded by the decoding pipeline (see get_signals(), 
+    classify_signals(), get_frames() and decode_frames()), which is built 
+    again whenever it has to start over (e.g. edges got lost).
+    
+    While stats are enabled (see enable_stats()), the pipeline is built with 
+    stages counting edges, rejected signals and frames, and decode latency 
+    and dispatch time of each frame are measured. Otherwise nothing is counted.
+    
+    If decode_worker is True, the receiving thread only hands the edges to 
+    a worker process, which decodes them (see gtsocket.workers). The frames 
+    decoded by the workers of all receivers are dispatched in one thread, 
+    in the order they were received in (requires python 3).
+    
+    Use get_receiver() instead of creating objects of this class directly, 
+    so that all sockets share the same receiver.
+    """
+    POLLING_IDLE_TICK_INTERVAL = 1000000
+    """Max time (nanosec) between idle ticks when polling the pin."""
+    WORKER_BATCH_SIZE = 1024
+    """Max number of edges handed to the decode worker at once."""
+    
+    def __init__(self, pin, mode = None, edge_buffer_size = None, command_window = None, decode_worker = None):
+        self.pin = pin
+        self.mode = mode if mode is not None else _setting('RECEIVING_MODE')
+        if self.mode not in ['interrupt', 'polling']: raise SocketError('Unknown receiving mode {}.'.format(self.mode))
+        self.edge_buffer = EdgeBuffer(edge_buffer_size if edge_buffer_size is not None else _setting('EDGE_BUFFER_SIZE')) if self.mode == 'interrupt' else None
+        """Buffer edges detected in receiving mode 'interrupt' are put into."""
+        self.command_window = command_window if command_window is not None else _setting('COMMAND_WINDOW')
+        """Time (millisec) after the first frame of a command in which frames of the same command for the same socket are merged into one event."""
+        self.decode_worker = bool(decode_worker if decode_worker is not None else _setting('DECODE_WORKERS'))
+        """Whether edges are decoded in a worker process."""
+        self.receiving_thread = None
+        """The thread receiving signals for all registered sockets."""
+        self.__stop_event = None
+        """Event which is set to stop the current receiving thread."""
+        self.__lock = Lock()
+        self.__edge_recorder = None
+        self._sockets = ()
+        """Sockets registered to receive signals / commands (tuple, replaced as a whole when changed)."""
+        self._encodings = ()
+        """Tuples of encoding name and encoding used by any of the registered sockets (replaced as a whole when changed)."""
+        
+        self.__last_edge_time = None
+        """Time of the last edge processed before the one being processed (the end of a frame dispatched now)."""
+        self.__edge_time = None
+        """Time of the edge (or idle tick) being processed."""
+        self.__command_events = {}
+        """Command events (within command window) by socket and command."""
+        
+    def get_sockets(self):
+        return list(self._sockets)
+    
+    def get_dropped_edges(self):
+        """Return number of edges which had to be dropped since the edge buffer was full (always 0 in receiving mode 'polling')."""
+        return self.edge_buffer.dropped_edges if self.edge_buffer is not None else 0
+        
+    def is_receiving_active(self):
+        return self.__stop_event is not None and not self.__stop_event.is_set()
+    
+    def add_socket(self, socket, start_receiving = True):
+        """Register given socket to get its handlers called for received signals / commands and start receiving thread if not yet running (and start_receiving is True)."""
+        with self.__lock:
+            if socket not in self._sockets:
+                self._sockets += (socket,)
+                self.__update_encodings()
+            if start_receiving and not self.is_receiving_active():
+                self.__stop_event = Event()
+                is_receiving_active = lambda stop_event=self.__stop_event: not stop_event.is_set()
+                if self.decode_worker:
+                    # the worker is registered at the frame merger before any edge is received, so no frame of another pin is dispatched before the frames of this pin received earlier
+                    from .workers import DecodeWorker, get_frame_merger
+                    decode_worker = DecodeWorker(self.pin)
+                    get_frame_merger().add_receiver(self, decode_worker)
+                    self.receiving_thread = Thread(target=self._feed_decode_worker, args=(is_receiving_active, decode_worker))
+                elif self.mode == 'interrupt':
+                    self.receiving_thread = Thread(target=self._decode_edges, args=(is_receiving_active,))
+                else:
+                    self.receiving_thread = Thread(target=self._poll_edges, args=(is_receiving_active,))
+                if self.mode == 'interrupt':
+                    get_backend().add_edge_detection(self.pin, self.edge_buffer.put)
+                self.receiving_thread.start()
+        
+    def remove_socket(self, socket):
+        """Unregister given socket and stop receiving thread if no socket is left."""
+        with self.__lock:
+            self._sockets = tuple(registered_socket for registered_socket in self._sockets if registered_socket is not socket)
+            self.__update_encodings()
+            if len(self._sockets) == 0 and self.is_receiving_active():
+                if self.mode == 'interrupt':
+                    get_backend().remove_edge_detection(self.pin)
+                self.__stop_event.set()
+                
+    def commands(self, sockets = None, max_queue_size = 16, loop = None, overflow = 'block'):
+        """Return asynchronous iterator (gtsocket.aio.CommandStream) of the CommandEvents received for given sockets (default: all registered sockets) to be used in given asyncio event loop (default: the running one, requires python 3.7).
+        
+        Given sockets which are not yet registered are registered (and 
+        unregistered once the stream is closed). Close the stream once done.
+        See COMMAND_STREAM_OVERFLOWS for what happens if the stream is full.
+        """
+        from .aio import CommandStream
+        return CommandStream(self, sockets if sockets is not None else self.get_sockets(), max_queue_size, loop, overflow)
+        
+    def start_recording(self, path):
+        """Write all edges received from now on into an edge recording file with given path (see EdgeRecorder)."""
+        edge_recorder = EdgeRecorder(path, self.pin)
+        with self.__lock:
+            edge_recorder, self.__edge_recorder = self.__edge_recorder, edge_recorder
+            if edge_recorder is not None: edge_recorder.close()
+        
+    def stop_recording(self):
+        with self.__lock:
+            edge_recorder, self.__edge_recorder = self.__edge_recorder, None
+            if edge_recorder is not None: edge_recorder.close()
+        
+    def process_edges(self, edges):
+        """Process given edges (tuples of time (nanosec) and pin value, e.g. an EdgeRecording) in this thread as fast as possible, as if they had been received.
+        
+        Handlers of registered sockets are called as if the edges were received 
+        live. Register sockets with add_socket(socket, start_receiving=False) to 
+        process edges without receiving from the pin.
+        """
+        if self.is_receiving_active(): raise SocketError('Cannot process edges. The receiver is receiving from pin {}.'.format(self.pin))
+        # no more edges are coming after the last one, end signal sequence being received
+        self._decode(_end_edges(edges), self._encodings, False)
+        self._complete_command_events(None)
+        
+    def __update_encodings(self):
+        encodings = []
+        encoding_names = set()
+        for socket in self._sockets:
+            for encoding_name, encoding in socket._get_encodings().items():
+                if encoding_name not in encoding_names:
+                    encoding_names.add(encoding_name)
+                    encodings.append((encoding_name, encoding))
+        self._encodings = tuple(encodings)
+        
+    def _decode(self, edges, encodings, live = True):
+        """Decode given edges with given encodings in the decoding pipeline and dispatch the decoded frames to the registered sockets. Decode latency is only measured for edges received live."""
+        self.__last_edge_time = None
+        stats = get_stats()
+        if stats is None:
+            frames = decode_frames(get_frames(classify_signals(get_signals(self.__track_edges(edges)), encodings), encodings, get_command_trie(), self._has_signal_handlers))
+            for frame in frames:
+                self._dispatch_frame(frame)
+            return
+        
+        symbols = count_rejected_signals(classify_signals(get_signals(self.__track_edges(edges, stats)), encodings), encodings, stats)
+        frames = decode_frames(get_frames(symbols, encodings, get_command_trie(), self._has_signal_handlers, stats))
+        for frame in frames:
+            self._dispatch_counted_frame(frame, stats, self.__edge_time if live else None)
+            
+    def _dispatch_counted_frame(self, frame, stats, edge_time = None):
+        """Dispatch given frame and count it in given Stats. Measure decode latency if the time of the edge (or idle tick) which completed the frame (or decided its commands) is given."""
+        labels = (('pin', self.pin),)
+        if edge_time is not None: stats.observe('decode_latency_seconds', (get_backend().clock() - edge_time) / 1000000000, labels)
+        if frame.complete:
+            stats.increment('frames_decoded', labels=labels)
+            if not frame.decided and not frame.commands: stats.increment('frames_unmatched', labels=labels)
+        start_time = _perf_counter_ns()
+        self._dispatch_frame(frame)
+        stats.observe('dispatch_seconds', (_perf_counter_ns() - start_time) / 1000000000, labels)
+            
+    def __track_edges(self, edges, stats = None):
+        """Pass on given edges to the decoding pipeline. Record (and count) them, remember the time of the last edge processed and complete command events whose command window has passed."""
+        labels = (('pin', self.pin),)
+        for edge_time, value in edges:
+            if value is not None:
+                # the recorder may be replaced or closed by another thread at any time
+                edge_recorder = self.__edge_recorder
+                if edge_recorder is not None: edge_recorder.record(edge_time, value)
+                if stats is not None: stats.increment('edges', labels=labels)
+            self.__edge_time = edge_time
+            yield edge_time, value
+            # the pipeline processed this edge completely
+            if value is not None: self.__last_edge_time = edge_time
+            if len(self.__command_events) > 0: self._complete_command_events(edge_time)
+            
+    def _has_signal_handlers(self, encoding_name):
+        """Return whether any registered socket using given encoding has signal handlers (which get all frames)."""
+        for socket in self._sockets:
+            if len(socket._signal_handlers) > 0 and encoding_name in socket._get_encodings(): return True
+        return False
+        
+    def _dispatch_frame(self, frame):
+        """Call signal handlers of all sockets using the encoding of given frame (if complete) and add it to the command events of all sockets it is a command for."""
+        if frame.complete:
+            for socket in self._sockets:
+                socket_encoding = socket._get_encodings().get(frame.encoding_name)
+                if socket_encoding is None: continue
+                for signal_handler in socket._signal_handlers:
+                    signal_handler(frame.signal_sequence, socket_encoding)
+        if frame.commands:
+            self.__dispatch_commands(frame.encoding_name, frame.commands, frame.time)
+            
+    def __dispatch_commands(self, encoding_name, commands, frame_time = None):
+        """Add a frame received with given encoding at given time (default: the last edge processed) to the command events of all sockets given commands (tuple of tuples of socket name and command) are for."""
+        if frame_time is None:
+            # the frame ended with the last edge (the signal after it is no binary signal)
+            frame_time = self.__last_edge_time if self.__last_edge_time is not None else get_backend().clock()
+        self._complete_command_events(frame_time)
+        commands = dict(reversed(commands)) # first command wins
+        for socket in self._sockets:
+            if encoding_name not in socket._get_encodings(): continue
+            command = commands.get(socket.get_name())
+            if command is not None:
+                self.__add_command_frame(socket, command, encoding_name, frame_time)
+        if self.command_window <= 0: self._complete_command_events(None)
+        
+    def __add_command_frame(self, socket, command, encoding_name, frame_time):
+        """Add received frame to the command event of given socket and command. Start a new event (and call the handlers) if there is none."""
+        command_event = self.__command_events.get((socket, command))
+        if command_event is not None:
+            command_event._add_frame(encoding_name, frame_time)
+            return
+        command_event = CommandEvent(socket, command, frame_time)
+        command_event._add_frame(encoding_name, frame_time)
+        self.__command_events[(socket, command)] = command_event
+        for command_handler in socket._command_handlers:
+            command_handler(socket, command)
+        for command_event_handler in socket._command_event_handlers:
+            command_event_handler(command_event)
+            
+    def _complete_command_events(self, now):
+        """Complete all command events whose command window has passed at given time (nanosec, all if None) and call the handlers waiting for completed events."""
+        if len(self.__command_events) == 0: return
+        for key, command_event in list(self.__command_events.items()):
+            if now is not None and now - command_event.time <= self.command_window * 1000000: continue
+            del self.__command_events[key]
+            command_event.complete = True
+            for command_event_handler in command_event.socket._completed_command_event_handlers:
+                command_event_handler(command_event)
+        
+    def _decode_edges(self, is_receiving_active):
+        """Decode edges taken out of edge buffer whenever available until receiving is stopped."""
         while is_receiving_active():
-            value_now = GPIO.input(RECEIVING_PIN)
-            time_now = datetime.now()
+            encodings = self._encodings
+            self._decode(self.__get_buffered_edges(is_receiving_active, encodings), encodings)
+            
+    def __get_buffered_edges(self, is_receiving_active, encodings):
+        """Yield edges taken out of the edge buffer and idle ticks while waiting for edges, until receiving is stopped, edges got lost or the encodings of the registered sockets changed."""
+        backend = get_backend()
+        dropped_edges = self.edge_buffer.dropped_edges
+        stats = get_stats()
+        labels = (('pin', self.pin),)
+        while is_receiving_active() and self._encodings is encodings:
+            if not self.edge_buffer.wait(0.05):
+                # stats were enabled or disabled, build the pipeline again
+                if get_stats() is not stats: return
+                yield backend.clock(), None
+                continue
+            if stats is not None:
+                stats.observe('edge_buffer_backlog', len(self.edge_buffer), labels)
+                if dropped_edges != self.edge_buffer.dropped_edges: stats.increment('edges_dropped', self.edge_buffer.dropped_edges - dropped_edges, labels)
+            # edges got lost, the signal sequence being received is incomplete
+            if dropped_edges != self.edge_buffer.dropped_edges: return
+            for edge in self.edge_buffer.get_edges():
+                # registered sockets changed, start over with the new set of encodings (with this edge)
+                if self._encodings is not encodings: return
+                yield edge
+                
+    def _feed_decode_worker(self, is_receiving_active, decode_worker):
+        """Hand the edges received to given decode worker process until receiving is stopped. The frame merger dispatches the frames decoded by the worker (see gtsocket.workers)."""
+        try:
+            while is_receiving_active():
+                encodings = self._encodings
+                keep_unknown_frames = tuple(encoding_name for encoding_name, _ in encodings if self._has_signal_handlers(encoding_name))
+                decode_worker.start_decoding(encodings, keep_unknown_frames)
+                if self.mode == 'interrupt':
+                    edges = self.__get_buffered_edges(is_receiving_active, encodings)
+                else:
+                    edges = self.__get_polled_edges(is_receiving_active, encodings)
+                self.__feed_edges(decode_worker, edges)
+        finally:
+            decode_worker.close()
             
+    def __feed_edges(self, decode_worker, edges):
+        """Hand given edges to given decode worker in batches (a batch ends with an idle tick, once the edge buffer is empty or with WORKER_BATCH_SIZE edges). Record (and count) them."""
+        stats = get_stats()
+        labels = (('pin', self.pin),)
+        batch = []
+        for edge_time, value in edges:
+            batch.append((edge_time, value))
+            if value is not None:
+                # the recorder may be replaced or closed by another thread at any time
+                edge_recorder = self.__edge_recorder
+                if edge_recorder is not None: edge_recorder.record(edge_time, value)
+                if stats is not None: stats.increment('edges', labels=labels)
+            # the edge being taken out of the edge buffer is still counted in its length
+            if value is None or len(batch) >= self.WORKER_BATCH_SIZE or (self.edge_buffer is not None and len(self.edge_buffer) <= 1):
+                decode_worker.decode(batch)
+                batch = []
+        if len(batch) > 0: decode_worker.decode(batch)
+        
+    def _poll_edges(self, is_receiving_active):
+        """Monitor receiving GPIO pin status and decode each change of pin value until receiving is stopped."""
+        while is_receiving_active():
+            encodings = self._encodings
+            self._decode(self.__get_polled_edges(is_receiving_active, encodings), encodings)
+            
+    def __get_polled_edges(self, is_receiving_active, encodings):
+        """Yield edges and (at most every POLLING_IDLE_TICK_INTERVAL nanosec) idle ticks, until receiving is stopped or the encodings of the registered sockets changed."""
+        backend = get_backend()
+        last_value = None
+        last_tick_time = backend.clock()
+        stats = get_stats()
+        while is_receiving_active() and self._encodings is encodings:
+            value_now = backend.input(self.pin)
+            now = backend.clock()
             if value_now != last_value:
-                if last_value is not None:
-                    time_delta = time_now - start_time
-                    signal = int(round(time_delta.microseconds + (time_delta.seconds * 1000000), -2))
-                    if signal == 0: continue
-                    if value_now != 0: signal *= -1;
-                    
-                    if current_encoding is not None:
-                        # init sequence was already found, now recording binary signals
-                        best_fitting_signal = current_encoding.get_best_fitting_signal(signal, 'binary')
-                        if best_fitting_signal is not None:
-                            current_sequence.append(best_fitting_signal)
-                        else:
-                            # found signal which is not a binary signal (maybe the next init signal?), binary data (sequence) ends here, process this sequence
-                            if len(current_sequence) > SEQUENCE_MIN_LENGTH:
-                                # signal sequence found, process it
-                                if len(self._signal_handlers) > 0:
-                                    for signal_handler in self._signal_handlers:
-                                        signal_handler(current_sequence, current_encoding)
-                                if len(self._command_handlers) > 0:
-                                    data_sequence = current_encoding.decode(current_sequence)
-                                    command = self.get_command_by_data_sequence(data_sequence)
-                                    if command is not None:
-                                        for command_handler in self._command_handlers:
-                                            command_handler(self, command)
-                            
-                            current_sequence = []
-                            current_encoding = None
-                    
-                    if current_encoding is None:
-                        # no encoding found yet, look for init sequences
-                        current_sequence.append(signal)
-                        for encoding in self.__encodings.values():
-                            init_sequence_found_pos = encoding.find_init_sequence(current_sequence)
-                            if init_sequence_found_pos is not None:
-                                current_encoding = encoding
-                                break
-                            
-                        if current_encoding is None:
-                            current_sequence = current_sequence[max_init_sequence_length*-1:]
-                        else:
-                            current_sequence = current_encoding.get_init_sequence()
-    
+                yield now, value_now
                 last_value = value_now
-                start_time = time_now
\ No newline at end of file
+                last_tick_time = now
+            elif now - last_tick_time >= self.POLLING_IDLE_TICK_INTERVAL:
+                # stats were enabled or disabled, build the pipeline again
+                if get_stats() is not stats: return
+                yield now, None
+                last_tick_time = now
+
+def _end_edges(edges, idle_time = 1000000000):
+    """Yield given edges followed by an idle tick given time (nanosec) after the last edge."""
+    edge_time = None
+    for edge_time, value in edges:
+        yield edge_time, value
+    if edge_time is not None:
+        yield edge_time + idle_time, None
+
+if sys.version_info < (3, 7):
+    # module attributes cannot be loaded on first access, load config right away
+    config = get_config()
+    for _name in _SETTINGS:
+        globals()[_name] = get_config_registry().get_setting(_name)
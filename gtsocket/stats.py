@@ -0,0 +1,201 @@
+"""Counters and histograms of receiving and sending commands, which can be exported for Prometheus (node exporter textfile collector)."""
+from __future__ import division # python 2 compatibility
+"""
+    Copyright (C) 2018  Markus Funke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+from bisect import bisect_left
+from threading import Thread, Event, Lock
+
+METRIC_PREFIX = 'gtsocket_'
+
+SECONDS_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+EDGE_BUFFER_BUCKETS = (1, 4, 16, 64, 256, 1024, 4096)
+
+METRICS = {
+    'edges': ('counter', 'Edges received.', None),
+    'edges_dropped': ('counter', 'Edges dropped since the edge buffer was full.', None),
+    'signals_rejected': ('counter', 'Signals which are no init or binary signal of the encoding.', None),
+    'init_sequences': ('counter', 'Init sequences found (frames started).', None),
+    'frames_decoded': ('counter', 'Complete frames decoded.', None),
+    'frames_unmatched': ('counter', 'Complete frames whose data sequence is no command.', None),
+    'frames_too_short': ('counter', 'Frames dismissed since they had not more than sequence_min_length signals.', None),
+    'frames_dismissed': ('counter', 'Frames dismissed early since their bits cannot be a command.', None),
+    'commands_sent': ('counter', 'Commands (or scenes) sent.', None),
+    'edge_buffer_backlog': ('histogram', 'Edges waiting in the edge buffer when the receiving thread woke up.', EDGE_BUFFER_BUCKETS),
+    'decode_latency_seconds': ('histogram', 'Time from the edge completing a frame (or deciding its command) to dispatching it.', SECONDS_BUCKETS),
+    'dispatch_seconds': ('histogram', 'Time spent dispatching a frame (calling the handlers).', SECONDS_BUCKETS),
+    'transmit_frame_error_seconds': ('histogram', 'Max timing error of the edges of each frame sent.', SECONDS_BUCKETS),
+    'transmit_wait_seconds': ('histogram', 'Time commands waited in the queue of the transmit scheduler.', SECONDS_BUCKETS),
+}
+"""Type, help text and buckets (of histograms) of all metrics by name (without prefix and suffix _total of counters)."""
+
+class Histogram():
+    """Counts of observed values in buckets (by upper bound), with sum and count of all values."""
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        """Number of values per bucket (not cumulative), the last one for values above all bounds."""
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get_cumulative_counts(self):
+        """Return list of tuples of upper bound (None for infinity) and number of values not above it."""
+        cumulative_counts = []
+        count = 0
+        for bucket, bucket_count in zip(self.buckets + (None,), self.counts):
+            count += bucket_count
+            cumulative_counts.append((bucket, count))
+        return cumulative_counts
+
+class Stats():
+    """Counters and histograms (see METRICS) of receivers and transmit schedulers, each with optional labels (tuple of tuples of label and value).
+
+    Receivers and transmit schedulers only count while stats are enabled
+    (see enable_stats()). Counting is left out of the receiving and sending
+    code completely while stats are disabled.
+    """
+    def __init__(self):
+        self._counters = {}
+        """Counter values by name and labels."""
+        self._histograms = {}
+        """Histograms by name and labels."""
+        self._lock = Lock()
+        self.__exporting_thread = None
+        self.__stop_event = None
+
+    def increment(self, name, value = 1, labels = ()):
+        """Increment counter with given name and labels by given value."""
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels = ()):
+        """Add given value to histogram with given name and labels."""
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(METRICS[name][2])
+            histogram.observe(value)
+
+    def get_counter(self, name, labels = ()):
+        """Return value of counter with given name and labels (sum over all labels if None)."""
+        with self._lock:
+            if labels is None: return sum(value for (counter_name, _), value in self._counters.items() if counter_name == name)
+            return self._counters.get((name, labels), 0)
+
+    def get_histogram(self, name, labels = ()):
+        """Return Histogram with given name and labels or None if no value was observed."""
+        return self._histograms.get((name, labels))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def get_snapshot(self):
+        """Return dict with lists of counters and histograms (each a dict with name, labels and values), e.g. to be written as JSON."""
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), 'buckets': list(histogram.buckets), 'counts': list(histogram.counts), 'sum': histogram.sum, 'count': histogram.count} for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0])]
+        return {'counters': counters, 'histograms': histograms}
+
+    def format_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted(METRICS):
+                metric_type, help_text, _ = METRICS[name]
+                if metric_type == 'counter':
+                    samples = [(labels, value) for (counter_name, labels), value in sorted(self._counters.items()) if counter_name == name]
+                    metric_name = METRIC_PREFIX + name + '_total'
+                else:
+                    samples = [(labels, histogram) for (histogram_name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]) if histogram_name == name]
+                    metric_name = METRIC_PREFIX + name
+                if len(samples) == 0: continue
+                lines.append('# HELP {} {}'.format(metric_name, help_text))
+                lines.append('# TYPE {} {}'.format(metric_name, metric_type))
+                for labels, sample in samples:
+                    if metric_type == 'counter':
+                        lines.append('{}{} {}'.format(metric_name, _format_labels(labels), sample))
+                        continue
+                    for bucket, count in sample.get_cumulative_counts():
+                        lines.append('{}_bucket{} {}'.format(metric_name, _format_labels(labels + (('le', '+Inf' if bucket is None else repr(bucket)),)), count))
+                    lines.append('{}_sum{} {}'.format(metric_name, _format_labels(labels), repr(sample.sum)))
+                    lines.append('{}_count{} {}'.format(metric_name, _format_labels(labels), sample.count))
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus_textfile(self, path):
+        """Write all metrics to given file (atomically, so the textfile collector never reads a partial file)."""
+        temporary_path = '{}.{}'.format(path, os.getpid())
+        with open(temporary_path, 'w') as textfile:
+            textfile.write(self.format_prometheus())
+        os.rename(temporary_path, path)
+
+    def start_export(self, path, interval = 15):
+        """Write all metrics to given file (see write_prometheus_textfile()) every interval sec in a thread until stop_export() is called."""
+        self.stop_export()
+        self.__stop_event = Event()
+        self.__exporting_thread = Thread(target=self.__export, args=(path, interval, self.__stop_event))
+        self.__exporting_thread.daemon = True
+        self.__exporting_thread.start()
+
+    def stop_export(self):
+        """Stop exporting and wait until the metrics were written a last time."""
+        if self.__exporting_thread is None: return
+        self.__stop_event.set()
+        self.__exporting_thread.join()
+        self.__exporting_thread = None
+
+    def __export(self, path, interval, stop_event):
+        while True:
+            stopped = stop_event.wait(interval)
+            try:
+                self.write_prometheus_textfile(path)
+            except (IOError, OSError):
+                # try again next time (e.g. directory not yet mounted)
+                pass
+            if stopped: return
+
+def _format_labels(labels):
+    if len(labels) == 0: return ''
+    return '{' + ','.join('{}="{}"'.format(label, str(value).replace('\\', '\\\\').replace('"', '\\"')) for label, value in labels) + '}'
+
+_stats = None
+
+def enable_stats():
+    """Start counting (if not yet) and return the Stats all receivers and transmit schedulers count in."""
+    global _stats
+    if _stats is None: _stats = Stats()
+    return _stats
+
+def disable_stats():
+    """Stop counting. Exporting of the stats counted so far is stopped."""
+    global _stats
+    stats = _stats
+    _stats = None
+    if stats is not None: stats.stop_export()
+
+def get_stats():
+    """Return the Stats all receivers and transmit schedulers count in or None if stats are disabled."""
+    return _stats
@@ -2,4 +2,4 @@ import unittest
 
 def test_suite():
     loader = unittest.TestLoader()
-    return loader.loadTestsFromNames(['gtsocket.tests.test_encoding', 'gtsocket.tests.test_socket'])
\ No newline at end of file
+    return loader.loadTestsFromNames(['gtsocket.tests.test_encoding', 'gtsocket.tests.test_socket', 'gtsocket.tests.test_receiver', 'gtsocket.tests.test_transmitter', 'gtsocket.tests.test_batch', 'gtsocket.tests.test_aio', 'gtsocket.tests.test_daemon', 'gtsocket.tests.test_config', 'gtsocket.tests.test_stats', 'gtsocket.tests.test_workers', 'gtsocket.tests.test_discovery', 'gtsocket.tests.test_benchmark'])
\ No newline at end of file
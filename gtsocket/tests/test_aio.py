@@ -0,0 +1,92 @@
+import unittest
+from threading import Thread
+from gtsocket import Socket, Receiver, TransmitReport, SocketError, SimulatedBackend, set_backend, initialize_GPIOs, clear_GPIOs, RECEIVING_PIN
+from gtsocket.benchmark import get_edges
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+@unittest.skipIf(asyncio is None or not hasattr(asyncio, 'get_running_loop'), 'asyncio of python 3.7 is not available')
+class TestAsyncio(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        set_backend(SimulatedBackend())
+        initialize_GPIOs()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.socket = Socket('A')
+
+    def test_switching(self):
+        transmit_reports = self.loop.run_until_complete(asyncio.gather(self.socket.async_switch_on(), Socket('B').async_switch_off()))
+        for transmit_report in transmit_reports:
+            self.assertIsInstance(transmit_report, TransmitReport)
+        self.assertTrue(self.socket.is_on())
+        # the status changes once the command was sent
+        future = self.socket.async_switch_off()
+        self.assertTrue(self.socket.is_on())
+        self.assertIsInstance(self.loop.run_until_complete(future), TransmitReport)
+        self.assertEqual(self.socket.status, 'off')
+
+    def test_receiving_commands_dropping_oldest_when_full(self):
+        receiver = Receiver(RECEIVING_PIN, 'interrupt', command_window=0)
+        receiver.add_socket(self.socket, start_receiving=False)
+        signal_sequences = self.socket.get_command_signal_sequences('off')
+        # a stream is bound to the running event loop unless a loop is given
+        self.assertRaises(RuntimeError, receiver.commands)
+        self.assertRaises(SocketError, receiver.commands, loop=self.loop, overflow='drop_newest')
+        commands = receiver.commands(max_queue_size=2, loop=self.loop, overflow='drop_oldest')
+
+        # the receiving thread does not wait for the event loop, the oldest events are dropped
+        receiver.process_edges(get_edges(signal_sequences))
+        self.assertEqual(commands.qsize(), 2)
+        self.assertEqual(commands.dropped_events, len(signal_sequences) - 2)
+        received_events = [self.loop.run_until_complete(commands.__anext__()) for _ in range(2)]
+        self.assertListEqual([(event.socket, event.command) for event in received_events], [(self.socket, 'off')] * 2)
+        self.assertEqual(commands.qsize(), 0)
+
+        # a consumer waiting for the next event is woken up by the receiving thread
+        next_event = commands.__anext__()
+        receiving_thread = Thread(target=receiver.process_edges, args=(get_edges(signal_sequences[:1]),))
+        receiving_thread.start()
+        event = self.loop.run_until_complete(asyncio.wait_for(next_event, 5))
+        receiving_thread.join()
+        self.assertEqual((event.socket, event.command), (self.socket, 'off'))
+
+        commands.close()
+        self.assertRaises(StopAsyncIteration, self.loop.run_until_complete, commands.__anext__())
+        self.assertListEqual(self.socket._command_event_handlers, [])
+
+    def test_receiving_commands_waiting_when_full(self):
+        receiver = Receiver(RECEIVING_PIN, 'interrupt', command_window=0)
+        receiver.add_socket(self.socket, start_receiving=False)
+        signal_sequences = self.socket.get_command_signal_sequences('off')
+        commands = receiver.commands(max_queue_size=2, loop=self.loop)
+
+        # the receiving thread waits until the event loop took events out, no event is dropped
+        receiving_thread = Thread(target=receiver.process_edges, args=(get_edges(signal_sequences),))
+        receiving_thread.start()
+        received_events = [self.loop.run_until_complete(asyncio.wait_for(commands.__anext__(), 5)) for _ in range(len(signal_sequences))]
+        receiving_thread.join(5)
+        self.assertFalse(receiving_thread.is_alive(), 'The receiving thread is still waiting.')
+        self.assertListEqual([(event.socket, event.command) for event in received_events], [(self.socket, 'off')] * len(signal_sequences))
+        self.assertEqual(commands.dropped_events, 0)
+
+        # closing the stream releases a receiving thread waiting for the event loop
+        receiving_thread = Thread(target=receiver.process_edges, args=(get_edges(signal_sequences),))
+        receiving_thread.start()
+        while commands.qsize() < 2 and receiving_thread.is_alive():
+            receiving_thread.join(0.01)
+        commands.close()
+        receiving_thread.join(5)
+        self.assertFalse(receiving_thread.is_alive(), 'The receiving thread is still waiting after closing the stream.')
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        clear_GPIOs()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import random
+import tempfile
+from gtsocket import Socket, Receiver, RECEIVING_PIN
+from gtsocket.benchmark import get_jittered_signals, get_edges
+
+try:
+    import numpy
+    from gtsocket.batch import BatchDecoder, get_signals, read_edge_recording
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestBatchDecoder(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.random = random.Random(3)
+        self.socket = Socket('A')
+        self.decoder = BatchDecoder(self.socket._get_encodings())
+
+    def get_signals(self, commands, jitter = 60, noise_probability = 0.0):
+        """Return list of signals of given commands of socket A with random jitter (microsec) and random noise signals."""
+        return get_jittered_signals([self.socket.get_command_waveform(command) for command in commands], self.random, jitter, noise_probability, pause=0, max_noise=600)
+
+    def receive(self, signals):
+        """Return list of tuples of signal sequence and encoding the receiver hands to signal handlers for given signals."""
+        received_sequences = []
+        self.socket.add_signal_handler(lambda sequence, encoding: received_sequences.append((sequence, encoding)))
+        receiver = Receiver(RECEIVING_PIN)
+        receiver.add_socket(self.socket, start_receiving=False)
+        receiver.process_edges(get_edges([signals]))
+        return received_sequences
+
+    def assert_same_as_receiver(self, signals):
+        frames = self.decoder.decode(signals)
+        self.assertListEqual([(frame.signal_sequence, frame.encoding) for frame in frames], self.receive(signals))
+        for frame in frames:
+            self.assertEqual(frame.data_sequence, frame.encoding.decode(frame.signal_sequence))
+        return frames
+
+    def test_decoding_commands(self):
+        frames = self.assert_same_as_receiver(self.get_signals(['on', 'off']))
+        self.assertGreater(len(frames), 0)
+        self.assertSetEqual(set(frame.encoding_name for frame in frames), set(self.socket._get_encodings().keys()))
+
+        for frame in frames:
+            self.assertEqual(frame.data_sequence[:len(self.socket._start_data)], self.socket._start_data)
+        # offsets point to the init sequences
+        signals = self.get_signals(['on'], jitter=0)
+        for frame in self.decoder.decode(signals):
+            self.assertListEqual(signals[frame.offset:frame.offset + len(frame.encoding.init_signal_sequence)], frame.encoding.init_signal_sequence)
+
+    def test_decoding_with_noise(self):
+        for _ in range(5):
+            self.assert_same_as_receiver(self.get_signals(['on', 'off', 'on'], jitter=80, noise_probability=0.02))
+
+    def test_getting_signals_from_edges(self):
+        edges = get_edges([[300, -700, 1200, -50]], start_time=1000)
+        # edges less than half a microsec apart are ignored
+        edges.insert(2, (edges[1][0] + 400, 0))
+        self.assertListEqual(get_signals(*zip(*edges)).tolist(), [300, -700, 1200, -50])
+
+    def test_reading_edge_recording(self):
+        edges = get_edges([[300, -700, 1200]], start_time=1000)
+        receiver = Receiver(RECEIVING_PIN)
+        recording_file, recording_path = tempfile.mkstemp()
+        os.close(recording_file)
+        try:
+            receiver.start_recording(recording_path)
+            receiver.process_edges(edges)
+            receiver.stop_recording()
+            edge_times, values = read_edge_recording(recording_path)
+            self.assertListEqual(edge_times.tolist(), [edge_time - 1000 for edge_time, _ in edges])
+            self.assertListEqual(get_signals(edge_times, values).tolist(), [300, -700, 1200])
+            del edge_times, values
+        finally:
+            os.remove(recording_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+import json
+from gtsocket import gtsocket as gtsocket_module
+from gtsocket.benchmark import run_benchmarks, BENCHMARKS
+
+class TestBenchmarks(unittest.TestCase):
+    def test_running_benchmarks(self):
+        config_registry = gtsocket_module._config_registry
+        results = json.loads(json.dumps(run_benchmarks(scale=0.01, repeat=1)))
+        self.assertIs(gtsocket_module._config_registry, config_registry)
+        self.assertListEqual(sorted(results['results']), sorted(name for name, _ in BENCHMARKS))
+        self.assertListEqual(sorted(results['results']['encoding']), ['1', '2'])
+        self.assertEqual([result['buffer_signals'] for result in results['results']['init_search']['1']], [1, 10, 100, 1000])
+        receiving = results['results']['receiving']
+        self.assertGreater(receiving['command_events'], 0)
+        self.assertLessEqual(receiving['command_events'], receiving['frames'] * 2)
+        self.assertGreaterEqual(results['results']['transmitting']['max_error_ns'], 0)
+
+        self.assertListEqual(list(run_benchmarks(['encoding'], scale=0.01, repeat=1)['results']), ['encoding'])
+        self.assertRaises(ValueError, run_benchmarks, ['sending'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import os
+import shutil
+import tempfile
+from gtsocket import CONFIG_FILE, ConfigRegistry, load_config, load_config_registry, get_config_registry
+
+class TestConfigRegistry(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.directory = tempfile.mkdtemp()
+        self.user_config_file = os.path.join(self.directory, 'config.ini')
+        self.cache_file = os.path.join(self.directory, 'config.cache')
+        self.config_files = [CONFIG_FILE, self.user_config_file]
+
+    def write_user_config(self, content):
+        with open(self.user_config_file, 'w') as user_config:
+            user_config.write(content)
+
+    def test_compiling_config(self):
+        config = load_config([CONFIG_FILE])
+        config_registry = ConfigRegistry(config)
+        self.assertListEqual(list(config_registry.get_socket_names()), [section.split(':', 1)[1] for section in config.sections() if section.startswith('socket:')])
+        self.assertEqual(config_registry.get_setting('RECEIVING_PIN'), int(config.get('general', 'receiving_GPIO_pin')))
+        self.assertEqual(config_registry.get_setting('EDGE_BUFFER_SIZE'), 4096)
+
+        socket_definition = config_registry.get_socket('A')
+        self.assertListEqual(list(socket_definition.command_data['on']), config.get('socket:A', 'on_command_data').split(','))
+        group_definition = config_registry.get_group(socket_definition.group)
+        for encoding_name in group_definition.encodings:
+            encoding_definition = config_registry.get_encoding(encoding_name)
+            self.assertTupleEqual(encoding_definition.init_signal_sequence, tuple(int(signal) for signal in config.get('encoding:' + encoding_name, 'init').split(',')))
+        self.assertIsNone(config_registry.get_socket('X'))
+
+    def test_caching_compiled_config(self):
+        self.write_user_config('[general]\nsequence_repetitions = 3\n')
+        config_registry = load_config_registry(self.config_files, self.cache_file)
+        self.assertEqual(config_registry.get_setting('SEQUENCE_REPETITIONS'), 3)
+        self.assertTrue(os.path.exists(self.cache_file))
+        cached_config_registry = load_config_registry(self.config_files, self.cache_file)
+        self.assertListEqual(list(cached_config_registry.get_socket_names()), list(config_registry.get_socket_names()))
+        self.assertEqual(cached_config_registry.get_setting('SEQUENCE_REPETITIONS'), 3)
+
+        # changing a config file invalidates the cache
+        self.write_user_config('[general]\nsequence_repetitions = 12\n')
+        os.utime(self.user_config_file, (0, 0))
+        self.assertEqual(load_config_registry(self.config_files, self.cache_file).get_setting('SEQUENCE_REPETITIONS'), 12)
+        # a broken cache is compiled again
+        with open(self.cache_file, 'wb') as cache:
+            cache.write(b'broken')
+        self.assertEqual(load_config_registry(self.config_files, self.cache_file).get_setting('SEQUENCE_REPETITIONS'), 12)
+
+    def test_getting_settings_as_attributes(self):
+        import gtsocket
+        self.assertEqual(gtsocket.SEQUENCE_MIN_LENGTH, get_config_registry().get_setting('SEQUENCE_MIN_LENGTH'))
+        self.assertTrue(gtsocket.config.has_section('general'))
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.directory)
+
+if __name__ == '__main__':
+    unittest.main()
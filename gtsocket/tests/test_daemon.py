@@ -0,0 +1,123 @@
+import unittest
+import os
+import json
+import socket
+import shutil
+import tempfile
+from threading import Thread
+from gtsocket import gtsocket as gtsocket_module
+from gtsocket import CommandEvent, Socket, SimulatedBackend, SocketError, set_backend, SENDING_PIN
+from gtsocket.daemon import Daemon
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        # receivers and transmit schedulers of earlier tests are dropped with their backend
+        set_backend(SimulatedBackend())
+        self.assertDictEqual(gtsocket_module._transmit_schedulers, {})
+        self.assertDictEqual(gtsocket_module._receivers, {})
+        self.directory = tempfile.mkdtemp()
+        self.daemon = Daemon(os.path.join(self.directory, 'gtsocketd.sock'), ['A', 'B'])
+        self.daemon.start()
+        self.serving_thread = Thread(target=self.daemon.serve_forever)
+        self.serving_thread.start()
+        self.connections = []
+
+    def connect(self):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(5)
+        connection.connect(self.daemon.path)
+        self.connections.append(connection)
+        return connection, connection.makefile('rb')
+
+    def request(self, connection, responses, request_data):
+        connection.sendall((json.dumps(request_data) + '\n').encode('utf-8'))
+        return json.loads(responses.readline().decode('utf-8'))
+
+    def test_sending_commands(self):
+        connection, responses = self.connect()
+        status = self.request(connection, responses, {'action': 'status'})
+        self.assertTrue(status['ok'])
+        self.assertListEqual(status['sockets'], ['A', 'B'])
+        self.assertListEqual([(pin_status['pin'], pin_status['sockets'], pin_status['queue_depth']) for pin_status in status['sending_pins']], [(SENDING_PIN, ['A', 'B'], 0)])
+        self.assertGreaterEqual(status['sending_pins'][0]['wait_time'], 0)
+
+        response = self.request(connection, responses, {'action': 'send', 'socket': 'A', 'command': 'on'})
+        self.assertTrue(response['ok'])
+        self.assertEqual(response['report']['signal_count'], len(self.daemon.sockets['A'].get_command_waveform('on')))
+        self.assertDictEqual(self.request(connection, responses, {'action': 'send', 'socket': 'B', 'command': 'off', 'wait': False}), {'ok': True})
+
+        self.assertFalse(self.request(connection, responses, {'action': 'send', 'socket': 'X', 'command': 'on'})['ok'])
+        self.assertFalse(self.request(connection, responses, {'action': 'jump'})['ok'])
+        connection.sendall(b'no json\n')
+        self.assertFalse(json.loads(responses.readline().decode('utf-8'))['ok'])
+        # values which are neither strings nor lists of strings are rejected
+        for request_data in [{'action': 'send', 'socket': {'name': 'A'}, 'command': 'on'}, {'action': 'send', 'socket': ['A'], 'command': 'on'}, {'action': 'send', 'socket': 'A', 'command': 1}, {'action': 'subscribe', 'sockets': [['B']]}]:
+            response = self.request(connection, responses, request_data)
+            self.assertFalse(response['ok'])
+            self.assertIn('error', response)
+        self.assertTrue(self.request(connection, responses, {'action': 'status'})['ok'])
+
+    def test_subscribing_to_received_commands(self):
+        subscription, events = self.connect()
+        self.assertDictEqual(self.request(subscription, events, {'action': 'subscribe', 'sockets': ['B']}), {'ok': True})
+
+        # the simulated air carries the command sent by the daemon to its own receiver
+        connection, responses = self.connect()
+        self.assertTrue(self.request(connection, responses, {'action': 'send', 'socket': 'A', 'command': 'off'})['ok'])
+        self.assertTrue(self.request(connection, responses, {'action': 'send', 'socket': 'B', 'command': 'on'})['ok'])
+        event = json.loads(events.readline().decode('utf-8'))
+        self.assertEqual((event['event'], event['socket'], event['command']), ('command', 'B', 'on'))
+        self.assertEqual(event['frame_count'], 1)
+        self.assertFalse(event['complete'])
+
+    def test_closing_with_subscriber_not_reading(self):
+        subscription, events = self.connect()
+        self.assertDictEqual(self.request(subscription, events, {'action': 'subscribe'}), {'ok': True})
+        # the client does not read, so writing the events blocks and the queue of the subscriber fills up
+        command_event = CommandEvent(Socket('A'), 'on', 0)
+        for _ in range(20000):
+            self.daemon.publish(command_event, False)
+        closing_thread = Thread(target=self.daemon.close)
+        closing_thread.start()
+        closing_thread.join(5)
+        self.assertFalse(closing_thread.is_alive())
+        # publishing after closing does not block either
+        self.daemon.publish(command_event, False)
+
+    def test_starting_with_socket_path(self):
+        # the directory of the Unix domain socket is created
+        daemon = Daemon(os.path.join(self.directory, 'run', 'gtsocketd.sock'), ['A'], receive=False)
+        daemon.start()
+        daemon.close()
+        # a daemon listening on the path or another file at the path is not removed
+        self.assertRaises(SocketError, Daemon(self.daemon.path, ['A'], receive=False).start)
+        self.assertTrue(os.path.exists(self.daemon.path))
+        other_path = os.path.join(self.directory, 'other')
+        with open(other_path, 'w'):
+            pass
+        self.assertRaises(SocketError, Daemon(other_path, ['A'], receive=False).start)
+        self.assertTrue(os.path.exists(other_path))
+        # a stale socket left behind is replaced
+        stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale_socket.bind(daemon.path)
+        stale_socket.close()
+        daemon = Daemon(daemon.path, ['A'], receive=False)
+        daemon.start()
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(daemon.path)
+        connection.close()
+        daemon.close()
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        for connection in self.connections:
+            connection.close()
+        self.daemon.shutdown()
+        self.serving_thread.join()
+        self.daemon.close()
+        self.assertFalse(os.path.exists(self.daemon.path))
+        shutil.rmtree(self.directory)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import random
+from gtsocket import Socket, Encoding, MAX_SIGNAL_DIFFERENCE
+from gtsocket.benchmark import get_jittered_signals
+
+try:
+    import numpy
+    from gtsocket.batch import BatchDecoder
+    from gtsocket.discovery import cluster_signals, discover
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.random = random.Random(5)
+        self.socket = Socket('A')
+
+    def assert_same_signals(self, signal_sequence, expected_signal_sequence):
+        for signal, expected_signal in zip(signal_sequence, expected_signal_sequence):
+            self.assertLessEqual(abs(signal - expected_signal), abs(expected_signal) * MAX_SIGNAL_DIFFERENCE / 100 / 2)
+
+    def test_clustering_signals(self):
+        signals = get_jittered_signals([self.socket.get_command_waveform('on')] * 2, self.random)
+        clusters = cluster_signals(signals)
+        self.assertListEqual(clusters.signals, sorted(clusters.signals))
+        self.assertEqual(sum(clusters.counts), numpy.count_nonzero(clusters.labels >= 0))
+        # each signal of the encodings is in a cluster (signals closer than twice max signal difference are in the same one)
+        for encoding in self.socket._get_encodings().values():
+            for signal in encoding.get_allowed_signals('init') + encoding.get_allowed_signals('binary'):
+                self.assertTrue(any(abs(signal - cluster_signal) <= abs(signal) * 2 * MAX_SIGNAL_DIFFERENCE / 100 for cluster_signal in clusters.signals))
+        self.assertEqual(len(cluster_signals([]).signals), 0)
+
+    def test_discovering_encodings_and_data(self):
+        signals = get_jittered_signals([self.socket.get_command_waveform('on')] * 3, self.random)
+        discovery = discover(signals)
+        encodings = list(self.socket._get_encodings().values())
+        self.assertEqual(len(discovery.encodings), len(encodings))
+        for discovered_encoding, encoding in zip(discovery.encodings, encodings):
+            self.assert_same_signals(discovered_encoding.init_signal_sequence, encoding.init_signal_sequence)
+            self.assert_same_signals(discovered_encoding.binary_0_signal_sequence, encoding.binary_0_signal_sequence)
+            self.assert_same_signals(discovered_encoding.binary_1_signal_sequence, encoding.binary_1_signal_sequence)
+        # the batch decoder finds the same data sequences with the encodings discovered
+        decoder = BatchDecoder([(str(index), discovered_encoding.get_encoding()) for index, discovered_encoding in enumerate(discovery.encodings)])
+        data_sequences = [data_sequence for data_sequence, _ in discovery.get_data_sequences()]
+        self.assertSetEqual(set(frame.data_sequence for frame in decoder.decode(signals) if len(frame.data_sequence) == len(data_sequences[0])), set(data_sequences))
+
+        config = dict((section, dict(options)) for section, options in discovery.get_config('1', 'A', 'on', list(self.socket._get_encodings().keys())))
+        self.assertEqual(config['group:1']['encodings'], ','.join(self.socket._get_encodings().keys()))
+        self.assertEqual(config['group:1']['start_data'], self.socket._start_data)
+        self.assertEqual(config['socket:A']['end_data'], self.socket._end_data)
+        self.assertListEqual(config['socket:A']['on_command_data'].split(','), self.socket._command_data['on'])
+        self.assertEqual(len(discover(signals[:50]).encodings), 0)
+
+    def test_binary_values_consistent_between_encodings(self):
+        # binary 1 of the second encoding has the shorter ON signal
+        encodings = [Encoding([300, -2400], [300, -1200], [1000, -500]), Encoding([2900, -7200], [900, -600], [400, -1100])]
+        data_sequences = ['1110' + ''.join(self.random.choice('01') for _ in range(16)) + '0101' for _ in range(4)]
+        signals = get_jittered_signals([encoding.encode(data_sequence) * 4 for data_sequence in data_sequences for encoding in encodings], self.random, noise_probability=0)
+        discovery = discover(signals)
+        self.assertListEqual(discovery.encodings[1].binary_1_signal_sequence, [400, -1100])
+        self.assertListEqual([data_sequence for data_sequence, _ in discovery.get_data_sequences()], data_sequences)
+
+if __name__ == '__main__':
+    unittest.main()
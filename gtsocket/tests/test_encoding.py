@@ -1,5 +1,6 @@
 import unittest
-from gtsocket import Encoding, MAX_SIGNAL_DIFFERENCE
+from gtsocket import Encoding, InitSequenceMatcher, MAX_SIGNAL_DIFFERENCE
+from gtsocket.gtsocket import _find_best_fitting_signal
 
 class TestEncoding(unittest.TestCase):
     def setUp(self):
@@ -45,6 +46,42 @@ class TestEncoding(unittest.TestCase):
         self.assertEqual(self.encoding.get_best_fitting_signal(lower_end), min(self.test_encoding_signals))
         self.assertEqual(self.encoding.get_best_fitting_signal(upper_end), max(self.test_encoding_signals))
         
+    def test_best_fitting_signal_matching_search_over_allowed_signals(self):
+        for encoding in [self.encoding, Encoding([300, -2400], [300, -1200], [1000, -500]), Encoding([2900, -7200], [400, -1100], [900, -600])]:
+            for mode in ['init', 'binary', 'all']:
+                allowed_signals = encoding.get_allowed_signals(mode)
+                for signal in list(range(-9000, 9000)) + [-2400.5, 299.9, 360.0, 1100.25]:
+                    self.assertEqual(encoding.get_best_fitting_signal(signal, mode), _find_best_fitting_signal(signal, allowed_signals, MAX_SIGNAL_DIFFERENCE), 'Wrong best fitting signal for {} in mode {}.'.format(signal, mode))
+        
+    def test_finding_init_sequence(self):
+        self.assertEqual(self.encoding.find_init_sequence(self.init_sequence + self.test_data_signals), 0)
+        self.assertEqual(self.encoding.find_init_sequence([-400, -400, 1400] + self.test_data_signals), 1)
+        self.assertIsNone(self.encoding.find_init_sequence(self.test_data_signals))
+        
+class TestInitSequenceMatcher(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        
+        self.encodings = [('1', Encoding([300, -2400], [300, -1200], [1000, -500])), ('2', Encoding([2900, -7200], [400, -1100], [900, -600])), ('3', Encoding([300, -2400, 300, -2400, 900], [300, -1200], [1000, -500]))]
+        self.matcher = InitSequenceMatcher(self.encodings)
+        
+    def get_matches(self, signals):
+        return [(position, match[0]) for position, match in enumerate(self.matcher.add_signal(signal) for signal in signals) if match is not None]
+        
+    def test_finding_init_sequences(self):
+        signals = [1000, -500, 290, -2450, 300, -1200, 2900, 2900, -7300, 900, -600]
+        self.assertListEqual(self.get_matches(signals), [(3, '1'), (8, '2')])
+        
+    def test_finding_overlapping_init_sequences(self):
+        # the init sequence of encoding 1 is found first, but the matcher keeps track of the init sequence of encoding 3
+        signals = [300, -2400, 300, -2400, 300, -2400, 900]
+        self.assertListEqual(self.get_matches(signals), [(1, '1'), (3, '1'), (5, '1'), (6, '3')])
+        
+    def test_resetting(self):
+        self.matcher.add_signal(300)
+        self.matcher.reset()
+        self.assertListEqual(self.get_matches([-2400, 300, -2400]), [(2, '1')])
+        
 if __name__ == '__main__':
     unittest.main()
         
\ No newline at end of file
@@ -0,0 +1,342 @@
+import unittest
+import os
+import tempfile
+import time
+from threading import Event
+from gtsocket import Socket, Receiver, RPiGPIOBackend, EdgeBuffer, EdgeRecorder, EdgeRecording, IdleSignal, SocketError, SimulatedBackend, set_backend, initialize_GPIOs, clear_GPIOs, get_signals, classify_signals, get_frames, decode_frames, decode_edges, get_command_trie, RECEIVING_PIN, SEQUENCE_REPETITIONS
+from gtsocket.benchmark import get_edges
+
+class TestEdgeBuffer(unittest.TestCase):
+    def test_putting_and_getting_edges(self):
+        edge_buffer = EdgeBuffer(4)
+        self.assertFalse(edge_buffer.wait(0))
+        for edge_time in range(3):
+            self.assertTrue(edge_buffer.put(edge_time, edge_time % 2))
+        self.assertTrue(edge_buffer.wait(0))
+        self.assertListEqual(list(edge_buffer.get_edges()), [(0, 0), (1, 1), (2, 0)])
+        self.assertEqual(len(edge_buffer), 0)
+        
+    def test_dropping_edges(self):
+        edge_buffer = EdgeBuffer(4)
+        for edge_time in range(6):
+            edge_buffer.put(edge_time, 0)
+        self.assertEqual(edge_buffer.dropped_edges, 2)
+        self.assertListEqual([edge_time for edge_time, _ in edge_buffer.get_edges()], [0, 1, 2, 3])
+        self.assertTrue(edge_buffer.put(6, 0))
+
+class FakeGPIO():
+    """Stand-in for the RPi.GPIO module with one input pin whose value is set by the test."""
+    BOTH = 'both'
+    
+    def __init__(self, value):
+        self.value = value
+        self.callback = None
+        
+    def input(self, pin):
+        return self.value
+    
+    def add_event_detect(self, pin, edge, callback):
+        self.callback = callback
+
+class TestRPiGPIOBackend(unittest.TestCase):
+    def test_deriving_values_after_edges(self):
+        backend = RPiGPIOBackend.__new__(RPiGPIOBackend)
+        backend.GPIO = gpio = FakeGPIO(0)
+        backend.resync_time = 10 ** 12
+        edges = []
+        backend.add_edge_detection(RECEIVING_PIN, lambda edge_time, value: edges.append(value))
+        # the pin is read at the first edge only, then values toggle even if the pin changed again before the callback ran
+        gpio.value = 1
+        for _ in range(3):
+            gpio.callback(RECEIVING_PIN)
+        self.assertListEqual(edges, [1, 0, 1])
+        # after the pin was quiet for longer than resync_time the value is read again (toggling would give 0), so a missed edge does not invert the following values
+        backend.resync_time = -1
+        gpio.callback(RECEIVING_PIN)
+        self.assertListEqual(edges, [1, 0, 1, 1])
+        
+class TestReceiver(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.backend = SimulatedBackend(jitter=20000, seed=1)
+        set_backend(self.backend)
+        initialize_GPIOs()
+        
+        self.socket = Socket('A')
+        self.encodings = self.socket._get_encodings()
+        self.receiver = Receiver(RECEIVING_PIN, 'interrupt', command_window=0)
+        
+    def wait_until_edges_decoded(self, timeout = 5):
+        """Wait until the receiving thread took all edges out of the edge buffer and decoded them (it then waits for further edges with idle ticks)."""
+        end_time = time.time() + timeout
+        while len(self.receiver.edge_buffer) > 0 and time.time() < end_time:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        
+    def get_command_signal_sequences(self, socket, command):
+        return [encoding.encode(socket._start_data + socket._command_data[command][0] + socket._end_data) for encoding in socket._get_encodings().values()]
+        
+    def test_receiving_command_from_edges(self):
+        received_commands = []
+        command_received = Event()
+        signal_sequences = self.get_command_signal_sequences(self.socket, 'off')
+        def command_handler(socket, command):
+            received_commands.append((socket.get_name(), command))
+            if len(received_commands) == len(signal_sequences): command_received.set()
+        self.socket.add_command_handler(command_handler)
+        
+        self.receiver.add_socket(self.socket)
+        # the command is known from the bits of the last signal sequence without waiting for its end
+        for edge_time, value in get_edges(signal_sequences):
+            self.receiver.edge_buffer.put(edge_time, value)
+        self.assertTrue(command_received.wait(5), 'No command was received.')
+        self.receiver.remove_socket(self.socket)
+        self.receiver.receiving_thread.join()
+        
+        self.assertListEqual(received_commands, [('A', 'off')] * len(signal_sequences))
+        
+    def test_receiving_signal_sequences_for_all_sockets(self):
+        signal_sequences = self.get_command_signal_sequences(self.socket, 'on')
+        received_sequences = []
+        sequences_received = Event()
+        def signal_handler(sequence, encoding):
+            received_sequences.append(sequence)
+            if len(received_sequences) == len(signal_sequences) * 2: sequences_received.set()
+        
+        other_socket = Socket('C')
+        for socket in [self.socket, other_socket]:
+            socket.add_signal_handler(signal_handler)
+            self.receiver.add_socket(socket)
+        for edge_time, value in get_edges(signal_sequences + signal_sequences[:1]):
+            self.receiver.edge_buffer.put(edge_time, value)
+        self.assertTrue(sequences_received.wait(5), 'Not all signal sequences were received.')
+        
+        self.receiver.remove_socket(self.socket)
+        self.assertTrue(self.receiver.is_receiving_active(), 'Receiver stopped although a socket is still registered.')
+        self.receiver.remove_socket(other_socket)
+        self.assertFalse(self.receiver.is_receiving_active())
+        self.receiver.receiving_thread.join()
+        
+        # both sockets use the same encodings, so each sequence is handed to the signal handlers of both sockets
+        self.assertListEqual(received_sequences, [sequence for sequence in signal_sequences for _ in range(2)])
+        
+    def test_receiving_command_sent_through_simulated_air(self):
+        received_commands = []
+        all_commands_received = Event()
+        # the OFF signal at the end of the last signal sequence cannot be told apart from the silence after it, but the command is known before
+        expected_commands = len(self.socket._command_data['on']) * len(self.encodings) * SEQUENCE_REPETITIONS
+        def command_handler(socket, command):
+            received_commands.append((socket.get_name(), command))
+            if len(received_commands) == expected_commands: all_commands_received.set()
+        self.socket.add_command_handler(command_handler)
+        self.receiver.add_socket(self.socket)
+        
+        Socket('A').send_command('on')
+        self.assertTrue(all_commands_received.wait(5), 'Only {} of {} commands were received.'.format(len(received_commands), expected_commands))
+        self.receiver.remove_socket(self.socket)
+        self.receiver.receiving_thread.join()
+        self.assertListEqual(received_commands, [('A', 'on')] * expected_commands)
+        
+    def test_receiving_with_noise(self):
+        set_backend(SimulatedBackend(jitter=20000, noise_probability=0.01, seed=2))
+        initialize_GPIOs()
+        received_commands = []
+        self.socket.add_command_handler(lambda socket, command: received_commands.append(command))
+        self.receiver.add_socket(self.socket)
+        
+        self.socket.send_command('off')
+        # the edges (with noise of the seeded backend) are the same in each run, wait until the receiving thread decoded all of them
+        self.wait_until_edges_decoded()
+        self.receiver.remove_socket(self.socket)
+        self.receiver.receiving_thread.join()
+        # some signal sequences are destroyed by noise, but those which are received are received correctly
+        self.assertGreater(len(received_commands), 0)
+        self.assertListEqual(received_commands, ['off'] * len(received_commands))
+        
+    def test_recording_and_replaying_edges(self):
+        received_commands = []
+        self.socket.add_command_handler(lambda socket, command: received_commands.append(command))
+        self.receiver.add_socket(self.socket, start_receiving=False)
+        self.assertFalse(self.receiver.is_receiving_active())
+        
+        edges = get_edges(self.get_command_signal_sequences(self.socket, 'on'), start_time=123456789)
+        recording_file, recording_path = tempfile.mkstemp()
+        os.close(recording_file)
+        try:
+            self.receiver.start_recording(recording_path)
+            self.receiver.process_edges(edges)
+            self.receiver.stop_recording()
+            commands_while_recording = list(received_commands)
+            del received_commands[:]
+            
+            recording = EdgeRecording(recording_path)
+            self.assertEqual(recording.pin, RECEIVING_PIN)
+            self.assertEqual(len(recording), len(edges))
+            self.assertListEqual(list(recording), [(edge_time - edges[0][0], value) for edge_time, value in edges])
+            self.receiver.process_edges(recording)
+            recording.close()
+        finally:
+            os.remove(recording_path)
+        
+        self.assertListEqual(commands_while_recording, ['on'] * len(self.encodings))
+        self.assertListEqual(received_commands, commands_while_recording)
+        
+    def test_stopping_recording_while_receiving(self):
+        received_commands = []
+        self.socket.add_command_handler(lambda socket, command: received_commands.append(command))
+        self.receiver.add_socket(self.socket)
+        
+        edges = get_edges(self.get_command_signal_sequences(self.socket, 'on') * 20)
+        recording_file, recording_path = tempfile.mkstemp()
+        os.close(recording_file)
+        try:
+            # the recording is stopped and restarted while the receiving thread records edges
+            self.receiver.start_recording(recording_path)
+            for index, (edge_time, value) in enumerate(edges):
+                self.receiver.edge_buffer.put(edge_time, value)
+                if index % 50 == 0: self.receiver.start_recording(recording_path)
+            self.receiver.stop_recording()
+            self.wait_until_edges_decoded()
+            self.assertTrue(self.receiver.receiving_thread.is_alive(), 'The receiving thread died while the recording was stopped.')
+            self.receiver.remove_socket(self.socket)
+            self.receiver.receiving_thread.join()
+            
+            recording = EdgeRecording(recording_path)
+            recording.close()
+        finally:
+            os.remove(recording_path)
+        self.assertGreater(len(received_commands), 0)
+        
+    def test_recording_after_closing(self):
+        recording_file, recording_path = tempfile.mkstemp()
+        os.close(recording_file)
+        try:
+            edge_recorder = EdgeRecorder(recording_path)
+            edge_recorder.record(1000, 1)
+            edge_recorder.close()
+            edge_recorder.record(2000, 0)
+            self.assertEqual(edge_recorder.edge_count, 1)
+        finally:
+            os.remove(recording_path)
+        
+    def test_rejecting_invalid_recordings(self):
+        recording_file, recording_path = tempfile.mkstemp()
+        os.close(recording_file)
+        try:
+            # empty file
+            self.assertRaises(SocketError, EdgeRecording, recording_path)
+            with open(recording_path, 'wb') as recording_file:
+                recording_file.write(b'GTS')
+            self.assertRaises(SocketError, EdgeRecording, recording_path)
+            with open(recording_path, 'wb') as recording_file:
+                recording_file.write(b'\0' * 100)
+            self.assertRaises(SocketError, EdgeRecording, recording_path)
+        finally:
+            os.remove(recording_path)
+        
+    def test_merging_frames_into_command_events(self):
+        receiver = Receiver(RECEIVING_PIN, 'interrupt', command_window=2000)
+        received_commands = []
+        started_events = []
+        completed_events = []
+        self.socket.add_command_handler(lambda socket, command: received_commands.append(command))
+        self.socket.add_command_event_handler(lambda event: started_events.append((event, event.frame_count)))
+        self.socket.add_command_event_handler(completed_events.append, when_complete=True)
+        receiver.add_socket(self.socket, start_receiving=False)
+        
+        # two button presses on the remote, 3 sec apart
+        signal_sequences = self.socket.get_command_signal_sequences('on')
+        edges = get_edges(signal_sequences)
+        edges += get_edges(signal_sequences, start_time=edges[-1][0] + 3000000000)
+        receiver.process_edges(edges)
+        
+        self.assertListEqual(received_commands, ['on', 'on'])
+        # handlers are called with the first frame, the event is updated with further frames
+        self.assertListEqual([frame_count for _, frame_count in started_events], [1, 1])
+        self.assertListEqual([event for event, _ in started_events], completed_events)
+        for event in completed_events:
+            self.assertTrue(event.complete)
+            self.assertEqual((event.socket, event.command), (self.socket, 'on'))
+            self.assertEqual(event.frame_count, len(signal_sequences))
+            self.assertSetEqual(event.encodings, set(self.encodings.keys()))
+        self.assertGreater(completed_events[1].time - completed_events[0].time, 3000000000)
+        
+    def test_deciding_command_before_end_of_frame(self):
+        received_commands = []
+        self.socket.add_command_handler(lambda socket, command: received_commands.append(command))
+        self.receiver.add_socket(self.socket, start_receiving=False)
+        
+        signal_sequences = self.get_command_signal_sequences(self.socket, 'on')
+        # the last bit is missing, but all frames starting like this are command 'on' for socket A
+        self.receiver.process_edges(get_edges([signal_sequences[0][:-2]]))
+        self.assertListEqual(received_commands, ['on'])
+        
+        # frame whose first bit is wrong (it is no command) followed by a command without any silence in between
+        wrong_signal_sequence = list(signal_sequences[1])
+        init_length = len(self.encodings['2'].init_signal_sequence)
+        wrong_bit = '0' if self.socket._start_data[0] == '1' else '1'
+        wrong_signal_sequence[init_length:init_length + 2] = self.encodings['2'].encode(wrong_bit, False)
+        self.receiver.process_edges(get_edges([wrong_signal_sequence, signal_sequences[0]]))
+        self.assertListEqual(received_commands, ['on', 'on'])
+        
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        for socket in self.receiver.get_sockets():
+            self.receiver.remove_socket(socket)
+        clear_GPIOs()
+        
+class TestDecodingPipeline(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.socket = Socket('A')
+        self.encodings = list(self.socket._get_encodings().items())
+        self.signal_sequences = [encoding.encode(self.socket._start_data + self.socket._command_data['on'][0] + self.socket._end_data) for _, encoding in self.encodings]
+        
+    def test_getting_signals(self):
+        edges = get_edges([[300, -700, 1200]], start_time=1000)
+        # idle ticks yield the signal since the last edge so far, edges less than half a microsec apart are ignored
+        edges[2:2] = [(edges[1][0] + 400, 1), (edges[1][0] + 500000, None)]
+        signals = list(get_signals([(0, None)] + edges))
+        self.assertListEqual([signal for signal in signals if signal.__class__ is not IdleSignal], [300, -700, 1200])
+        self.assertListEqual([signal.signal for signal in signals if signal.__class__ is IdleSignal], [-500])
+        
+    def test_classifying_signals(self):
+        symbols = list(classify_signals([305, -2390, 2000, IdleSignal(5)], self.encodings))
+        self.assertTupleEqual(symbols[0], (305, (300, None), (300, None)))
+        self.assertTupleEqual(symbols[1], (-2390, (-2400, None), (None, None)))
+        self.assertTupleEqual(symbols[2], (2000, (None, None), (None, None)))
+        self.assertIsInstance(symbols[3], IdleSignal)
+        
+    def test_decoding_frames(self):
+        # frames are ended by the next init sequence and by an idle signal
+        signals = self.signal_sequences[0] + self.signal_sequences[1] + [IdleSignal(-100000)]
+        frames = list(decode_frames(get_frames(classify_signals(signals, self.encodings), self.encodings)))
+        self.assertListEqual([(frame.encoding_name, frame.signal_sequence, frame.complete) for frame in frames], [(encoding_name, signal_sequence, True) for (encoding_name, _), signal_sequence in zip(self.encodings, self.signal_sequences)])
+        for frame in frames:
+            self.assertEqual(frame.data_sequence, self.socket._start_data + self.socket._command_data['on'][0] + self.socket._end_data)
+            self.assertTupleEqual(frame.commands, (('A', 'on'),))
+        # a frame still being received at the end is dismissed
+        self.assertListEqual(list(get_frames(classify_signals(self.signal_sequences[0], self.encodings), self.encodings)), [])
+        
+    def test_deciding_commands_early(self):
+        frames = list(decode_frames(get_frames(classify_signals(self.signal_sequences[0] + [-100000], self.encodings), self.encodings, get_command_trie())))
+        self.assertEqual(len(frames), 2)
+        self.assertFalse(frames[0].complete)
+        self.assertTupleEqual(frames[0].commands, (('A', 'on'),))
+        self.assertLess(len(frames[0].signal_sequence), len(self.signal_sequences[0]))
+        self.assertTrue(frames[1].complete and frames[1].decided)
+        self.assertIsNone(frames[1].commands)
+        
+    def test_idle_tick_within_next_init_sequence(self):
+        # when polling, an idle tick might end a frame while the first signal of the next init sequence is still being received
+        edges = get_edges(self.signal_sequences[1:] * 2)
+        init_length = len(self.encodings[1][1].init_signal_sequence)
+        next_init_edge = len(self.signal_sequences[1])
+        edges.insert(next_init_edge + 1, (edges[next_init_edge][0] + abs(self.signal_sequences[1][0]) * 900, None))
+        edges.append((edges[-1][0] + 100000000, None))
+        frames = list(decode_edges(edges, self.encodings))
+        self.assertEqual(len(frames), 2)
+        self.assertListEqual([frame.signal_sequence[:init_length] for frame in frames], [self.encodings[1][1].init_signal_sequence] * 2)
+        
+if __name__ == '__main__':
+    unittest.main()
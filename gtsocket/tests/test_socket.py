@@ -1,11 +1,12 @@
 import unittest
 from threading import Thread
-from gtsocket import Socket, initialize_GPIOs, clear_GPIOs, SEQUENCE_REPETITIONS
+from gtsocket import Socket, SimulatedBackend, set_backend, initialize_GPIOs, clear_GPIOs, get_receiver, get_command_index, get_command_trie, decode_frames, Frame, SEQUENCE_REPETITIONS
 
 class TestSocket(unittest.TestCase):
     def setUp(self):
         unittest.TestCase.setUp(self)
         
+        set_backend(SimulatedBackend())
         initialize_GPIOs()
         
         self.test_socket_name = 'A'
@@ -46,6 +47,41 @@ class TestSocket(unittest.TestCase):
                 if encoding_valid: found_valid_encoding = True
             self.assertTrue(found_valid_encoding, 'One of the signal sequences of {}-{} contains invalid signals.'.format(self.test_socket_name, self.test_socket_command))
                 
+    def test_getting_command_by_data_sequence(self):
+        # socket C uses the same data sequences as socket A, but with other end data
+        other_socket = Socket('C')
+        data_sequence = self.socket._command_data['on'][1]
+        self.assertEqual(self.socket.get_command_by_data_sequence(self.socket._start_data + data_sequence + self.socket._end_data), 'on')
+        self.assertIsNone(self.socket.get_command_by_data_sequence(other_socket._start_data + data_sequence + other_socket._end_data))
+        self.assertEqual(other_socket.get_command_by_data_sequence(other_socket._start_data + data_sequence + other_socket._end_data), 'off')
+        self.assertIsNone(self.socket.get_command_by_data_sequence(data_sequence))
+        
+        self.assertTupleEqual(get_command_index().get_commands(self.socket._start_data + data_sequence + self.socket._end_data), (('A', 'on'),))
+        
+    def test_looking_up_commands_in_command_trie(self):
+        command_trie = get_command_trie()
+        # all commands start with the same start data
+        self.assertIsNone(command_trie.root.decided_commands)
+        self.assertListEqual(list(command_trie.root.children.keys()), [self.socket._start_data[0]])
+        
+        for data_sequence in self.socket._command_data['on']:
+            node = command_trie.root
+            decided_commands = []
+            for bit in self.socket._start_data + data_sequence + self.socket._end_data:
+                node = node.children[bit]
+                decided_commands.append(node.decided_commands)
+            self.assertTupleEqual(node.commands, (('A', 'on'),))
+            # socket C uses the same data sequences, so the command is known once the end data differs
+            self.assertIsNone(decided_commands[len(self.socket._start_data) + len(data_sequence) - 1])
+            self.assertListEqual(decided_commands[-1:], [(('A', 'on'),)])
+            self.assertDictEqual(node.children, {})
+            
+    def test_getting_waveform_for_command(self):
+        waveform = self.socket.get_command_waveform(self.test_socket_command)
+        self.assertListEqual(list(waveform), [signal for signal_sequence in self.socket.get_command_signal_sequences(self.test_socket_command) for signal in signal_sequence])
+        self.assertIs(Socket(self.test_socket_name).get_command_waveform(self.test_socket_command), waveform, 'Waveform was not cached.')
+        self.assertIsNot(self.socket.get_command_waveform('off'), waveform)
+        
     def dummy_signal_handler(self, sequence, encoding):
         pass
                 
@@ -57,6 +93,28 @@ class TestSocket(unittest.TestCase):
         self.socket.stop_receiving()
         self.assertFalse(self.socket.is_receiving_active())
         
+    def test_sharing_receiver(self):
+        received_commands = []
+        other_socket = Socket('B')
+        for socket in [self.socket, other_socket]:
+            socket.add_command_handler(lambda socket, command: received_commands.append((socket.get_name(), command)))
+            
+        receiving_thread = self.socket.start_receiving()
+        self.assertIs(other_socket.start_receiving(), receiving_thread)
+        
+        receiver = get_receiver()
+        encoding_name, encoding = list(self.encodings.items())[0]
+        signal_sequence = encoding.encode(self.socket._start_data + self.socket._command_data[self.test_socket_command][0] + self.socket._end_data)
+        for frame in decode_frames([Frame(encoding_name, encoding, signal_sequence)]):
+            receiver._dispatch_frame(frame)
+        self.assertListEqual(received_commands, [(self.test_socket_name, self.test_socket_command)])
+        
+        self.socket.stop_receiving()
+        self.assertTrue(receiver.is_receiving_active(), 'Receiver stopped although a socket is still receiving.')
+        other_socket.stop_receiving()
+        self.assertFalse(receiver.is_receiving_active())
+        receiving_thread.join()
+        
     def tearDown(self):
         unittest.TestCase.tearDown(self)
         self.socket.stop_receiving()
@@ -0,0 +1,90 @@
+import unittest
+import os
+import shutil
+import tempfile
+from gtsocket import Socket, Receiver, Stats, SimulatedBackend, set_backend, initialize_GPIOs, clear_GPIOs, enable_stats, disable_stats, get_stats, get_transmit_scheduler, RECEIVING_PIN
+from gtsocket.benchmark import get_edges
+
+class TestStats(unittest.TestCase):
+    def test_counting(self):
+        stats = Stats()
+        stats.increment('edges', labels=(('pin', 27),))
+        stats.increment('edges', 2, (('pin', 27),))
+        stats.increment('edges', labels=(('pin', 17),))
+        self.assertEqual(stats.get_counter('edges', (('pin', 27),)), 3)
+        self.assertEqual(stats.get_counter('edges', None), 4)
+        self.assertEqual(stats.get_counter('frames_decoded'), 0)
+
+        for value in [0.00002, 0.002, 0.003, 5]:
+            stats.observe('dispatch_seconds', value)
+        histogram = stats.get_histogram('dispatch_seconds')
+        self.assertEqual(histogram.count, 4)
+        self.assertListEqual(histogram.get_cumulative_counts()[-3:], [(0.5, 3), (1, 3), (None, 4)])
+
+    def test_formatting_for_prometheus(self):
+        stats = Stats()
+        stats.increment('frames_decoded', 5, (('pin', 27),))
+        stats.observe('edge_buffer_backlog', 3)
+        lines = stats.format_prometheus().splitlines()
+        self.assertIn('# TYPE gtsocket_frames_decoded_total counter', lines)
+        self.assertIn('gtsocket_frames_decoded_total{pin="27"} 5', lines)
+        self.assertIn('# TYPE gtsocket_edge_buffer_backlog histogram', lines)
+        self.assertIn('gtsocket_edge_buffer_backlog_bucket{le="1"} 0', lines)
+        self.assertIn('gtsocket_edge_buffer_backlog_bucket{le="4"} 1', lines)
+        self.assertIn('gtsocket_edge_buffer_backlog_bucket{le="+Inf"} 1', lines)
+        self.assertIn('gtsocket_edge_buffer_backlog_count 1', lines)
+        self.assertFalse(any(line.startswith('gtsocket_edges_total') for line in lines))
+
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'gtsocket.prom')
+            stats.start_export(path, 60)
+            stats.stop_export()
+            with open(path) as textfile:
+                self.assertEqual(textfile.read(), stats.format_prometheus())
+            self.assertListEqual(os.listdir(directory), ['gtsocket.prom'])
+        finally:
+            shutil.rmtree(directory)
+
+class TestCountingReceivedAndSentCommands(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        set_backend(SimulatedBackend())
+        initialize_GPIOs()
+        self.socket = Socket('A')
+        self.receiver = Receiver(RECEIVING_PIN, 'interrupt', command_window=0)
+        self.receiver.add_socket(self.socket, start_receiving=False)
+
+    def test_counting_only_while_enabled(self):
+        signal_sequences = self.socket.get_command_signal_sequences('on')
+        edges = get_edges(signal_sequences)
+        self.receiver.process_edges(edges)
+        self.assertIsNone(get_stats())
+
+        stats = enable_stats()
+        self.assertIs(enable_stats(), stats)
+        encoding_name, encoding = list(self.socket._get_encodings().items())[0]
+        # the bits of the last frame are no command
+        self.receiver.process_edges(get_edges(signal_sequences + [encoding.encode('1' * 32)]))
+        labels = (('pin', RECEIVING_PIN),)
+        self.assertEqual(stats.get_counter('edges', labels), len(edges) + 2 * 32 + len(encoding.init_signal_sequence))
+        self.assertEqual(stats.get_counter('init_sequences', None), len(signal_sequences) + 1)
+        self.assertEqual(stats.get_counter('frames_dismissed', (('encoding', encoding_name),)), 1)
+        self.assertEqual(stats.get_histogram('dispatch_seconds', labels).count, len(signal_sequences) + stats.get_counter('frames_decoded', labels))
+        self.assertIsNone(stats.get_histogram('decode_latency_seconds', labels))
+
+        get_transmit_scheduler().submit(self.socket, 'off').result()
+        self.assertEqual(stats.get_counter('commands_sent', None), 1)
+        self.assertEqual(stats.get_histogram('transmit_frame_error_seconds', (('pin', get_transmit_scheduler().pin),)).count, len(self.socket.get_command_frame_lengths('off')))
+
+        disable_stats()
+        self.receiver.process_edges(edges)
+        self.assertEqual(stats.get_counter('init_sequences', None), len(signal_sequences) + 1)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        disable_stats()
+        clear_GPIOs()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+from threading import Event
+from gtsocket import Transmitter, TransmitScheduler, TransmitReport, TransmissionPlan, Socket, Receiver, SocketError, SimulatedBackend, set_backend, initialize_GPIOs, clear_GPIOs, get_transmit_scheduler, switch_scene, RECEIVING_PIN, SEQUENCE_REPETITIONS
+from gtsocket.benchmark import get_edges
+
+class FakeClock():
+    """Clock which advances a bit with each reading and oversleeps by a fixed time (like time.sleep on a busy system)."""
+    def __init__(self, read_time = 500, oversleep_time = 150000):
+        self.now = 10 ** 9
+        self.read_time = read_time
+        self.oversleep_time = oversleep_time
+        
+    def clock(self):
+        self.now += self.read_time
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += int(seconds * 1000000000) + self.oversleep_time
+
+class TestTransmitter(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        
+        self.fake_clock = FakeClock()
+        self.written_values = []
+        self.transmitter = Transmitter(lambda value: self.written_values.append((self.fake_clock.now, value)), self.fake_clock.clock, self.fake_clock.sleep)
+        self.signals = [300, -2400, 1000, -500, 300, -1200] * 100
+        
+    def test_transmitting_signals(self):
+        report = self.transmitter.transmit(self.signals)
+        self.assertListEqual([value for _, value in self.written_values], [0] + [1 if signal > 0 else 0 for signal in self.signals] + [0])
+        self.assertEqual(report.signal_count, len(self.signals))
+        
+    def test_timing_does_not_drift(self):
+        report = self.transmitter.transmit(self.signals, [6] * 100)
+        self.assertLess(report.max_error, 5000, 'Edges were sent too late: {}'.format(report))
+        self.assertEqual(len(report.frame_errors), 100)
+        
+        start_time = self.written_values[1][0]
+        end_time = self.written_values[-1][0]
+        self.assertAlmostEqual(end_time - start_time, sum(abs(signal) for signal in self.signals) * 1000, delta=5000)
+        
+    def test_reporting_errors(self):
+        # without spinning the transmitter has to rely on sleeping only, which oversleeps
+        transmitter = Transmitter(lambda value: None, self.fake_clock.clock, self.fake_clock.sleep, spin_time=0)
+        report = transmitter.transmit(self.signals, [6] * 100)
+        self.assertGreaterEqual(report.max_error, self.fake_clock.oversleep_time)
+        self.assertLess(report.max_error, self.fake_clock.oversleep_time + 5000, 'Timing errors added up.')
+        self.assertEqual(max(frame_max_error for frame_max_error, _ in report.frame_errors), report.max_error)
+        
+class GatedTransmitScheduler(TransmitScheduler):
+    """Transmit scheduler which does not send signals but records them, and waits with each command until the gate is opened."""
+    def __init__(self, pin):
+        TransmitScheduler.__init__(self, pin)
+        self.gate = Event()
+        self.sending = Event()
+        self.sent_signals = []
+        
+    def _transmit(self, signals, frame_lengths):
+        self.sending.set()
+        self.gate.wait(5)
+        self.sent_signals.append(signals)
+        return TransmitReport(len(signals), 0, 0, [], 0)
+
+class TestTransmitScheduler(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        set_backend(SimulatedBackend())
+        initialize_GPIOs()
+        self.scheduler = GatedTransmitScheduler(6)
+        
+    def test_replacing_waiting_commands(self):
+        socket_a, socket_b = Socket('A'), Socket('B')
+        first_future = self.scheduler.submit(socket_a, 'on')
+        sending_thread = self.scheduler.sending_thread
+        self.assertTrue(self.scheduler.sending.wait(5))
+        # while the first command is sent, further commands for socket A replace each other
+        futures = [self.scheduler.submit(socket_a, 'off'), self.scheduler.submit(socket_b, 'on'), self.scheduler.submit(socket_a, 'on')]
+        self.assertEqual(self.scheduler.get_queue_depth(), 2)
+        # the queued commands and the rest of the command being sent
+        command_duration = sum(abs(signal) for signal in socket_a.get_command_waveform('on')) * 1000
+        queued_duration = command_duration + sum(abs(signal) for signal in socket_b.get_command_waveform('on')) * 1000
+        self.assertGreaterEqual(self.scheduler.get_wait_time(), queued_duration)
+        self.assertLessEqual(self.scheduler.get_wait_time(), queued_duration + command_duration)
+        self.assertFalse(first_future.done())
+        
+        self.scheduler.gate.set()
+        self.assertIsInstance(first_future.result(5), TransmitReport)
+        self.assertIs(futures[0].result(5), futures[2].result(5))
+        self.assertIsNot(futures[1].result(5), futures[0].result(5))
+        # nothing is being sent any longer once the futures of the last command are done
+        self.assertEqual(self.scheduler.get_wait_time(), 0)
+        sending_thread.join()
+        self.assertIsNone(self.scheduler.sending_thread)
+        self.assertListEqual(self.scheduler.sent_signals, [socket_a.get_command_waveform('on'), socket_a.get_command_waveform('on'), socket_b.get_command_waveform('on')])
+        self.assertEqual(self.scheduler.get_queue_depth(), 0)
+        
+    def test_sending_without_waiting(self):
+        socket = Socket('A')
+        future = socket.send_command('off', wait=False)
+        self.assertIsInstance(future.result(5), TransmitReport)
+        self.assertIs(get_transmit_scheduler().pin, 6)
+        # schedulers are not shared between backends (with different clocks)
+        transmit_scheduler = get_transmit_scheduler()
+        self.assertIs(get_transmit_scheduler(), transmit_scheduler)
+        set_backend(SimulatedBackend())
+        self.assertIsNot(get_transmit_scheduler(), transmit_scheduler)
+        
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        self.scheduler.gate.set()
+        clear_GPIOs()
+        
+class TestTransmissionPlan(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        set_backend(SimulatedBackend())
+        initialize_GPIOs()
+        
+    def receive(self, transmission_plan):
+        """Return list of tuples of socket name and command received (one per command event) when the signals of given plan are sent."""
+        received_commands = []
+        receiver = Receiver(RECEIVING_PIN, 'interrupt', command_window=60000)
+        for socket_name in ['A', 'B', 'C', 'D', 'all']:
+            socket = Socket(socket_name)
+            socket.add_command_event_handler(lambda command_event: received_commands.append((command_event.socket.get_name(), command_event.command)))
+            receiver.add_socket(socket, start_receiving=False)
+        receiver.process_edges(get_edges([transmission_plan.signals]))
+        return received_commands
+        
+    def test_using_broadcast_socket(self):
+        command_duration = sum(abs(signal) for signal in Socket('A').get_command_waveform('off')) * 1000
+        transmission_plan = TransmissionPlan({'A': 'off', 'B': 'off', 'C': 'off', 'D': 'off'})
+        self.assertListEqual(transmission_plan.commands, [('all', 'off')])
+        self.assertEqual(transmission_plan.duration, command_duration)
+        self.assertListEqual(self.receive(transmission_plan), [('all', 'off')])
+        
+        # exceptions are sent after the broadcast
+        transmission_plan = TransmissionPlan({'A': 'on', 'B': 'off', 'C': 'on', 'D': 'on'})
+        self.assertListEqual(transmission_plan.commands, [('all', 'on'), ('B', 'off')])
+        self.assertListEqual(self.receive(transmission_plan), [('all', 'on'), ('B', 'off')])
+        
+        # the broadcast would switch sockets without target
+        self.assertListEqual(TransmissionPlan({'A': 'off', 'B': 'off'}).commands, [('A', 'off'), ('B', 'off')])
+        self.assertListEqual(TransmissionPlan({'A': 'off', 'B': 'off', 'C': 'off', 'D': 'off'}, use_broadcast=False).commands, [('A', 'off'), ('B', 'off'), ('C', 'off'), ('D', 'off')])
+        self.assertRaises(SocketError, TransmissionPlan, {'X': 'on'})
+        
+    def test_interleaving_frames(self):
+        socket_a, socket_b = Socket('A'), Socket('B')
+        transmission_plan = TransmissionPlan({'A': 'on', 'B': 'off'}, repetitions=2, data_sequence_count=1)
+        a_frames = socket_a.get_command_signal_sequences('on', 2, 1)
+        b_frames = socket_b.get_command_signal_sequences('off', 2, 1)
+        self.assertEqual(len(a_frames), 2 * len(socket_a._get_encodings()))
+        expected_signals = []
+        for index in range(0, len(a_frames), 2):
+            for frame in a_frames[index:index + 2] + b_frames[index:index + 2]:
+                expected_signals.extend(frame)
+        self.assertListEqual(transmission_plan.signals.tolist(), expected_signals)
+        self.assertEqual(len(transmission_plan.frame_lengths), len(a_frames) + len(b_frames))
+        self.assertListEqual(self.receive(transmission_plan), [('A', 'on'), ('B', 'off')])
+        # same number of frames as a single command by default
+        self.assertEqual(len(TransmissionPlan({'A': 'on'}).frame_lengths), len(socket_a.get_command_frame_lengths('on')))
+        
+    def test_switching_scene(self):
+        transmit_report = switch_scene({'A': 'off', 'B': 'off', 'C': 'off', 'D': 'off'}, repetitions=SEQUENCE_REPETITIONS)
+        self.assertIsInstance(transmit_report, TransmitReport)
+        self.assertEqual(transmit_report.signal_count, len(Socket('all').get_command_waveform('off')))
+        
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        clear_GPIOs()
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import os
+import shutil
+import tempfile
+from gtsocket import gtsocket as gtsocket_module
+from gtsocket import CommandEvent, Socket, Receiver, TransmissionPlan, TransmitReport, SocketError, SimulatedBackend, set_backend, get_backend, initialize_GPIOs, clear_GPIOs, load_config_registry, get_transceiver, get_transceiver_names, switch_scene, CONFIG_FILE, DEFAULT_TRANSCEIVER_NAME
+
+try:
+    from gtsocket.workers import CommandEventStream
+except ImportError:
+    CommandEventStream = None
+
+TRANSCEIVER_CONFIG = """
+[transceiver:upstairs]
+receiving_GPIO_pin = 17
+sending_GPIO_pin = 18
+
+[group:2]
+encodings=1,2
+start_data=0001
+transceiver=upstairs
+
+[socket:E]
+group=2
+on_command_data=socket:A|on_command_data
+off_command_data=socket:A|off_command_data
+end_data=1100
+"""
+
+class TestTransceivers(unittest.TestCase):
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.directory = tempfile.mkdtemp()
+        user_config_file = os.path.join(self.directory, 'config.ini')
+        with open(user_config_file, 'w') as user_config:
+            user_config.write(TRANSCEIVER_CONFIG)
+        gtsocket_module._config_registry = load_config_registry([CONFIG_FILE, user_config_file])
+        gtsocket_module._command_index = gtsocket_module._command_trie = None
+        set_backend(SimulatedBackend())
+        initialize_GPIOs()
+
+    def test_binding_groups_to_transceivers(self):
+        self.assertTupleEqual(get_transceiver_names(), (DEFAULT_TRANSCEIVER_NAME, 'upstairs'))
+        self.assertTupleEqual(tuple(get_transceiver('upstairs')), (17, 18))
+        self.assertEqual(Socket('A').get_transceiver_name(), DEFAULT_TRANSCEIVER_NAME)
+        self.assertEqual(Socket('E').get_transceiver_name(), 'upstairs')
+        self.assertRaises(SocketError, get_transceiver, 'cellar')
+        self.assertTrue(set([5, 17]) <= get_backend()._input_pins)
+        self.assertTrue(set([6, 18]) <= set(get_backend()._output_values))
+
+    def test_switching_scene_on_several_sending_pins(self):
+        self.assertRaises(SocketError, TransmissionPlan, {'A': 'on', 'E': 'off'})
+        transmit_reports = switch_scene({'A': 'on', 'B': 'on', 'E': 'off'})
+        self.assertEqual(len(transmit_reports), 2)
+        for transmit_report in transmit_reports:
+            self.assertIsInstance(transmit_report, TransmitReport)
+        self.assertEqual(transmit_reports[1].signal_count, len(Socket('E').get_command_waveform('off')))
+
+    @unittest.skipIf(CommandEventStream is None, 'decode workers require python 3')
+    def test_merging_events_of_decode_workers(self):
+        sockets = [Socket('A'), Socket('E')]
+        receivers = [Receiver(get_transceiver(socket.get_transceiver_name()).receiving_pin, 'interrupt', 65536, 0, True) for socket in sockets]
+        stream = CommandEventStream(sockets, start_receiving=False)
+        for receiver, socket in zip(receivers, sockets):
+            receiver.add_socket(socket)
+        try:
+            # the simulated air carries the commands sent on both sending pins to both receiving pins
+            sockets[0].send_command('off')
+            sockets[1].send_command('on')
+            frame_count = len(sockets[1].get_command_frame_lengths('on'))
+            command_events = []
+            while len([command_event for command_event in command_events if command_event.socket is sockets[1]]) < frame_count:
+                command_events.append(stream.get(10))
+        finally:
+            stream.close()
+            for receiver, socket in zip(receivers, sockets):
+                receiver.remove_socket(socket)
+                receiver.receiving_thread.join()
+
+        self.assertListEqual([(command_event.socket.get_name(), command_event.command) for command_event in command_events], [('A', 'off')] * frame_count + [('E', 'on')] * frame_count)
+        self.assertListEqual([command_event.time for command_event in command_events], sorted(command_event.time for command_event in command_events))
+        self.assertIsNone(stream.get(1))
+
+    @unittest.skipIf(CommandEventStream is None, 'decode workers require python 3')
+    def test_dropping_oldest_events_of_full_stream(self):
+        socket = Socket('A')
+        self.assertRaises(SocketError, CommandEventStream, [socket], start_receiving=False, overflow='drop_newest')
+        stream = CommandEventStream([socket], max_queue_size=2, start_receiving=False, overflow='drop_oldest')
+        for event_time in range(3):
+            stream._put(CommandEvent(socket, 'on', event_time))
+        stream.close()
+        self.assertEqual(stream.dropped_events, 1)
+        self.assertListEqual([command_event.time for command_event in stream], [1, 2])
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        clear_GPIOs()
+        gtsocket_module._config_registry = gtsocket_module._command_index = gtsocket_module._command_trie = None
+        shutil.rmtree(self.directory)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,319 @@
+"""Decode the edges of each receiving pin in a worker process and dispatch the frames of all pins in one thread, in the order they were received in. Requires python 3."""
+"""
+    Copyright (C) 2018  Markus Funke
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import time
+import heapq
+import multiprocessing
+from itertools import count
+from threading import Thread, Lock
+from multiprocessing import Pipe
+from multiprocessing.connection import wait
+from queue import Queue, Empty, Full
+
+from . import gtsocket as _gtsocket
+from .gtsocket import Encoding, Frame, CommandIndex, CommandTrie, Socket, SocketError, get_config_registry, get_stats, get_signals, classify_signals, get_frames, decode_frames, _setting, _SETTINGS, COMMAND_STREAM_OVERFLOWS
+
+def _get_process_context():
+    """Return the multiprocessing context decode workers are started with.
+
+    The receiving process runs the GPIO callbacks, receiving and sending
+    threads, so forking it could copy locks held by them into the worker.
+    Workers are forked from a fork server instead (started without these
+    threads, with gtsocket imported once), or spawned where there is none.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['gtsocket.workers'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+class DecodeWorker():
+    """Process decoding the edges of one receiving pin with the decoding pipeline (see gtsocket.decode_edges()).
+
+    Python threads cannot run python code at the same time, so receivers of
+    several pins decoding in threads compete for one CPU core. With a worker
+    process per pin, decoding runs on as many cores as there are pins, while
+    the receiving thread only takes edges out of the edge buffer.
+
+    The worker gets the config and the settings of this process. Frames and
+    the time up to which the edges were decoded are sent back to be read by
+    the FrameMerger (see get_frame_merger()). The worker process is not a
+    fork of this process (see _get_process_context()).
+    """
+    def __init__(self, pin):
+        self.pin = pin
+        edges_reader, self._edges_writer = Pipe(False)
+        self._frames_reader, frames_writer = Pipe(False)
+        settings = dict((name, _setting(name)) for name in _SETTINGS)
+        self.process = _get_process_context().Process(target=_run_decode_worker, args=(edges_reader, frames_writer, get_config_registry(), settings), name='gtsocket-decode-worker-{}'.format(pin))
+        self.process.daemon = True
+        self.process.start()
+        # the connections are used by the worker only
+        edges_reader.close()
+        frames_writer.close()
+
+    def start_decoding(self, encodings, keep_unknown_frames = ()):
+        """Start over decoding with given encodings (tuples of encoding name and encoding), dismiss the frame being received. Frames of the encodings with the names in keep_unknown_frames are not dismissed if they are no command (see FrameAssembler)."""
+        encoding_definitions = [(encoding_name, encoding.init_signal_sequence, encoding.binary_0_signal_sequence, encoding.binary_1_signal_sequence) for encoding_name, encoding in encodings]
+        self._edges_writer.send(('decode', encoding_definitions, tuple(keep_unknown_frames)))
+
+    def decode(self, edges):
+        """Hand given edges (list of tuples of time (nanosec) and pin value, None for idle ticks) to the worker."""
+        self._edges_writer.send(('edges', edges))
+
+    def close(self):
+        """Stop the worker once it decoded all edges handed to it."""
+        try:
+            self._edges_writer.send(('close',))
+        except (IOError, OSError):
+            # worker already ended
+            pass
+        self._edges_writer.close()
+        self.process.join()
+
+class _WorkerEdges():
+    """Edges received by the worker process, which reports the frames decoded after each batch of edges."""
+    def __init__(self, edges_reader, frames_writer):
+        self.edges_reader = edges_reader
+        self.frames_writer = frames_writer
+        self.frames = []
+        """Tuples of the data of the frames decoded from the current batch of edges."""
+        self.edge_time = None
+        """Time of the edge (or idle tick) being decoded."""
+        self.last_edge_time = None
+        """Time of the last edge decoded before the one being decoded (the end of a frame decoded now)."""
+        self.message = None
+        """Message which ended the edges."""
+
+    def __iter__(self):
+        while True:
+            if self.edge_time is not None:
+                self.frames_writer.send((self.frames, self.edge_time))
+                self.frames = []
+            message = self.edges_reader.recv()
+            if message[0] != 'edges':
+                self.message = message
+                return
+            for edge_time, value in message[1]:
+                self.edge_time = edge_time
+                yield edge_time, value
+                if value is not None: self.last_edge_time = edge_time
+
+def _run_decode_worker(edges_reader, frames_writer, config_registry, settings):
+    """Decode edges read from edges_reader and write the frames decoded (with the time up to which edges were decoded) to frames_writer until the worker is closed (runs in the worker process)."""
+    for name, value in settings.items():
+        setattr(_gtsocket, name, value)
+    command_index = CommandIndex(config_registry)
+    command_trie = CommandTrie(command_index)
+    try:
+        message = edges_reader.recv()
+        while message[0] == 'decode':
+            _, encoding_definitions, keep_unknown_frames = message
+            encodings = [(encoding_name, Encoding(list(init_signal_sequence), list(binary_0_signal_sequence), list(binary_1_signal_sequence))) for encoding_name, init_signal_sequence, binary_0_signal_sequence, binary_1_signal_sequence in encoding_definitions]
+            edges = _WorkerEdges(edges_reader, frames_writer)
+            for frame in decode_frames(get_frames(classify_signals(get_signals(edges), encodings), encodings, command_trie, keep_unknown_frames.__contains__), command_index):
+                edges.frames.append((edges.edge_time, edges.last_edge_time, frame.encoding_name, frame.signal_sequence, frame.complete, frame.decided, frame.commands, frame.data_sequence))
+            # frames decoded once the edges ended (the pipeline starts over or the worker is closed)
+            if len(edges.frames) > 0: frames_writer.send((edges.frames, edges.edge_time))
+            message = edges.message
+    except EOFError:
+        # receiver ended without closing the worker
+        pass
+    frames_writer.close()
+
+class FrameMerger():
+    """Dispatches the frames decoded by the decode workers of all receivers in one thread, in the order they were received in.
+
+    Each worker reports the time up to which it decoded the edges of its
+    pin. A frame is dispatched once all workers decoded the edges up to the
+    time the frame was completed (or its commands were decided), so frames
+    of all pins are dispatched in the order of these times and all handlers
+    are called in this one thread. Receivers hand idle ticks to their workers
+    while no edges come, so a pin without signals does not hold back others.
+    A receiver adds its worker before it receives any edge, so frames are
+    never dispatched before all workers which could still send earlier ones
+    reported their progress.
+
+    Use get_frame_merger() instead of creating objects of this class
+    directly, so that all receivers share the same merger.
+    """
+    def __init__(self):
+        self.dispatching_thread = None
+        """The thread dispatching frames (None if there are no decode workers)."""
+        self.__lock = Lock()
+        self.__workers = {}
+        """Lists of receiver and time up to which edges were decoded (None if not yet known) by the frames reader of its decode worker."""
+        self.__frames = []
+        """Heap of tuples of time, sequence number, receiver and frame waiting to be dispatched."""
+        self.__sequence_numbers = count()
+        self.__wakeup_reader, self.__wakeup_writer = Pipe(False)
+
+    def add_receiver(self, receiver, decode_worker):
+        """Dispatch the frames decoded by given decode worker of given receiver until the worker ended."""
+        with self.__lock:
+            self.__workers[decode_worker._frames_reader] = [receiver, None]
+            if self.dispatching_thread is None:
+                self.dispatching_thread = Thread(target=self.__dispatch_frames)
+                self.dispatching_thread.daemon = True
+                self.dispatching_thread.start()
+            else:
+                # wait for the frames of the new worker as well
+                self.__wakeup_writer.send(None)
+
+    def __dispatch_frames(self):
+        """Read frames of all decode workers and dispatch them in order until no worker is left."""
+        while True:
+            with self.__lock:
+                frames_readers = list(self.__workers)
+                if len(frames_readers) == 0:
+                    self.dispatching_thread = None
+                    return
+            for frames_reader in wait(frames_readers + [self.__wakeup_reader]):
+                if frames_reader is self.__wakeup_reader:
+                    frames_reader.recv()
+                    continue
+                receiver = self.__workers[frames_reader][0]
+                try:
+                    frames, decoded_time = frames_reader.recv()
+                except EOFError:
+                    # worker ended, do not wait for it any longer
+                    frames_reader.close()
+                    with self.__lock:
+                        del self.__workers[frames_reader]
+                    continue
+                self.__workers[frames_reader][1] = decoded_time
+                encodings = dict(receiver._encodings)
+                for edge_time, frame_time, encoding_name, signal_sequence, complete, decided, commands, data_sequence in frames:
+                    frame = Frame(encoding_name, encodings.get(encoding_name), signal_sequence, complete, decided, commands)
+                    frame.data_sequence = data_sequence
+                    frame.time = frame_time if frame_time is not None else edge_time
+                    heapq.heappush(self.__frames, (edge_time, next(self.__sequence_numbers), receiver, frame))
+            self.__dispatch_decoded_frames()
+
+    def __dispatch_frames_until(self, decoded_time):
+        stats = get_stats()
+        while len(self.__frames) > 0 and (decoded_time is None or self.__frames[0][0] <= decoded_time):
+            edge_time, _, receiver, frame = heapq.heappop(self.__frames)
+            if stats is not None:
+                receiver._dispatch_counted_frame(frame, stats, edge_time)
+            else:
+                receiver._dispatch_frame(frame)
+
+    def __dispatch_decoded_frames(self):
+        """Dispatch all frames up to the time all workers decoded the edges up to and complete the command events whose command window has passed at this time."""
+        with self.__lock:
+            workers = list(self.__workers.values())
+        decoded_times = [decoded_time for _, decoded_time in workers]
+        if len(decoded_times) == 0:
+            # all workers ended
+            self.__dispatch_frames_until(None)
+            return
+        if None in decoded_times: return
+        decoded_time = min(decoded_times)
+        self.__dispatch_frames_until(decoded_time)
+        for receiver, _ in workers:
+            receiver._complete_command_events(decoded_time)
+
+_frame_merger = None
+_frame_merger_lock = Lock()
+
+def get_frame_merger():
+    """Return the frame merger shared by all receivers decoding with decode workers. Create it if it does not exist yet."""
+    global _frame_merger
+    with _frame_merger_lock:
+        if _frame_merger is None:
+            _frame_merger = FrameMerger()
+        return _frame_merger
+
+class CommandEventStream():
+    """Iterator of the CommandEvents received for given sockets (default: all configured sockets) on the receiving pins of all their transceivers.
+
+    With decode workers (see setting DECODE_WORKERS) all events are handed
+    to the stream in the order they were received in, no matter on which
+    pin. If the stream is full, dispatching waits until events were taken
+    out of it (overflow 'block') or the oldest event in it is dropped
+    (overflow 'drop_oldest', see dropped_events), like with
+    gtsocket.aio.CommandStream. Close the stream once done (or use it as
+    context manager).
+    """
+    def __init__(self, sockets = None, max_queue_size = 256, start_receiving = True, overflow = 'block'):
+        if overflow not in COMMAND_STREAM_OVERFLOWS: raise SocketError('Unknown overflow {} of command stream.'.format(overflow))
+        self.sockets = list(sockets) if sockets is not None else [Socket(socket_name) for socket_name in get_config_registry().get_socket_names()]
+        self.overflow = overflow
+        """What happens if an event is put into the full stream (see COMMAND_STREAM_OVERFLOWS)."""
+        self.dropped_events = 0
+        """Number of events which were dropped since the stream was full."""
+        self.__queue = Queue(max_queue_size)
+        self.__closed = False
+        self.__started_sockets = []
+        """Sockets which started receiving for this stream (and stop when it is closed)."""
+        for socket in self.sockets:
+            socket.add_command_event_handler(self._put)
+            if start_receiving and not socket.is_receiving_active():
+                socket.start_receiving()
+                self.__started_sockets.append(socket)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        command_event = self.get()
+        if command_event is None: raise StopIteration()
+        return command_event
+
+    def get(self, timeout = None):
+        """Return the next CommandEvent or None once the stream is closed and all events were taken out. Raise queue.Empty if no event was received within timeout sec."""
+        end_time = time.time() + timeout if timeout is not None else None
+        while True:
+            try:
+                return self.__queue.get(True, 0.1 if end_time is None else max(0, min(0.1, end_time - time.time())))
+            except Empty:
+                if self.__closed and self.__queue.empty(): return None
+                if end_time is not None and time.time() >= end_time: raise
+
+    def close(self):
+        """Stop putting events into the stream. Events already in the stream can still be taken out."""
+        if self.__closed: return
+        self.__closed = True
+        for socket in self.sockets:
+            if self._put in socket._command_event_handlers: socket._command_event_handlers.remove(self._put)
+        for socket in self.__started_sockets:
+            socket.stop_receiving()
+
+    def _put(self, command_event):
+        """Put given command event into the queue. If it is full, wait until events were taken out or drop the oldest one (see overflow)."""
+        while not self.__closed:
+            try:
+                if self.overflow == 'block':
+                    self.__queue.put(command_event, True, 0.1)
+                else:
+                    self.__queue.put_nowait(command_event)
+                return
+            except Full:
+                if self.overflow == 'block': continue
+            try:
+                self.__queue.get_nowait()
+                self.dropped_events += 1
+            except Empty:
+                pass
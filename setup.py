@@ -17,9 +17,13 @@ setup(name='gtsocket',
       install_requires=[
           'future',
           'configparser',
+          'futures; python_version < "3"',
       ],
+      extras_require={
+          'batch': ['numpy'],
+      },
       test_suite='gtsocket.tests.test_suite',
-      scripts=['bin/gtsocket-test','bin/gtsocket-setup'],
+      scripts=['bin/gtsocket-test','bin/gtsocket-setup','bin/gtsocketd','bin/gtsocket-client','bin/gtsocket-benchmark'],
       classifiers=[
           'Development Status :: 4 - Beta',
           'Intended Audience :: Developers',